@@ -0,0 +1,65 @@
+"""
+Report the memory held by a large forest of syntax trees, in bytes per node
+and per statement.
+
+Run from the root of the repository:
+
+    python -m benchmarks.node_memory [statements]
+"""
+import sys
+import tracemalloc
+
+from rapt.treebrd.grammars import ExtendedGrammar, PrecedenceParser
+from rapt.treebrd.schema import Schema
+from rapt.treebrd.treebrd import TreeBRD
+
+SCHEMA = {'alpha': ['a1', 'a2', 'a3'], 'beta': ['b1', 'b2'],
+          'gamma': ['c1', 'c2', 'c3', 'c4']}
+
+STATEMENTS = [
+    '\\project_{a1, b1} \\select_{a1 = b1 and a2 > 3} (alpha \\join beta);',
+    '\\select_{c1 = "x"} gamma \\join_{c2 = a2} alpha;',
+    '\\rename_{r(x, y)} \\project_{b1, b2} beta;',
+    '\\project_{a1, a2} alpha \\union \\project_{a1, a2} '
+    '\\select_{a3 = 1} alpha;',
+]
+
+
+def measure(count, intern=False):
+    """
+    Return the number of nodes built and the bytes they hold.
+
+    :param count: the number of statements to build.
+    :param intern: flag for sharing identical subtrees.
+    :return: a pair of the node count and the allocated bytes.
+    """
+    grammar = ExtendedGrammar()
+    builder = TreeBRD(grammar, PrecedenceParser(grammar), intern)
+    statements = [STATEMENTS[i % len(STATEMENTS)] for i in range(count)]
+    trees = [builder.parse(statement)[0] for statement in statements]
+
+    schema = Schema(SCHEMA)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    forest = builder.bind(trees, schema)
+    allocated = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+
+    nodes = len({id(node) for root in forest
+                 for node in root.iter_post_order()})
+    return nodes, allocated
+
+
+def main(count=20000):
+    for intern in (False, True):
+        nodes, allocated = measure(count, intern)
+        print('{mode:>8}: {nodes} nodes, {per_node:.0f} bytes per node, '
+              '{per_statement:.0f} bytes per statement'
+              .format(mode='interned' if intern else 'trees', nodes=nodes,
+                      per_node=allocated / nodes,
+                      per_statement=allocated / count))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,73 @@
+from collections import OrderedDict
+
+# Eviction policies.
+LRU = 'lru'
+FIFO = 'fifo'
+POLICIES = (LRU, FIFO)
+
+
+class ResultCache:
+    """
+    A bounded cache of translation results.
+
+    When the cache is full, adding a result evicts the least recently used
+    result with the 'lru' policy, or the oldest result with the 'fifo'
+    policy.
+    """
+
+    def __init__(self, size=256, policy=LRU):
+        """
+        Initializes a ResultCache.
+
+        :param size: the maximum number of results to keep, or None for no
+        limit.
+        :param policy: the eviction policy, 'lru' or 'fifo'.
+        """
+        if policy not in POLICIES:
+            raise ValueError(
+                'Unknown eviction policy \'{policy}\'.'.format(policy=policy))
+        self.size = size
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._results = OrderedDict()
+
+    @property
+    def stats(self):
+        """
+        Return a dictionary with the hits, misses, evictions and current size
+        of the cache.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'size': len(self._results)}
+
+    def clear(self):
+        """
+        Remove every result from the cache. The counts are kept.
+        """
+        self._results.clear()
+
+    def get(self, key, compute):
+        """
+        Return the result for the key, computing and storing it if it is not
+        in the cache. Exceptions raised by compute are not stored.
+
+        :param key: a hashable key.
+        :param compute: a function of no arguments that returns the result.
+        :return: the result.
+        """
+        try:
+            result = self._results[key]
+        except KeyError:
+            self.misses += 1
+            result = compute()
+            self._results[key] = result
+            if self.size is not None and len(self._results) > self.size:
+                self._results.popitem(last=False)
+                self.evictions += 1
+        else:
+            self.hits += 1
+            if self.policy == LRU:
+                self._results.move_to_end(key)
+        return result
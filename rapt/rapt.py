@@ -1,5 +1,10 @@
-from rapt.treebrd.grammars import CoreGrammar, GRAMMARS
+from rapt.treebrd.grammars import CoreGrammar, GRAMMARS, PARSERS
+from rapt.treebrd.grammars.packrat import DEFAULT_CACHE_SIZE
 from rapt.treebrd.grammars.syntax import Syntax
+from rapt.treebrd.schema import Catalog, Schema
+from .cache import LRU, ResultCache
+from .treebrd.estimator import Estimator
+from .treebrd.optimizer import Optimizer
 from .treebrd.treebrd import TreeBRD
 from .transformers.sql import sql_translator
 from .transformers.qtree import qtree_translator
@@ -11,54 +16,235 @@ class Rapt:
         syntax = Syntax(**config.get('syntax', {}))
         grammar_class_name = config.get('grammar', 'Core Grammar')
         grammar_class = GRAMMARS.get(grammar_class_name, CoreGrammar)
-        return grammar_class(syntax)
+        cache_size = config.get('packrat_cache_size', DEFAULT_CACHE_SIZE)
+        return grammar_class(syntax, cache_size)
+
+    @staticmethod
+    def configure_parser(grammar, parser_name=None):
+        parser_class = PARSERS.get(parser_name)
+        return parser_class(grammar) if parser_class else None
+
+    @staticmethod
+    def configure_cache(size=0, policy=LRU):
+        return ResultCache(size, policy) if size != 0 else None
 
     def __init__(self, **config):
         grammar = self.configure_grammar(**config)
-        self.builder = TreeBRD(grammar)
+        parser = self.configure_parser(grammar, config.get('parser'))
+        self.builder = TreeBRD(grammar, parser, config.get('intern', False))
+        self.cache = self.configure_cache(config.get('cache_size', 0),
+                                          config.get('cache_policy', LRU))
+        self.optimizer = None
+        if config.get('optimize', False):
+            self.optimizer = Optimizer(grammar.syntax)
+        self.reorder_joins = config.get('reorder_joins', True)
+        self.minimize_distinct = config.get('minimize_distinct', False)
+
+    def parse(self, instring):
+        """
+        Return parse trees for the statements in the instring. Parse trees
+        do not depend on a schema, so they can be cached and bound to any
+        number of schemas.
+
+        :param instring: a relational algebra string
+        :return: a tuple of parse trees
+        """
+        return self.builder.parse(instring)
+
+    def bind(self, trees, schema):
+        """
+        Return a list of syntax trees for parse trees, resolving relations
+        and attributes in the schema.
+
+        :param trees: parse trees returned by parse
+        :param schema: a mapping of relation names to their attributes, or a
+        Catalog
+        :return: a list of syntax trees
+        """
+        schema = _catalog(schema)
+        return self._optimize(self.builder.bind(trees, schema), schema)
 
     def to_syntax_tree(self, instring, schema):
         """
         Return a list of syntax trees that represent the instring.
 
         :param instring: a relational algebra string
-        :param schema: a schema for the string
+        :param schema: a mapping of relation names to their attributes, or a
+        Catalog
         :return: a list of syntax trees
         """
-        return self.builder.build(instring, schema)
+        schema = _catalog(schema)
+        return self._optimize(self.builder.build(instring, schema), schema)
 
     def to_sql(self, instring, schema, use_bag_semantics=False):
         """
         Translate a relational algebra string into a SQL string.
 
         :param instring: a relational algebra string to translate
-        :param schema: a mapping of relation names to their attributes
+        :param schema: a mapping of relation names to their attributes, or a
+        Catalog
         :param use_bag_semantics: flag for using relational algebra bag semantics
         :return: a SQL translation string
         """
+        schema = _catalog(schema)
+
+        def translate(schema):
+            root_list = self.to_syntax_tree(instring, schema)
+            return sql_translator.translate(root_list, use_bag_semantics,
+                                            **self._distinct(schema))
+
+        return self._cached(('sql', instring, use_bag_semantics), schema,
+                            translate)
+
+    def write_sql(self, instring, schema, sink, use_bag_semantics=False):
+        """
+        Translate a relational algebra string into SQL, and write the
+        statements to a sink, each followed by a semicolon and a newline.
+
+        :param instring: a relational algebra string to translate
+        :param schema: a mapping of relation names to their attributes, or a
+        Catalog
+        :param sink: an object with a write method, such as a file object
+        :param use_bag_semantics: flag for using relational algebra bag semantics
+        """
+        schema = _catalog(schema)
         root_list = self.to_syntax_tree(instring, schema)
-        return sql_translator.translate(root_list, use_bag_semantics)
+        sql_translator.write(root_list, sink, use_bag_semantics,
+                             **self._distinct(schema))
+
+    def iter_sql(self, source, schema, use_bag_semantics=False):
+        """
+        Translate relational algebra statements into SQL strings, one
+        statement at a time.
 
-    def to_sql_sequence(self, instring, schema, use_bag_semantics=False):
+        :param source: a relational algebra string, a file object, or an
+        iterable of lines
+        :param schema: a mapping of relation names to their attributes, or a
+        Catalog
+        :param use_bag_semantics: flag for using relational algebra bag semantics
+        :return: an iterator over SQL translation strings
+        """
+        schema = _catalog(schema)
+        distinct = self._distinct(schema)
+        for root in self.builder.iter_build(source, schema):
+            root = self._optimize([root], schema)[0]
+            yield sql_translator.translate([root], use_bag_semantics,
+                                           **distinct)[0]
+
+    def to_sql_sequence(self, instring, schema, use_bag_semantics=False,
+                        use_temp_tables=False):
         """
         Translate a relational algebra string into a list of SQL strings generated
         by a post-order traversal of the parse tree for the input string.
 
         :param instring: a relational algebra string to translate
-        :param schema: a mapping of relation names to their attributes
+        :param schema: a mapping of relation names to their attributes, or a
+        Catalog
         :param use_bag_semantics: flag for using relational algebra bag semantics
+        :param use_temp_tables: flag for storing intermediate results in
+        temporary tables that later statements read from, which keeps the
+        output linear in the size of the tree
         :return: a list of SQL translation strings
         """
-        root_list = self.to_syntax_tree(instring, schema)
-        return [
-            sql_translator.translate(root.post_order(), use_bag_semantics)
-            for root in root_list
-        ]
+        schema = _catalog(schema)
+
+        def translate(schema):
+            root_list = self.to_syntax_tree(instring, schema)
+            return sql_translator.translate_sequences(
+                root_list, use_bag_semantics, use_temp_tables,
+                **self._distinct(schema))
+
+        key = ('sql_sequence', instring, use_bag_semantics, use_temp_tables)
+        return self._cached(key, schema, translate)
 
     def to_qtree(self, instring, schema):
         """
         Translate a relational algebra string into a string representing a
         latex tree, using the grammar.
         """
-        root_list = self.to_syntax_tree(instring, schema)
-        return qtree_translator.translate(root_list)
\ No newline at end of file
+        schema = _catalog(schema)
+
+        def translate(schema):
+            root_list = self.to_syntax_tree(instring, schema)
+            return qtree_translator.translate(root_list)
+
+        return self._cached(('qtree', instring), schema, translate)
+
+    def explain(self, instring, schema):
+        """
+        Return the plan of each statement in the instring: the syntax tree
+        that is translated, one node to a line, with the estimated number of
+        rows each node produces, the work to produce them, and the cost of
+        its subtree. Estimates use the statistics in the schema.
+
+        :param instring: a relational algebra string
+        :param schema: a mapping of relation names to their attributes, or a
+        Catalog
+        :return: a list of plan strings
+        """
+        schema = _catalog(schema)
+        estimator = self._estimator(schema)
+        return [estimator.explain(root)
+                for root in self.to_syntax_tree(instring, schema)]
+
+    def estimate_cost(self, instring, schema):
+        """
+        Return the estimated cost of each statement in the instring, to find
+        expensive queries before they are run.
+
+        :param instring: a relational algebra string
+        :param schema: a mapping of relation names to their attributes, or a
+        Catalog
+        :return: a list of numbers
+        """
+        schema = _catalog(schema)
+        estimator = self._estimator(schema)
+        return [estimator.cost(root)
+                for root in self.to_syntax_tree(instring, schema)]
+
+    def _estimator(self, schema):
+        return Estimator(_catalog(schema), self.builder.grammar.syntax)
+
+    def _distinct(self, schema):
+        """
+        Return the options that make the SQL translator use DISTINCT only
+        where duplicates can arise, if that is enabled.
+        """
+        if not self.minimize_distinct:
+            return {}
+        return {'minimize_distinct': True, 'catalog': _catalog(schema)}
+
+    def _optimize(self, root_list, schema):
+        """
+        Return the syntax trees, optimized with the statistics in the schema
+        if the optimizer is enabled. Joins keep the order they were written
+        in if reordering is turned off.
+        """
+        if self.optimizer is None:
+            return root_list
+        catalog = _catalog(schema) if self.reorder_joins else None
+        return [self.optimizer.optimize(root, catalog) for root in root_list]
+
+    def _cached(self, key, schema, translate):
+        """
+        Return the list that translate returns for the schema, from the
+        cache if it is enabled. The key identifies the request, apart from
+        the schema, whose fingerprint is added to it.
+        """
+        if self.cache is None:
+            return translate(schema)
+        schema = _catalog(schema)
+        result = self.cache.get(key + (schema.fingerprint,),
+                                lambda: tuple(translate(schema)))
+        return list(result)
+
+
+def _catalog(schema):
+    """
+    Return the schema as a Catalog, building a Schema from a mapping. Each
+    request wraps its schema once, so the relations of a mapping are not
+    copied again for every statement.
+    """
+    if not isinstance(schema, Catalog):
+        schema = Schema(schema)
+    return schema
@@ -20,13 +20,57 @@ class BaseTranslator:
             Operator.difference: self.difference,
             Operator.intersect: self.intersect
         }
+        # Translations of the children of the node being translated, keyed
+        # by the identity of the child. A child that is both the left and the
+        # right operand has two translations, in that order.
+        self._translated = {}
 
     def translate(self, node):
         """
         Translate a node into some output format.
+
+        The tree is translated bottom up, so the translation of a child is
+        ready by the time its parent asks for it, and deep trees do not
+        exhaust the recursion limit.
         :param node: a treebrd node
         :return: a node's translation to some format
         """
+        translated = self._translated.get(id(node))
+        if translated:
+            return translated.pop(0)
+        return self._translate_tree(node)
+
+    def _translate_tree(self, root, visit=None):
+        """
+        Translate every node of the tree rooted at root in post-order, and
+        return the translation of root. Each node is translated once for
+        every place it appears in the tree, even if the tree shares it.
+        :param root: a treebrd node
+        :param visit: a function called with each node and its translation,
+        which returns the translation to give the node's parent
+        :return: the translation of root
+        """
+        translated = self._translated
+        results = []
+        try:
+            for node in root.iter_post_order():
+                children = node.children
+                self._translated = {}
+                if children:
+                    for child, result in zip(children,
+                                             results[-len(children):]):
+                        self._translated.setdefault(id(child), []).append(
+                            result)
+                    del results[-len(children):]
+                result = self._dispatch(node)
+                if visit is not None:
+                    result = visit(node, result)
+                results.append(result)
+        finally:
+            self._translated = translated
+        return results.pop()
+
+    def _dispatch(self, node):
         _translate = self._translate_functions.get(node.operator)
         return _translate(node)
 
@@ -6,6 +6,10 @@ class Translator(BaseTranslator):
     """
     A Translator defining the operations for translating a relational algebra
     statement into a latex tree output.
+
+    A translation is a string, or a tuple of translations. Nodes embed the
+    translations of their children instead of copying their text, and the
+    text of the whole tree is only produced when it is rendered.
     """
 
     def relation(self, node):
@@ -23,9 +27,9 @@ class Translator(BaseTranslator):
         :return: a qtree subtree rooted at the node
         """
         child = self.translate(node.child)
-        return '[.${op}_{{{conditions}}}$ {child} ]'\
+        return '[.${op}_{{{conditions}}}$ '\
             .format(op=latex_operator[node.operator],
-                    conditions=node.conditions, child=child)
+                    conditions=node.conditions), child, ' ]'
 
     def project(self, node):
         """
@@ -34,10 +38,9 @@ class Translator(BaseTranslator):
         :return: a qtree subtree rooted at the node
         """
         child = self.translate(node.child)
-        return '[.${op}_{{{attributes}}}$ {child} ]'\
+        return '[.${op}_{{{attributes}}}$ '\
             .format(op=latex_operator[node.operator],
-                    attributes=', '.join(node.attributes.names),
-                    child=child)
+                    attributes=', '.join(node.attributes.names)), child, ' ]'
 
     def rename(self, node):
         """
@@ -49,10 +52,9 @@ class Translator(BaseTranslator):
         attributes = ''
         if node.attributes:
             attributes = '({})'.format(', '.join(node.attributes.names))
-        return '[.${op}_{{{name}{attributes}}}$ {child} ]'\
+        return '[.${op}_{{{name}{attributes}}}$ '\
             .format(op=latex_operator[node.operator], name=node.name,
-                    attributes=attributes,
-                    child=child)
+                    attributes=attributes), child, ' ]'
 
     def assign(self, node):
         """
@@ -64,8 +66,8 @@ class Translator(BaseTranslator):
         attributes = ''
         if node.attributes:
             attributes = '({})'.format(','.join(node.attributes.names))
-        return '[.${name}{attributes}$ {child} ]'\
-            .format(name=node.name, attributes=attributes, child=child)
+        return '[.${name}{attributes}$ '\
+            .format(name=node.name, attributes=attributes), child, ' ]'
 
     def theta_join(self, node):
         """
@@ -73,11 +75,11 @@ class Translator(BaseTranslator):
         :param node: a treebrd node
         :return: a qtree subtree rooted at the node
         """
-        return '[.${op}_{{{conditions}}}$ {left} {right} ]'\
-            .format(op=latex_operator[node.operator],
-                    conditions=node.conditions,
-                    left=self.translate(node.left),
-                    right=self.translate(node.right))
+        return ('[.${op}_{{{conditions}}}$ '
+                .format(op=latex_operator[node.operator],
+                        conditions=node.conditions),
+                self.translate(node.left), ' ', self.translate(node.right),
+                ' ]')
 
     def cross_join(self, node):
         """
@@ -125,10 +127,28 @@ class Translator(BaseTranslator):
         :param node: a treebrd node
         :return: a qtree subtree rooted at the node
         """
-        return '[.${op}$ {left} {right} ]'\
-            .format(op=latex_operator[node.operator],
-                    left=self.translate(node.left),
-                    right=self.translate(node.right))
+        return ('[.${op}$ '.format(op=latex_operator[node.operator]),
+                self.translate(node.left), ' ', self.translate(node.right),
+                ' ]')
+
+
+def render(translation):
+    """
+    Return the text of a translation, joining its strings in order. The
+    translation is walked with an explicit stack, so the text is built in
+    time linear in its length, whatever the depth of the tree.
+    :param translation: a string, or a tuple of translations
+    :return: a string
+    """
+    fragments = []
+    stack = [translation]
+    while stack:
+        block = stack.pop()
+        if isinstance(block, str):
+            fragments.append(block)
+        else:
+            stack.extend(reversed(block))
+    return ''.join(fragments)
 
 
 def translate(roots):
@@ -137,5 +157,5 @@ def translate(roots):
     :param root: a treebrd node
     :return:  a string representing a latex qtree rooted at root
     """
-    return ['\\Tree{root}'.format(root=Translator().translate(root))
+    return ['\\Tree' + render(Translator().translate(root))
             for root in roots]
\ No newline at end of file
@@ -6,7 +6,14 @@ from ..base_translator import BaseTranslator
 class SQLQuery:
     """
     Structure defining the building blocks of a SQL query.
+
+    A block is a string, a SQLQuery, or a tuple of blocks. Queries embed the
+    queries of their children instead of copying their text, and the text of
+    the whole tree is only produced when it is rendered.
     """
+
+    __slots__ = ('prefix', 'select_block', 'from_block', 'where_block')
+
     def __init__(self, select_block, from_block, where_block=''):
         self.prefix = ''
         self.select_block = select_block
@@ -14,39 +21,68 @@ class SQLQuery:
         self.where_block = where_block
 
     @property
-    def _basic_query(self):
+    def _select_clause(self):
         if self.select_block:
-            return '{prefix}' \
-                   'SELECT {select} FROM {relation}'
+            return ['SELECT ', self.select_block, ' FROM ']
         else:
-            return '{prefix}{relation}'
+            return []
 
     @property
-    def _sql_query_skeleton(self):
-        sql = self._basic_query
+    def _parts(self):
+        parts = [self.prefix] + self._select_clause + [self.from_block]
         if self.where_block:
-            sql += ' WHERE {conditions}'
-        return sql
+            parts += [' WHERE ', self.where_block]
+        return parts
+
+    def fragments(self):
+        """
+        Generate the strings that make up the SQL query, in order.
+        :return: an iterator over strings
+        """
+        stack = [self]
+        while stack:
+            block = stack.pop()
+            if isinstance(block, str):
+                if block:
+                    yield block
+            elif isinstance(block, SQLQuery):
+                stack.extend(reversed(block._parts))
+            else:
+                stack.extend(reversed(block))
+
+    def write(self, sink):
+        """
+        Write the SQL query to a sink.
+        :param sink: an object with a write method, such as a file object
+        """
+        for fragment in self.fragments():
+            sink.write(fragment)
 
     def to_sql(self):
         """
         Construct a SQL query based on the stored blocks.
         :return: a SQL query
         """
-        return self._sql_query_skeleton.format(
-            prefix=self.prefix, select=self.select_block,
-            relation=self.from_block, conditions=self.where_block)
+        return ''.join(self.fragments())
 
 
 class SQLSetQuery(SQLQuery):
     """
     Structure defining the building blocks of a SQL query with set semantics.
+    Queries that cannot return duplicates can leave out the DISTINCT.
     """
 
+    __slots__ = ('distinct',)
+
+    def __init__(self, select_block, from_block, where_block='',
+                 distinct=True):
+        super().__init__(select_block, from_block, where_block)
+        self.distinct = distinct
+
     @property
-    def _basic_query(self):
-        return '{prefix}' \
-               'SELECT DISTINCT {select} FROM {relation}'
+    def _select_clause(self):
+        select = 'SELECT DISTINCT ' if self.distinct else 'SELECT '
+        return [select, self.select_block, ' FROM ']
 
 
 class Translator(BaseTranslator):
@@ -56,9 +92,31 @@ class Translator(BaseTranslator):
     """
     query = SQLQuery
 
+    def __init__(self):
+        super().__init__()
+        # Temporary names are numbered in the order they are needed, so the
+        # same tree always translates to the same SQL.
+        self._temp_names = 0
+
+    def _get_temp_name(self, node):
+        return node.name or self._new_temp_name()
+
+    def _new_temp_name(self):
+        self._temp_names += 1
+        return '_{}'.format(self._temp_names)
+
     @classmethod
-    def _get_temp_name(cls, node):
-        return node.name or '_{}'.format(id(node))
+    def _can_store(cls, node):
+        """
+        Return True if the result of a node can be stored in a table and read
+        back as the relation it names: its attributes must have unique names
+        and share the node's name as their prefix.
+        """
+        names = node.attributes.names
+        return (node.operator != Operator.relation and
+                len(set(names)) == len(names) and
+                all(attribute.prefix == node.name
+                    for attribute in node.attributes))
 
     @classmethod
     def _get_sql_operator(cls, node):
@@ -72,6 +130,55 @@ class Translator(BaseTranslator):
         }
         return operators[node.operator]
 
+    def translate_statement(self, root):
+        """
+        Translate the tree rooted at root into the query of a complete SQL
+        statement.
+        :param root: a treebrd node
+        :return: a SQLQuery object for the tree rooted at root
+        """
+        return self._statement(root, self.translate(root))
+
+    def _statement(self, node, query):
+        """
+        Return the query to run as a statement for the result of node, given
+        the query that the node's parent embeds.
+        """
+        return query
+
+    def translate_sequence(self, root, use_temp_tables=False):
+        """
+        Translate every node of the tree rooted at root into SQL, in
+        post-order. The query of each node is derived from the queries
+        already built for its children, rather than by translating its
+        subtree again.
+        :param root: a treebrd node
+        :param use_temp_tables: flag for storing the result of each step that
+        can be read back as a relation in a temporary table, which later
+        steps read from instead of repeating its query
+        :return: a list of SQL statements
+        """
+        sequence = []
+
+        def visit(node, query):
+            sql = self._statement(node, query).to_sql()
+            if use_temp_tables and node is not root and \
+                    self._can_store(node):
+                table = self._new_temp_name()
+                sql = 'CREATE TEMPORARY TABLE {table}({attributes}) AS ' \
+                      '{query}'.format(
+                          table=table, query=sql,
+                          attributes=', '.join(node.attributes.names))
+                from_block = table
+                if node.name:
+                    from_block = '{} AS {}'.format(table, node.name)
+                query = self.query(str(node.attributes), from_block)
+            sequence.append(sql)
+            return query
+
+        self._translate_tree(root, visit)
+        return sequence
+
     def relation(self, node):
         """
         Translate a relation node into SQLQuery.
@@ -89,10 +196,10 @@ class Translator(BaseTranslator):
         """
 
         child_object = self.translate(node.child)
-        where_block = node.conditions
+        where_block = str(node.conditions)
         if child_object.where_block:
-              where_block = '({0}) AND ({1})'\
-                  .format(child_object.where_block, node.conditions)
+            where_block = ('(', child_object.where_block, ') AND (',
+                           where_block, ')')
         child_object.where_block = where_block
         if not child_object.select_block:
             child_object.select_block = str(node.attributes)
@@ -115,9 +222,8 @@ class Translator(BaseTranslator):
         :return: a SQLQuery object for the tree rooted at node
         """
         child_object = self.translate(node.child)
-        from_block = '({child}) AS {name}({attributes})'.format(
-            child=child_object.to_sql(), name=node.name,
-            attributes=', '.join(node.attributes.names))
+        from_block = ('(', child_object, ') AS ', node.name, '(',
+                      ', '.join(node.attributes.names), ')')
         return self.query(str(node.attributes), from_block=from_block)
 
     def assign(self, node):
@@ -186,8 +292,7 @@ class Translator(BaseTranslator):
             }:
                 return sobject.from_block
             else:
-                return '({subquery}) AS {name}'.format(
-                    subquery=sobject.to_sql(), name=self._get_temp_name(node))
+                return '(', sobject, ') AS ', self._get_temp_name(node)
 
     def _join(self, node):
         """
@@ -197,15 +302,12 @@ class Translator(BaseTranslator):
         """
 
         select_block = str(node.attributes)
-        from_block = '{left} {operator} {right}'.format(
-            left=self._join_helper(node.left),
-            right=self._join_helper(node.right),
-            operator=self._get_sql_operator(node))
+        from_block = (self._join_helper(node.left), ' ',
+                      self._get_sql_operator(node), ' ',
+                      self._join_helper(node.right))
 
         if node.operator == Operator.theta_join:
-            from_block = '{from_block} ON {conditions}'.format(
-                from_block=from_block,
-                conditions=node.conditions)
+            from_block += (' ON ', str(node.conditions))
 
         return self.query(select_block, from_block, '')
 
@@ -216,10 +318,10 @@ class Translator(BaseTranslator):
         :return: a SQLQuery object for the tree rooted at node
         """
         select_block = str(node.attributes)
-        from_block = '({left} {operator} ALL {right}) AS {name}'.format(
-            left=self.translate(node.left).to_sql(),
-            right=self.translate(node.right).to_sql(),
-            operator=self._get_sql_operator(node), name=self._get_temp_name(node))
+        from_block = ('(', self.translate(node.left), ' ',
+                      self._get_sql_operator(node), ' ALL ',
+                      self.translate(node.right), ') AS ',
+                      self._get_temp_name(node))
         return self.query(select_block=select_block, from_block=from_block)
 
 
@@ -237,20 +339,215 @@ class SetTranslator(Translator):
         :return: a SQLSetQuery object for the tree rooted at node
         """
         select_block = str(node.attributes)
-        from_block = '({left} {operator} {right}) AS {name}'.format(
-            left=self.translate(node.left).to_sql(),
-            right=self.translate(node.right).to_sql(),
-            operator=self._get_sql_operator(node), name=self._get_temp_name(node))
+        from_block = ('(', self.translate(node.left), ' ',
+                      self._get_sql_operator(node), ' ',
+                      self.translate(node.right), ') AS ',
+                      self._get_temp_name(node))
         return self.query(select_block=select_block, from_block=from_block)
 
 
-def translate(root_list, use_bag_semantics=False):
+class MinimalSetTranslator(SetTranslator):
+    """
+    A Translator defining the operations for translating a relational algebra
+    statement into a SQL statement using set semantics, removing duplicates
+    only where they can arise.
+
+    Selections, projections, joins and unions give the same set whether
+    their inputs are deduplicated or not, so the queries inside a statement
+    keep their duplicates and the statement removes them once, at the top.
+    INTERSECT and EXCEPT keep their set semantics. A statement leaves out
+    the DISTINCT when its result has a key: a base relation with a key
+    declared in the catalog, or a result built from such relations that
+    keeps one of their keys.
+    """
+
+    # The number of keys kept for a result. Joins multiply the keys of their
+    # inputs, so only the smallest are kept.
+    MAX_KEYS = 8
+
+    def __init__(self, catalog=None):
+        """
+        Initializes a MinimalSetTranslator.
+        :param catalog: a Catalog with the keys of the relations, or None
+        """
+        super().__init__()
+        self.catalog = catalog
+        self._keys = {}
+
+    def query(self, select_block, from_block, where_block=''):
+        return SQLSetQuery(select_block, from_block, where_block,
+                           distinct=False)
+
+    def _statement(self, node, query):
+        if self.keys(node):
+            return query
+        statement = SQLSetQuery(query.select_block, query.from_block,
+                                query.where_block)
+        statement.prefix = query.prefix
+        return statement
+
+    def _set_op(self, node):
+        if node.operator == Operator.union:
+            return Translator._set_op(self, node)
+        return super()._set_op(node)
+
+    def keys(self, node):
+        """
+        Return the keys of the result of a node, the sets of attributes that
+        no two of its rows have the same values for. A result without keys
+        may contain duplicates.
+        :param node: a treebrd node
+        :return: a list of frozensets of attributes
+        """
+        if id(node) not in self._keys:
+            for each in node.iter_post_order():
+                if id(each) not in self._keys:
+                    keys = sorted(set(self._node_keys(each)), key=len)
+                    self._keys[id(each)] = each, keys[:self.MAX_KEYS]
+        return self._keys[id(node)][1]
+
+    def _node_keys(self, node):
+        operator = node.operator
+        if operator == Operator.relation:
+            if self.catalog is None:
+                return []
+            attributes = dict(zip(node.attributes.names, node.attributes))
+            return [frozenset(attributes[name] for name in key)
+                    for key in self.catalog.keys(node.name)]
+        if operator == Operator.select:
+            return self.keys(node.child)
+        if operator == Operator.project:
+            attributes = set(node.attributes)
+            return [key for key in self.keys(node.child)
+                    if key <= attributes]
+        if operator in {Operator.rename, Operator.assign}:
+            return _map_keys(self.keys(node.child), node.child.attributes,
+                             node.attributes)
+        if operator in {Operator.cross_join, Operator.theta_join,
+                        Operator.natural_join}:
+            right_keys = self.keys(node.right)
+            if operator == Operator.natural_join:
+                left = dict(zip(node.left.attributes.names,
+                                node.left.attributes))
+                right_keys = _map_keys(
+                    right_keys, node.right.attributes,
+                    [left.get(attribute.name, attribute)
+                     for attribute in node.right.attributes])
+            return [left_key | right_key
+                    for left_key in self.keys(node.left)
+                    for right_key in right_keys]
+        if operator == Operator.union:
+            return []
+        # INTERSECT and EXCEPT return sets, which keep the keys of their left
+        # input, and of their right input for INTERSECT.
+        keys = [frozenset(node.attributes)]
+        keys += _map_keys(self.keys(node.left), node.left.attributes,
+                          node.attributes)
+        if operator == Operator.intersect:
+            keys += _map_keys(self.keys(node.right), node.right.attributes,
+                              node.attributes)
+        return keys
+
+
+def _map_keys(keys, attributes, replacements):
+    """
+    Return the keys with each attribute replaced by the attribute in the
+    same position of replacements, or no keys if the attributes are not
+    unique.
+    """
+    attributes = list(attributes)
+    if AttributeList.has_duplicates(attributes):
+        return []
+    mapping = dict(zip(attributes, replacements))
+    return [frozenset(mapping[attribute] for attribute in key)
+            for key in keys]
+
+
+def _translator(use_bag_semantics, minimize_distinct, catalog):
+    if use_bag_semantics:
+        return Translator()
+    if minimize_distinct:
+        return MinimalSetTranslator(catalog)
+    return SetTranslator()
+
+
+def translate(root_list, use_bag_semantics=False, minimize_distinct=False,
+              catalog=None):
     """
     Translate a list of relational algebra trees into SQL statements.
 
     :param root_list: a list of tree roots
     :param use_bag_semantics: flag for using relational algebra bag semantics
+    :param minimize_distinct: flag for using DISTINCT only where duplicates
+    can arise, with set semantics
+    :param catalog: a Catalog with the keys of the relations, used when
+    minimize_distinct is set
     :return: a list of SQL statements
     """
-    translator = (Translator() if use_bag_semantics else SetTranslator())
-    return [translator.translate(root).to_sql() for root in root_list]
\ No newline at end of file
+    return [_translator(use_bag_semantics, minimize_distinct, catalog)
+            .translate_statement(root).to_sql() for root in root_list]
+
+
+def write(root_list, sink, use_bag_semantics=False, minimize_distinct=False,
+          catalog=None):
+    """
+    Translate a list of relational algebra trees into SQL statements, and
+    write them to a sink, each followed by a semicolon and a newline. The
+    statements are written piece by piece, without building their text.
+
+    :param root_list: a list of tree roots
+    :param sink: an object with a write method, such as a file object
+    :param use_bag_semantics: flag for using relational algebra bag semantics
+    :param minimize_distinct: flag for using DISTINCT only where duplicates
+    can arise, with set semantics
+    :param catalog: a Catalog with the keys of the relations, used when
+    minimize_distinct is set
+    """
+    for root in root_list:
+        _translator(use_bag_semantics, minimize_distinct, catalog) \
+            .translate_statement(root).write(sink)
+        sink.write(';\n')
+
+
+def translate_sequence(root, use_bag_semantics=False, use_temp_tables=False,
+                       minimize_distinct=False, catalog=None):
+    """
+    Translate a relational algebra tree into a list of SQL statements, one
+    for every node in post-order.
+
+    :param root: a tree root
+    :param use_bag_semantics: flag for using relational algebra bag semantics
+    :param use_temp_tables: flag for reading the result of earlier steps from
+    temporary tables
+    :param minimize_distinct: flag for using DISTINCT only where duplicates
+    can arise, with set semantics
+    :param catalog: a Catalog with the keys of the relations, used when
+    minimize_distinct is set
+    :return: a list of SQL statements
+    """
+    return translate_sequences([root], use_bag_semantics, use_temp_tables,
+                               minimize_distinct, catalog)[0]
+
+
+def translate_sequences(root_list, use_bag_semantics=False,
+                        use_temp_tables=False, minimize_distinct=False,
+                        catalog=None):
+    """
+    Translate a list of relational algebra trees into lists of SQL
+    statements, one for every node of each tree in post-order. The
+    sequences run in one session, so the temporary tables of every sequence
+    are named apart.
+
+    :param root_list: a list of tree roots
+    :param use_bag_semantics: flag for using relational algebra bag semantics
+    :param use_temp_tables: flag for reading the result of earlier steps from
+    temporary tables
+    :param minimize_distinct: flag for using DISTINCT only where duplicates
+    can arise, with set semantics
+    :param catalog: a Catalog with the keys of the relations, used when
+    minimize_distinct is set
+    :return: a list of lists of SQL statements
+    """
+    translator = _translator(use_bag_semantics, minimize_distinct, catalog)
+    return [translator.translate_sequence(root, use_temp_tables)
+            for root in root_list]
@@ -1,21 +1,32 @@
 from collections import namedtuple
 import itertools
+import sys
 
 from .errors import InputError, AttributeReferenceError
 
 
-class Attribute(namedtuple('Attribute', ['name', 'prefix'])):
+class Attribute(namedtuple('Attribute', ['name', 'prefix', 'prefixed'])):
     """
     An Attribute is a relational algebra attribute. Attributes have optional
     prefixes which reference the relation they belong to.
+
+    The prefixed name is built once, and names are interned, so attributes
+    of the same name share their strings and compare and hash quickly.
     """
 
-    @property
-    def prefixed(self):
-        if self.prefix:
-            return '{pr}.{nm}'.format(pr=self.prefix, nm=self.name)
+    __slots__ = ()
+
+    def __new__(cls, name, prefix):
+        name = sys.intern(name)
+        if prefix:
+            prefix = sys.intern(prefix)
+            prefixed = sys.intern('{pr}.{nm}'.format(pr=prefix, nm=name))
         else:
-            return self.name
+            prefixed = name
+        return super().__new__(cls, name, prefix, prefixed)
+
+    def __getnewargs__(self):
+        return self.name, self.prefix
 
     def __eq__(self, other):
         if type(self) is type(other):
@@ -34,8 +45,17 @@ class AttributeList:
     A AttributeList is an ordered collection of relational algebra attributes.
 
     Attributes can have a prefix, which reference the relation they belong to.
+
+    References are resolved through an index of the positions of every name,
+    so lookups do not scan the list. The index is built on the first lookup
+    after the contents change.
+
+    The contents and the index are replaced rather than updated, so a copy of
+    an AttributeList shares both with the original until either is changed.
     """
 
+    __slots__ = ('_contents', '_index')
+
     @classmethod
     def merge(cls, first, second):
         """
@@ -45,8 +65,8 @@ class AttributeList:
 
         assert (isinstance(first, AttributeList))
         assert (isinstance(second, AttributeList))
-        merged._contents = first._contents[:]
-        merged._contents += second._contents[:]
+        merged._contents = first._contents + second._contents
+        merged._index = None
 
         return merged
 
@@ -59,6 +79,7 @@ class AttributeList:
 
     def __init__(self, names, prefix):
         self._contents = []
+        self._index = None
         self.extend(names, prefix)
 
     def __str__(self):
@@ -93,7 +114,7 @@ class AttributeList:
         """
         Return a list of the names of the Attributes in the AttributeList.
         """
-        return [name for name, _ in self._contents]
+        return [attribute.name for attribute in self._contents]
 
     def validate(self, references):
         """
@@ -116,21 +137,34 @@ class AttributeList:
         """
         prefix, _, name = reference.rpartition('.')
 
-        match = None
-        for attribute in self._contents:
-            if name == attribute.name and \
-                    (not prefix or prefix == attribute.prefix):
-                if match:
-                    raise AttributeReferenceError(
-                        'Ambiguous attribute reference: {}.'.format(
-                            attribute.name))
-                else:
-                    match = attribute
-
-        if match:
-            return match
-        raise AttributeReferenceError(
-            'Attribute does not exist: {}'.format(reference))
+        positions = self._get_index().get(name, ())
+        if isinstance(positions, int):
+            positions = (positions,)
+        matches = [self._contents[position] for position in positions
+                   if not prefix or prefix == self._contents[position].prefix]
+        if not matches:
+            raise AttributeReferenceError(
+                'Attribute does not exist: {}'.format(reference))
+        if len(matches) > 1:
+            raise AttributeReferenceError(
+                'Ambiguous attribute reference: {}.'.format(name))
+        return matches[0]
+
+    def _get_index(self):
+        """
+        Return a dictionary of the position of every name in the list, or a
+        tuple of positions for names that appear more than once.
+        """
+        if self._index is None:
+            index = {}
+            for position, attribute in enumerate(self._contents):
+                found = index.setdefault(attribute.name, position)
+                if found != position:
+                    if isinstance(found, int):
+                        found = (found,)
+                    index[attribute.name] = found + (position,)
+            self._index = index
+        return self._index
 
     def extend(self, attributes, prefix):
         """
@@ -138,7 +172,9 @@ class AttributeList:
         list.
         """
 
-        self._contents += [Attribute(attr, prefix) for attr in attributes]
+        self._contents = self._contents + [Attribute(attr, prefix)
+                                           for attr in attributes]
+        self._index = None
 
     def trim(self, restriction_list):
         """
@@ -152,6 +188,7 @@ class AttributeList:
         if self.has_duplicates(replacement):
             raise AttributeReferenceError('Duplicate attribute reference.')
         self._contents = replacement
+        self._index = None
 
     def rename(self, names, prefix):
         """
@@ -179,3 +216,4 @@ class AttributeList:
             new_prefix = prefix or old.prefix
             replacement.append(Attribute(new_name, new_prefix))
         self._contents = replacement
+        self._index = None
@@ -0,0 +1,182 @@
+import csv
+import hashlib
+import json
+import mmap
+import re
+
+from rapt.treebrd.errors import InputError
+from rapt.treebrd.schema import Catalog
+
+# Patterns are written as unrolled loops, which the re module matches
+# without backtracking. Arrays are only delimited while indexing; their
+# contents are checked when they are decoded.
+_STRING = rb'"[^"\\]*(?:\\.[^"\\]*)*"'
+_JSON_OPEN = re.compile(rb'\s*\{')
+_JSON_MEMBER = re.compile(
+    rb'\s*(' + _STRING + rb')\s*:\s*(\[[^"\]]*(?:' + _STRING +
+    rb'[^"\]]*)*\])\s*(,?)', re.DOTALL)
+_JSON_CLOSE = re.compile(rb'\s*\}\s*\Z')
+
+
+class FileCatalog(Catalog):
+    """
+    A catalog of relation definitions stored in a file.
+
+    The file is memory mapped and indexed once, when the catalog is opened,
+    recording where the definition of each relation is. A definition is
+    only decoded the first time it is looked up, so the memory a catalog
+    uses depends on the relations that queries name, not on the size of the
+    file. Subclasses implement _scan and _decode for a file format.
+    """
+
+    def __init__(self, path):
+        """
+        Initializes a FileCatalog.
+
+        :param path: the path of the catalog file.
+        :raise InputError: Raised if the file is not a valid catalog.
+        """
+        self._file = open(path, 'rb')
+        try:
+            try:
+                self._buffer = mmap.mmap(self._file.fileno(), 0,
+                                         access=mmap.ACCESS_READ)
+            except ValueError:
+                # An empty file cannot be mapped.
+                self._buffer = b''
+            self._index = {}
+            for name, start, stop in self._scan(self._buffer):
+                self._index[name.lower()] = (start, stop)
+        except Exception:
+            self.close()
+            raise
+        self._loaded = {}
+        self._fingerprint = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Close the catalog file. Definitions that were already looked up
+        remain available.
+        """
+        if isinstance(getattr(self, '_buffer', None), mmap.mmap):
+            self._buffer.close()
+        self._file.close()
+
+    @property
+    def fingerprint(self):
+        """
+        Return a digest of the catalog file, computed the first time it is
+        asked for.
+        """
+        if self._fingerprint is None:
+            digest = hashlib.sha1(type(self).__name__.encode('utf-8'))
+            digest.update(self._buffer)
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def lookup(self, name):
+        attributes = self._loaded.get(name)
+        if attributes is None:
+            span = self._index.get(name)
+            if span is None:
+                return None
+            start, stop = span
+            attributes = tuple(attr.lower() for attr in
+                               self._decode(self._buffer[start:stop]))
+            self._loaded[name] = attributes
+        return attributes
+
+    def names(self):
+        return self._index.keys()
+
+    def _scan(self, buffer):
+        """
+        Generate the name of each relation in the buffer, with the start and
+        stop offsets of its definition.
+        """
+        raise NotImplementedError
+
+    def _decode(self, data):
+        """
+        Return the attributes in the bytes of a definition.
+        """
+        raise NotImplementedError
+
+
+class JsonCatalog(FileCatalog):
+    """
+    A catalog stored as a JSON object of relation names to lists of
+    attributes, the same form as a schema dictionary.
+    """
+
+    def _scan(self, buffer):
+        opening = _JSON_OPEN.match(buffer)
+        if not opening:
+            raise InputError('Catalog must be a JSON object.')
+        position = opening.end()
+        member = _JSON_MEMBER.match(buffer, position)
+        while member:
+            name = member.group(1)
+            if b'\\' in name:
+                name = json.loads(name.decode('utf-8'))
+            else:
+                name = name[1:-1].decode('utf-8')
+            yield name, member.start(2), member.end(2)
+            position = member.end()
+            if not member.group(3):
+                break
+            member = _JSON_MEMBER.match(buffer, position)
+        if member is None and position != opening.end() or \
+                not _JSON_CLOSE.match(buffer, position):
+            raise InputError(
+                'Invalid catalog definition at byte {position}.'.format(
+                    position=position))
+
+    def _decode(self, data):
+        try:
+            attributes = json.loads(data.decode('utf-8'))
+        except ValueError:
+            attributes = [None]
+        if not all(isinstance(attr, str) for attr in attributes):
+            raise InputError(
+                'Invalid catalog definition {definition}.'.format(
+                    definition=data.decode('utf-8', 'replace')))
+        return attributes
+
+
+class CsvCatalog(FileCatalog):
+    """
+    A catalog stored as CSV, with one relation on each line: the name of
+    the relation followed by its attributes. Blank lines are ignored.
+    Fields may be quoted, but may not contain line breaks.
+    """
+
+    def _scan(self, buffer):
+        start = 0
+        end = len(buffer)
+        while start < end:
+            stop = buffer.find(b'\n', start)
+            if stop == -1:
+                stop = end
+            line = buffer[start:stop].rstrip(b'\r')
+            if line.strip():
+                if line.lstrip().startswith(b'"'):
+                    name = self._decode_row(line)[0]
+                else:
+                    name = line.split(b',', 1)[0].strip().decode('utf-8')
+                yield name, start, start + len(line)
+            start = stop + 1
+
+    def _decode(self, data):
+        return self._decode_row(data)[1:]
+
+    @staticmethod
+    def _decode_row(data):
+        row = next(csv.reader([data.decode('utf-8')], skipinitialspace=True))
+        return [field.strip() for field in row]
@@ -0,0 +1,155 @@
+class ConditionNode:
+    """
+    A ConditionNode from a condition expression tree, as found in the
+    parameters of the select and theta join operators.
+
+    Operators are kept as the tokens of the syntax they were parsed with, so
+    the string of a condition tree is the condition expression as written,
+    with tokens separated by single spaces.
+    """
+
+    def __init__(self, operator):
+        """
+        Construct a condition node.
+        :param operator: The operator token of this node, or None.
+        """
+        self.operator = operator
+        self._key = None
+
+    @property
+    def parts(self):
+        """
+        Return the tokens and child nodes of this node, in written order.
+        """
+        raise NotImplementedError
+
+    @property
+    def references(self):
+        """
+        Return a list of the attribute references in the condition, in the
+        order they appear.
+        """
+        return [node.value for node in self._walk()
+                if isinstance(node, IdentityConditionNode) and
+                node.is_reference]
+
+    def _walk(self):
+        """
+        Generate the nodes of the tree in written order.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed([part for part in node.parts
+                                   if isinstance(part, ConditionNode)]))
+
+    @property
+    def key(self):
+        """
+        Return a flat tuple that identifies the structure of the tree: the
+        type and tokens of every node, in written order. Every node type has
+        a fixed number of children, so equal keys mean equal trees. The key
+        is computed once, without recursion.
+        """
+        if self._key is None:
+            key = []
+            for node in self._walk():
+                key.append(type(node).__name__)
+                key.extend(part for part in node.parts
+                           if not isinstance(part, ConditionNode))
+            self._key = tuple(key)
+        return self._key
+
+    def __eq__(self, other):
+        """
+        Return true if other is a condition node of the same type, with
+        the same operator and equal children.
+        :param other: A ConditionNode.
+        :return: True if other is equivalent to this node.
+        """
+        return self is other or (
+            type(self) is type(other) and self.key == other.key)
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self.key)
+
+    def __str__(self):
+        tokens = []
+        stack = [self]
+        while stack:
+            part = stack.pop()
+            if isinstance(part, ConditionNode):
+                stack.extend(reversed(part.parts))
+            else:
+                tokens.append(part)
+        return ' '.join(tokens)
+
+
+class IdentityConditionNode(ConditionNode):
+    """
+    An operand: an attribute reference, a string literal or a number.
+    """
+
+    def __init__(self, value):
+        super().__init__(None)
+        self.value = value
+
+    @property
+    def is_reference(self):
+        # String literals are quoted and numbers start with a digit, sign or
+        # decimal point.
+        return self.value[0].isalpha()
+
+    @property
+    def parts(self):
+        return [self.value]
+
+
+class UnaryConditionNode(ConditionNode):
+    """
+    A condition negated by a logical unary operator.
+    """
+
+    def __init__(self, operator, child):
+        super().__init__(operator)
+        self.child = child
+
+    @property
+    def parts(self):
+        return [self.operator, self.child]
+
+
+class ParenthesizedConditionNode(ConditionNode):
+    """
+    A condition enclosed in parentheses.
+    """
+
+    def __init__(self, child, paren_left='(', paren_right=')'):
+        super().__init__(None)
+        self.child = child
+        self.paren_left = paren_left
+        self.paren_right = paren_right
+
+    @property
+    def parts(self):
+        return [self.paren_left, self.child, self.paren_right]
+
+
+class BinaryConditionNode(ConditionNode):
+    """
+    A comparison of two operands, or two conditions joined by a logical
+    binary operator.
+    """
+
+    def __init__(self, operator, left, right):
+        super().__init__(operator)
+        self.left = left
+        self.right = right
+
+    @property
+    def parts(self):
+        return [self.left, self.operator, self.right]
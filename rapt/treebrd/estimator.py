@@ -0,0 +1,444 @@
+from collections import namedtuple
+
+from .condition_node import BinaryConditionNode, IdentityConditionNode, \
+    ParenthesizedConditionNode, UnaryConditionNode
+from .errors import AttributeReferenceError
+from .grammars.syntax import Syntax
+from .node import RelationNode, SelectNode, ProjectNode, RenameNode, \
+    AssignNode, CrossJoinNode, NaturalJoinNode, ThetaJoinNode, UnionNode, \
+    IntersectNode, DifferenceNode, UnaryNode
+
+# The number of rows assumed for a relation without statistics.
+DEFAULT_ROWS = 1000
+
+# The selectivity of an equality on an attribute with an unknown number of
+# distinct values, and of a comparison that is not an equality.
+EQUALITY_SELECTIVITY = 0.1
+DEFAULT_SELECTIVITY = 1 / 3
+
+# The estimated size of a relation: its number of rows, and a dictionary of
+# its Attributes to their estimated number of distinct values, without the
+# attributes whose number of distinct values is not known.
+Estimate = namedtuple('Estimate', ['rows', 'distinct'])
+
+# A node of a plan: its depth in the tree, the node, its Estimate, the work
+# to produce its rows from the rows of its children, and the cost of its
+# subtree, the sum of the work of its nodes.
+Step = namedtuple('Step', ['depth', 'node', 'estimate', 'work', 'cost'])
+
+
+class Estimator:
+    """
+    Estimates the number of rows in the relations of syntax trees, from the
+    statistics in a catalog, and the cost of computing them.
+
+    The work of a node is the number of rows it reads and writes. Scans,
+    selections, projections, renames and set operations read each row of
+    their inputs once. Natural joins, and theta joins with an equality
+    between their two sides, are costed as hash joins, which read both
+    inputs and write their result. Other joins compare every pair of rows.
+
+    Estimates are remembered by node, so an Estimator should only be used
+    while the trees it was given are unchanged.
+    """
+
+    def __init__(self, catalog=None, syntax=None):
+        """
+        Initializes an Estimator.
+
+        :param catalog: a Catalog with the statistics of the relations, or
+        None to use defaults for every relation.
+        :param syntax: the syntax the conditions of the trees were written
+        in, or None for the default.
+        """
+        self.catalog = catalog
+        self.syntax = syntax or Syntax()
+        self._estimates = {}
+
+    def estimate(self, root):
+        """
+        Return the Estimate of the relation that the tree rooted at root
+        describes.
+
+        :param root: a treebrd node.
+        :return: an Estimate.
+        """
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if id(node) in self._estimates:
+                continue
+            if expanded:
+                children = [self._estimates[id(child)][1]
+                            for child in node.children]
+                # The node is kept so that its id is not reused.
+                self._estimates[id(node)] = (node,
+                                             self._estimate(node, children))
+            else:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node.children)
+        return self._estimates[id(root)][1]
+
+    def work(self, node):
+        """
+        Return the estimated work to produce the rows of a node from the
+        rows of its children.
+
+        :param node: a treebrd node.
+        :return: a number.
+        """
+        rows = self.estimate(node).rows
+        inputs = [self.estimate(child).rows for child in node.children]
+        if isinstance(node, RelationNode):
+            return rows
+        if isinstance(node, UnaryNode):
+            return inputs[0]
+        if isinstance(node, NaturalJoinNode) or \
+                isinstance(node, ThetaJoinNode) and self._is_equi_join(node):
+            return sum(inputs) + rows
+        if isinstance(node, (CrossJoinNode, ThetaJoinNode)):
+            return inputs[0] * inputs[1]
+        return sum(inputs)
+
+    def cost(self, root):
+        """
+        Return the estimated cost of the tree rooted at root, the sum of the
+        work of its nodes.
+
+        :param root: a treebrd node.
+        :return: a number.
+        """
+        return self.plan(root)[0].cost
+
+    def plan(self, root):
+        """
+        Return the plan of the tree rooted at root: a list of Steps for its
+        nodes, in pre-order.
+
+        :param root: a treebrd node.
+        :return: a list of Steps.
+        """
+        costs = {}
+        for node in root.iter_post_order():
+            if id(node) not in costs:
+                costs[id(node)] = self.work(node) + sum(
+                    costs[id(child)] for child in node.children)
+        steps = []
+        stack = [(root, 0)]
+        while stack:
+            node, depth = stack.pop()
+            steps.append(Step(depth, node, self.estimate(node),
+                              self.work(node), costs[id(node)]))
+            stack.extend((child, depth + 1)
+                         for child in reversed(node.children))
+        return steps
+
+    def explain(self, root):
+        """
+        Return the plan of the tree rooted at root as text, with a line for
+        each node, indented under its parent, showing its estimated number
+        of rows, its work and the cost of its subtree.
+
+        :param root: a treebrd node.
+        :return: a string.
+        """
+        lines = []
+        for step in self.plan(root):
+            lines.append('{indent}{label} (rows={rows}, work={work}, '
+                         'cost={cost})'.format(
+                             indent='  ' * step.depth,
+                             label=self._label(step.node),
+                             rows=_format(step.estimate.rows),
+                             work=_format(step.work),
+                             cost=_format(step.cost)))
+        return '\n'.join(lines)
+
+    def selectivity(self, conditions, attributes, distinct):
+        """
+        Return the estimated fraction of rows that satisfy the conditions.
+
+        :param conditions: a ConditionNode.
+        :param attributes: the AttributeList the conditions refer to.
+        :param distinct: a dictionary of Attributes to their estimated
+        number of distinct values.
+        :return: a number between 0 and 1.
+        """
+        and_op, or_op = self.syntax.and_op, self.syntax.or_op
+        results = []
+        stack = [(conditions, False)]
+        while stack:
+            condition, expanded = stack.pop()
+            if isinstance(condition, BinaryConditionNode) and \
+                    condition.operator in (and_op, or_op):
+                if not expanded:
+                    stack.append((condition, True))
+                    stack.append((condition.right, False))
+                    stack.append((condition.left, False))
+                    continue
+                right = results.pop()
+                left = results.pop()
+                if condition.operator == and_op:
+                    results.append(left * right)
+                else:
+                    results.append(left + right - left * right)
+            elif isinstance(condition, (UnaryConditionNode,
+                                        ParenthesizedConditionNode)):
+                if not expanded:
+                    stack.append((condition, True))
+                    stack.append((condition.child, False))
+                    continue
+                if isinstance(condition, UnaryConditionNode):
+                    results.append(1 - results.pop())
+            else:
+                results.append(
+                    self._comparison(condition, attributes, distinct))
+        return min(1.0, max(0.0, results.pop()))
+
+    def _comparison(self, condition, attributes, distinct):
+        """
+        Return the selectivity of a condition without logical operators.
+        """
+        if not isinstance(condition, BinaryConditionNode):
+            return DEFAULT_SELECTIVITY
+        syntax = self.syntax
+        if condition.operator == syntax.equal_op:
+            return self._equality(condition, attributes, distinct)
+        if condition.operator in (syntax.not_equal_op,
+                                  syntax.not_equal_alt_op):
+            return 1 - self._equality(condition, attributes, distinct)
+        return DEFAULT_SELECTIVITY
+
+    def _equality(self, condition, attributes, distinct):
+        """
+        Return the selectivity of an equality: one over the number of
+        distinct values of the attributes it compares.
+        """
+        operands = self._references(condition, attributes)
+        if operands is None:
+            return EQUALITY_SELECTIVITY
+        counts = [distinct.get(attribute) for attribute in operands
+                  if attribute is not None]
+        if not counts or None in counts:
+            return EQUALITY_SELECTIVITY
+        return 1 / max(max(counts), 1)
+
+    def _estimate(self, node, children):
+        """
+        Return the Estimate of a node from the Estimates of its children.
+        """
+        if isinstance(node, RelationNode):
+            return self._relation(node)
+        if isinstance(node, SelectNode):
+            child = children[0]
+            fraction = self.selectivity(node.conditions, node.attributes,
+                                        child.distinct)
+            estimate = self._scaled(child, child.rows * fraction)
+            # An attribute that is equal to a constant has one value left.
+            for conjunct in self._conjuncts(node.conditions):
+                attribute = self._constant_equality(conjunct, node.attributes)
+                if attribute is not None:
+                    estimate.distinct[attribute] = min(1, estimate.rows)
+            return estimate
+        if isinstance(node, ProjectNode):
+            child = children[0]
+            distinct = {attribute: child.distinct[attribute]
+                        for attribute in node.attributes
+                        if attribute in child.distinct}
+            rows = child.rows
+            if len(distinct) == len(node.attributes):
+                combinations = 1
+                for count in distinct.values():
+                    combinations *= count
+                rows = min(rows, combinations)
+            return Estimate(rows, distinct)
+        if isinstance(node, (RenameNode, AssignNode)):
+            return self._renamed(children[0], node.child.attributes,
+                                 node.attributes)
+        if isinstance(node, (CrossJoinNode, ThetaJoinNode, NaturalJoinNode)):
+            return self._join(node, *children)
+        left, right = [
+            self._renamed(estimate, child.attributes, node.attributes)
+            for estimate, child in zip(children, node.children)]
+        if isinstance(node, UnionNode):
+            rows = left.rows + right.rows
+            distinct = {attribute: left.distinct[attribute] +
+                        right.distinct[attribute]
+                        for attribute in left.distinct
+                        if attribute in right.distinct}
+            return self._scaled(Estimate(rows, distinct), rows)
+        if isinstance(node, IntersectNode):
+            return self._scaled(left, min(left.rows, right.rows))
+        if isinstance(node, DifferenceNode):
+            return left
+        raise ValueError('Unknown node {node}.'.format(node=node))
+
+    def _conjuncts(self, conditions):
+        """
+        Return the terms of the outermost chain of logical operators in the
+        conditions if they are all conjunctions, or just the conditions.
+        """
+        logical = (self.syntax.and_op, self.syntax.or_op)
+        terms = []
+        node = conditions
+        while isinstance(node, BinaryConditionNode) and \
+                node.operator in logical:
+            if node.operator != self.syntax.and_op:
+                return [conditions]
+            terms.append(node.right)
+            node = node.left
+        terms.append(node)
+        return terms
+
+    def _references(self, condition, attributes):
+        """
+        Return the Attributes that the operands of a comparison refer to,
+        with None for constants, or None if it is not a comparison.
+        """
+        if not isinstance(condition, BinaryConditionNode):
+            return None
+        result = []
+        for operand in (condition.left, condition.right):
+            if not isinstance(operand, IdentityConditionNode):
+                return None
+            if not operand.is_reference:
+                result.append(None)
+                continue
+            try:
+                result.append(attributes.get_attribute(operand.value))
+            except AttributeReferenceError:
+                return None
+        return result
+
+    def _constant_equality(self, condition, attributes):
+        """
+        Return the Attribute that the condition equates to a constant, or
+        None.
+        """
+        if condition.operator != self.syntax.equal_op:
+            return None
+        operands = self._references(condition, attributes)
+        if operands is None or operands.count(None) != 1:
+            return None
+        return operands[0] or operands[1]
+
+    def _is_equi_join(self, node):
+        """
+        Return True if the conditions of a theta join include an equality
+        between an attribute of each side.
+        """
+        left = set(node.left.attributes)
+        right = set(node.right.attributes)
+        for conjunct in self._conjuncts(node.conditions):
+            if conjunct.operator != self.syntax.equal_op:
+                continue
+            operands = self._references(conjunct, node.attributes)
+            if operands is None or None in operands:
+                continue
+            first, second = operands
+            if first in left and second in right or \
+                    first in right and second in left:
+                return True
+        return False
+
+    @staticmethod
+    def _label(node):
+        """
+        Return a description of a node for a plan.
+        """
+        label = node.operator.name.replace('_', ' ')
+        if isinstance(node, RelationNode):
+            return '{label} {name}'.format(label=label, name=node.name)
+        if isinstance(node, (SelectNode, ThetaJoinNode)):
+            return '{label} {conditions}'.format(label=label,
+                                                 conditions=node.conditions)
+        if isinstance(node, ProjectNode):
+            return '{label} {attributes}'.format(
+                label=label, attributes=', '.join(node.attributes.to_list()))
+        if isinstance(node, (RenameNode, AssignNode)):
+            return '{label} {name}({attributes})'.format(
+                label=label, name=node.name,
+                attributes=', '.join(node.attributes.names))
+        return label
+
+    def _relation(self, node):
+        statistics = None
+        if self.catalog is not None:
+            statistics = self.catalog.statistics(node.name)
+        if statistics is None or statistics.rows is None:
+            rows = DEFAULT_ROWS
+        else:
+            rows = statistics.rows
+        distinct = {}
+        if statistics is not None:
+            for attribute in node.attributes:
+                count = statistics.distinct_count(attribute.name)
+                if count is not None:
+                    distinct[attribute] = count
+        return self._scaled(Estimate(rows, distinct), rows)
+
+    def _join(self, node, left, right):
+        rows = left.rows * right.rows
+        distinct = dict(left.distinct)
+        distinct.update(right.distinct)
+        if isinstance(node, ThetaJoinNode):
+            rows *= self.selectivity(node.conditions, node.attributes,
+                                     distinct)
+        elif isinstance(node, NaturalJoinNode):
+            # Attributes are paired by name, as the join pairs them. A name
+            # that is not unique on both sides has no single pair to count
+            # the distinct values of.
+            right_attributes = {}
+            for attribute in node.right.attributes:
+                right_attributes.setdefault(attribute.name, []).append(
+                    attribute)
+            left_names = node.left.attributes.names
+            for attribute in node.left.attributes:
+                others = right_attributes.get(attribute.name)
+                if not others:
+                    continue
+                counts = [None]
+                if len(others) == 1 and \
+                        left_names.count(attribute.name) == 1:
+                    counts = [left.distinct.get(attribute),
+                              right.distinct.get(others[0])]
+                if None in counts:
+                    rows *= EQUALITY_SELECTIVITY
+                else:
+                    rows /= max(max(counts), 1)
+                    distinct[attribute] = min(counts)
+            kept = set(node.attributes)
+            distinct = {attribute: count
+                        for attribute, count in distinct.items()
+                        if attribute in kept}
+        return self._scaled(Estimate(rows, distinct), rows)
+
+    @staticmethod
+    def _renamed(estimate, old, new):
+        """
+        Return the estimate with the distinct counts of the old Attributes
+        moved to the new Attributes in the same positions.
+        """
+        distinct = {attribute: estimate.distinct[previous]
+                    for previous, attribute in zip(old, new)
+                    if previous in estimate.distinct}
+        return Estimate(estimate.rows, distinct)
+
+    @staticmethod
+    def _scaled(estimate, rows):
+        """
+        Return the estimate with the number of rows, and no more distinct
+        values of any attribute than rows.
+        """
+        distinct = {attribute: min(count, rows)
+                    for attribute, count in estimate.distinct.items()}
+        return Estimate(rows, distinct)
+
+
+def _format(number):
+    """
+    Return a number for a plan, rounded to a whole number unless it is
+    less than one.
+    """
+    if number < 1:
+        return '{:.2g}'.format(number)
+    return '{:,.0f}'.format(number)
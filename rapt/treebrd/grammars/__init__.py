@@ -1,7 +1,12 @@
 from .core_grammar import CoreGrammar
 from .extended_grammar import ExtendedGrammar
+from .precedence_parser import PrecedenceParser
 
 GRAMMARS = {
     'Core Grammar': CoreGrammar,
     'Extended Grammar': ExtendedGrammar
-}
\ No newline at end of file
+}
+
+PARSERS = {
+    'Precedence Parser': PrecedenceParser
+}
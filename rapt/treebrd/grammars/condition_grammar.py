@@ -1,21 +1,37 @@
 from pyparsing import oneOf, CaselessKeyword, operatorPrecedence, opAssoc
 
+from ..condition_node import (IdentityConditionNode, UnaryConditionNode,
+                              ParenthesizedConditionNode,
+                              BinaryConditionNode)
+from .packrat import DEFAULT_CACHE_SIZE
 from .proto_grammar import ProtoGrammar
 from .syntax import Syntax
 
 
-def get_attribute_references(instring):
+def get_attribute_references(instring, syntax=None):
     """
     Return a list of attribute references in the condition expression.
 
     attribute_reference ::= relation_name "." attribute_name | attribute_name
 
     :param instring: a condition expression.
+    :param syntax: the syntax of the expression, or None for the default.
     :return: a list of attribute references.
     """
-    parsed = ConditionGrammar().conditions.parseString(instring)
-    result = parsed if isinstance(parsed[0], str) else parsed[0]
-    return result.attribute_reference.asList() if result.attribute_reference else []
+    return get_condition_tree(instring, syntax).references
+
+
+def get_condition_tree(instring, syntax=None):
+    """
+    Return a condition tree for the condition expression.
+
+    :param instring: a condition expression.
+    :param syntax: the syntax of the expression, or None for the default.
+    :return: a ConditionNode.
+    """
+    grammar = ConditionGrammar(syntax)
+    parsed = grammar.parse_rule('conditions', instring)
+    return grammar.condition_tree(parsed.asList())
 
 
 class ConditionGrammar(ProtoGrammar):
@@ -23,14 +39,116 @@ class ConditionGrammar(ProtoGrammar):
     A grammar for condition expressions.
     """
 
-    def __init__(self, syntax=None):
+    def __init__(self, syntax=None, packrat_cache_size=DEFAULT_CACHE_SIZE):
         """
         Initializes a ConditionGrammar. Uses the default syntax if none
         is provided.
 
         :param syntax: a syntax for this grammar.
+        :param packrat_cache_size: the number of parse results to memoize
+        during a parse, None for no limit, or 0 to turn memoization off.
         """
         self.syntax = syntax or Syntax()
+        self.packrat_cache_size = packrat_cache_size
+
+    def references(self, tokens):
+        """
+        Return a list of attribute references in parsed condition tokens,
+        without parsing the condition again.
+
+        :param tokens: a nested list of tokens produced by conditions.
+        :return: a list of attribute references.
+        """
+        return self.condition_tree(tokens).references
+
+    def condition_tree(self, tokens):
+        """
+        Return a condition tree for parsed condition tokens, without parsing
+        the condition again.
+
+        The tokens are read in one pass with explicit stacks, so deeply
+        nested conditions do not exhaust the recursion limit.
+
+        :param tokens: a nested list of tokens produced by conditions.
+        :return: a ConditionNode.
+        """
+        tokens = _flatten(tokens)
+        logical = {self.syntax.and_op, self.syntax.or_op}
+        operands = []
+        # Pending operators: (UNARY, token), (PAREN, token), (GROUP, None)
+        # for a nested list of tokens, and (BINARY, token).
+        operators = []
+        position = 0
+        while True:
+            # Read prefix operators and a comparison.
+            if position >= len(tokens):
+                raise ValueError('Expected a condition.')
+            token = tokens[position]
+            follows = tokens[position + 1] \
+                if position + 1 < len(tokens) else None
+            if token is _GROUP_START:
+                operators.append((_GROUP, None))
+                position += 1
+                continue
+            # An operand may share the name of a logical unary operator; it
+            # is only an operator when no comparison follows.
+            if token == self.syntax.not_op and \
+                    not self._is_comparator(follows):
+                operators.append((_UNARY, token))
+                position += 1
+                continue
+            if token == self.syntax.paren_left:
+                operators.append((_PAREN, token))
+                position += 1
+                continue
+            left, operator, right = tokens[position:position + 3]
+            if _GROUP_START in (left, operator, right) or \
+                    _GROUP_END in (left, operator, right):
+                raise ValueError('Unexpected condition token.')
+            operands.append(BinaryConditionNode(
+                operator, IdentityConditionNode(left),
+                IdentityConditionNode(right)))
+            position += 3
+
+            # Complete the terms that end here, and read a logical operator.
+            while True:
+                # Logical binary operators share a precedence and group to
+                # the left, and bind less tightly than unary operators.
+                while operators and operators[-1][0] in {_UNARY, _BINARY}:
+                    kind, operator = operators.pop()
+                    if kind == _UNARY:
+                        operands.append(
+                            UnaryConditionNode(operator, operands.pop()))
+                    else:
+                        right = operands.pop()
+                        operands.append(BinaryConditionNode(
+                            operator, operands.pop(), right))
+                token = tokens[position] if position < len(tokens) else None
+                if token is _GROUP_END and operators and \
+                        operators[-1][0] == _GROUP:
+                    operators.pop()
+                elif token == self.syntax.paren_right and operators and \
+                        operators[-1][0] == _PAREN:
+                    operands.append(ParenthesizedConditionNode(
+                        operands.pop(), operators.pop()[1], token))
+                else:
+                    break
+                position += 1
+
+            if token in logical:
+                operators.append((_BINARY, token))
+                position += 1
+                continue
+            if token is not None or operators:
+                raise ValueError('Unexpected condition token.')
+            return operands.pop()
+
+    def _is_comparator(self, token):
+        return isinstance(token, str) and token in {
+            self.syntax.equal_op, self.syntax.not_equal_op,
+            self.syntax.not_equal_alt_op, self.syntax.less_than_op,
+            self.syntax.less_than_equal_op, self.syntax.greater_than_op,
+            self.syntax.greater_than_equal_op}
 
     @property
     def comparator_op(self):
@@ -84,4 +202,30 @@ class ConditionGrammar(ProtoGrammar):
             opList=[(self.not_op, 1, opAssoc.RIGHT),
                     (self.logical_binary_op, 2, opAssoc.LEFT)],
             lpar=self.syntax.paren_left,
-            rpar=self.syntax.paren_right)
\ No newline at end of file
+            rpar=self.syntax.paren_right)
+
+
+_UNARY, _BINARY, _PAREN, _GROUP = range(4)
+_GROUP_START = object()
+_GROUP_END = object()
+
+
+def _flatten(tokens):
+    """
+    Return the nested lists of tokens as one list, with each nested list
+    between _GROUP_START and _GROUP_END.
+    """
+    flat = []
+    stack = [iter(tokens)]
+    while stack:
+        token = next(stack[-1], _GROUP_END)
+        if token is _GROUP_END:
+            stack.pop()
+            if stack:
+                flat.append(_GROUP_END)
+        elif isinstance(token, list):
+            flat.append(_GROUP_START)
+            stack.append(iter(token))
+        else:
+            flat.append(token)
+    return flat
@@ -12,7 +12,7 @@ class CoreGrammar(ConditionGrammar):
     """
 
     def parse(self, instring):
-        return self.statements.parseString(instring, parseAll=True)
+        return self.parse_rule('statements', instring, parse_all=True)
 
     @property
     def attribute_list(self):
@@ -172,6 +172,14 @@ class CoreGrammar(ConditionGrammar):
         return (CaselessKeyword(operator, identChars=alphanums) +
                 self.parameter(params))
 
+    @property
+    def binary_precedence(self):
+        """
+        The binary operators, grouped by precedence from highest to lowest.
+        """
+        return [[self.syntax.join_op],
+                [self.syntax.union_op, self.syntax.difference_op]]
+
     def is_unary(self, operator):
         return operator in {self.syntax.select_op,
                             self.syntax.project_op,
@@ -51,6 +51,14 @@ class ExtendedGrammar(CoreGrammar):
             (self.intersect, 2, opAssoc.LEFT),
             (self.binary_op_p2, 2, opAssoc.LEFT)])
 
+    @property
+    def binary_precedence(self):
+        return [[self.syntax.join_op,
+                 self.syntax.natural_join_op,
+                 self.syntax.theta_join_op],
+                [self.syntax.intersect_op],
+                [self.syntax.union_op, self.syntax.difference_op]]
+
     def is_unary(self, operator):
         return operator in {self.syntax.select_op,
                             self.syntax.project_op,
@@ -0,0 +1,161 @@
+import re
+from collections import namedtuple
+
+from pyparsing import ParseException
+
+Token = namedtuple('Token', ['kind', 'value', 'text', 'position'])
+
+# Token kinds.
+SYMBOL = 'symbol'
+NAME = 'name'
+NUMBER = 'number'
+STRING = 'string'
+END = 'end'
+
+NAME_PATTERN = r'[A-Za-z][A-Za-z0-9_]*(?:\.[A-Za-z][A-Za-z0-9_]*)?'
+NUMBER_PATTERN = r'[-+]?[0-9]*\.?[0-9]+'
+WHITESPACE_PATTERN = re.compile(r'\s*')
+STRING_PATTERN = (r'"(?:[^"\n\r\\]|""|\\(?:[^x]|x[0-9a-fA-F]+))*"|'
+                  r"'(?:[^'\n\r\\]|''|\\(?:[^x]|x[0-9a-fA-F]+))*'")
+
+
+class Lexer:
+    """
+    A Lexer splits a relational algebra string into a flat stream of tokens.
+
+    The tokens of a syntax are compiled into a single regular expression,
+    built once per syntax, so the input is read in one pass.
+    """
+
+    # Compiled patterns and symbol tables, shared by lexers of equal syntax.
+    _compiled = {}
+
+    def __init__(self, syntax):
+        """
+        Initializes a Lexer for a syntax.
+
+        :param syntax: the syntax to recognize.
+        """
+        self.syntax = syntax
+        compiled = Lexer._compiled.get(syntax)
+        if compiled is None:
+            compiled = self._compile(syntax)
+            Lexer._compiled[syntax] = compiled
+        self.pattern, self.literals, self.keywords, self.terminators = \
+            compiled
+
+    @staticmethod
+    def _compile(syntax):
+        """
+        Return the master pattern for a syntax, and the tables that map
+        matched text to symbols.
+        """
+        # Operators and logical tokens are keywords: they are matched without
+        # regard to case and may not touch an identifier. The assignment
+        # operator may not touch an identifier either, but is case sensitive.
+        keywords = {op.lower(): op for op in [
+            syntax.select_op, syntax.project_op, syntax.rename_op,
+            syntax.join_op, syntax.theta_join_op, syntax.natural_join_op,
+            syntax.union_op, syntax.difference_op, syntax.intersect_op,
+            syntax.not_op, syntax.and_op, syntax.or_op]}
+        literals = {op: op for op in [
+            syntax.terminator, syntax.delim, syntax.params_start,
+            syntax.params_stop, syntax.paren_left, syntax.paren_right,
+            syntax.equal_op, syntax.not_equal_op, syntax.not_equal_alt_op,
+            syntax.less_than_op, syntax.less_than_equal_op,
+            syntax.greater_than_op, syntax.greater_than_equal_op,
+            syntax.assign_op, '(', ')']}
+
+        symbols = [(op, True) for op in keywords]
+        symbols += [(op, op == syntax.assign_op) for op in literals
+                    if op.lower() not in keywords]
+
+        # Longer symbols are tried first.
+        alternatives = []
+        for op, keyword in sorted(symbols, key=lambda s: -len(s[0])):
+            alternative = re.escape(op)
+            if op in keywords:
+                alternative = '(?i:{})'.format(alternative)
+            if keyword:
+                alternative = r'(?<![A-Za-z0-9_$]){}(?![A-Za-z0-9])'.format(
+                    alternative)
+            if re.fullmatch(r'[A-Za-z][A-Za-z0-9_]*', op):
+                # A symbol that looks like an identifier only wins when the
+                # identifier would be no longer, or when it starts a list of
+                # parameters.
+                alternative += r'(?:(?={})|(?![A-Za-z0-9_]|\.[A-Za-z]))'\
+                    .format(re.escape(syntax.params_start))
+            alternatives.append(alternative)
+
+        pattern = re.compile(
+            r'\s*(?:(?P<{symbol}>{symbols})|(?P<{string}>{string_pattern})|'
+            r'(?P<{number}>{number_pattern})|(?P<{name}>{name_pattern})|\Z)'
+            .format(symbol=SYMBOL, symbols='|'.join(alternatives),
+                    string=STRING, string_pattern=STRING_PATTERN,
+                    number=NUMBER, number_pattern=NUMBER_PATTERN,
+                    name=NAME, name_pattern=NAME_PATTERN))
+
+        # Terminators, skipping over string literals.
+        terminators = re.compile('(?:{string_pattern})|(?P<{terminator}>{0})'
+                                 .format(re.escape(syntax.terminator),
+                                         string_pattern=STRING_PATTERN,
+                                         terminator=END))
+        return pattern, literals, keywords, terminators
+
+    def tokenize(self, instring):
+        """
+        Generate the tokens in the instring, followed by an END token.
+
+        :param instring: a relational algebra string.
+        :return: an iterator over Tokens.
+        :raise ParseException: Raised if the instring has an unknown token.
+        """
+        match = self.pattern.match
+        position = 0
+        while True:
+            found = match(instring, position)
+            if found is None:
+                start = WHITESPACE_PATTERN.match(instring, position).end()
+                raise ParseException(instring, start, 'Unknown token')
+
+            kind = found.lastgroup
+            if kind is None:
+                yield Token(END, None, '', found.end())
+                return
+
+            text = found.group(kind)
+            if kind == SYMBOL:
+                value = self.literals.get(text) or \
+                    self.keywords[text.lower()]
+            elif kind == NAME:
+                value = text.lower()
+            elif kind == STRING:
+                value = "'{}'".format(text[1:-1])
+            else:
+                value = text
+            yield Token(kind, value, text, found.start(kind))
+            position = found.end()
+
+    def statements(self, lines):
+        """
+        Generate the statements in an iterable of strings, such as the lines
+        of a file, one statement at a time. Each statement but the last ends
+        with a terminator; the last holds any text after the final one.
+
+        :param lines: an iterable of relational algebra strings.
+        :return: an iterator over statement strings.
+        """
+        pending = []
+        for line in lines:
+            start = 0
+            for found in self.terminators.finditer(line):
+                if found.lastgroup == END:
+                    pending.append(line[start:found.end()])
+                    yield ''.join(pending)
+                    pending = []
+                    start = found.end()
+            pending.append(line[start:])
+
+        rest = ''.join(pending)
+        if rest.strip():
+            yield rest
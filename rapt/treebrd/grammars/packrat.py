@@ -0,0 +1,86 @@
+import functools
+from collections import OrderedDict
+
+from pyparsing import ParseBaseException
+
+DEFAULT_CACHE_SIZE = 4096
+
+
+class PackratCache:
+    """
+    A bounded memo of parse results for the elements of one parser.
+
+    Unlike pyparsing's packrat mode, which is switched on for every parser
+    in the process, a PackratCache only memoizes the elements it is
+    installed on. When it is full, the oldest results are evicted.
+    """
+
+    def __init__(self, size=DEFAULT_CACHE_SIZE):
+        """
+        Initializes a PackratCache.
+
+        :param size: the maximum number of results to keep, or None for no
+        limit.
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._results = OrderedDict()
+
+    @property
+    def stats(self):
+        """
+        Return a dictionary with the hits, misses and current size of the
+        cache.
+        """
+        return {'hits': self.hits, 'misses': self.misses,
+                'size': len(self._results)}
+
+    def clear(self):
+        """
+        Remove every result from the cache. Hit and miss counts are kept.
+        """
+        self._results.clear()
+
+    def install(self, parser):
+        """
+        Memoize the parser and every element reachable from it.
+
+        :param parser: a pyparsing element.
+        """
+        stack = [parser]
+        seen = set()
+        while stack:
+            element = stack.pop()
+            if id(element) in seen:
+                continue
+            seen.add(id(element))
+            element._parse = functools.partial(self._parse, element)
+            stack.extend(getattr(element, 'exprs', []))
+            if getattr(element, 'expr', None) is not None:
+                stack.append(element.expr)
+
+    def _parse(self, element, instring, loc, doActions=True,
+               callPreParse=True):
+        key = (element, instring, loc, doActions, callPreParse)
+        result = self._results.get(key)
+        if result is not None:
+            self.hits += 1
+            if isinstance(result, ParseBaseException):
+                raise result
+            return result[0], result[1].copy()
+
+        self.misses += 1
+        try:
+            loc, tokens = element._parseNoCache(instring, loc, doActions,
+                                                callPreParse)
+        except ParseBaseException as exception:
+            self._store(key, exception.__class__(*exception.args))
+            raise
+        self._store(key, (loc, tokens.copy()))
+        return loc, tokens
+
+    def _store(self, key, result):
+        self._results[key] = result
+        if self.size is not None and len(self._results) > self.size:
+            self._results.popitem(last=False)
@@ -0,0 +1,330 @@
+import re
+from collections import deque
+
+from pyparsing import ParseException
+
+from .lexer import Lexer, SYMBOL, NAME, NUMBER, STRING, END
+
+IDENTIFIER_PATTERN = re.compile(r'[A-Za-z][A-Za-z0-9_]*')
+
+# Marks an open parenthesis on the operator stack.
+PAREN = None
+
+# The precedence level of unary operators, which bind tightest.
+UNARY = 0
+
+
+class TokenStream:
+    """
+    A TokenStream is a cursor over an iterator of tokens, with lookahead.
+    """
+
+    def __init__(self, instring, tokens):
+        self.instring = instring
+        self.tokens = tokens
+        self.lookahead = deque()
+        self.previous = None
+
+    def peek(self, offset=0):
+        while len(self.lookahead) <= offset:
+            if self.lookahead and self.lookahead[-1].kind == END:
+                return self.lookahead[-1]
+            self.lookahead.append(next(self.tokens))
+        return self.lookahead[offset]
+
+    def next(self):
+        token = self.peek()
+        if token.kind != END:
+            self.previous = self.lookahead.popleft()
+        return token
+
+    def accepts(self, value):
+        token = self.peek()
+        return token.kind == SYMBOL and token.value == value
+
+    def expect(self, value):
+        if not self.accepts(value):
+            self.error('Expected "{}"'.format(value))
+        return self.next()
+
+    def adjacent(self):
+        """
+        Return True if the next token directly follows the previous one.
+        """
+        previous = self.previous
+        return self.peek().position == previous.position + len(previous.text)
+
+    def error(self, message):
+        raise ParseException(self.instring, self.peek().position, message)
+
+
+class PrecedenceParser:
+    """
+    A hand-written parser for relational algebra, and an alternative to the
+    pyparsing grammars.
+
+    Expressions are read with operator precedence parsing over explicit
+    stacks, so parse time is linear in the length of the input and nesting
+    depth is not limited by recursion. The statements are returned as the
+    same nested lists that the grammar produces.
+    """
+
+    def __init__(self, grammar):
+        """
+        Initializes a PrecedenceParser for the operators and syntax of a
+        grammar.
+
+        :param grammar: a CoreGrammar or one of its descendants.
+        """
+        self.grammar = grammar
+        self.syntax = grammar.syntax
+        self.lexer = Lexer(grammar.syntax)
+
+        self.levels = {}
+        for level, operators in enumerate(grammar.binary_precedence, 1):
+            for operator in operators:
+                self.levels[operator] = level
+
+        self.comparators = {self.syntax.equal_op, self.syntax.not_equal_op,
+                            self.syntax.not_equal_alt_op,
+                            self.syntax.less_than_op,
+                            self.syntax.less_than_equal_op,
+                            self.syntax.greater_than_op,
+                            self.syntax.greater_than_equal_op}
+
+    def parse(self, instring):
+        """
+        Return a list of the statements in the instring.
+
+        :param instring: a relational algebra string.
+        :return: a list of statements, each a nested list of tokens.
+        :raise ParseException: Raised if the instring is not valid.
+        """
+        stream = TokenStream(instring, self.lexer.tokenize(instring))
+        statements = [self._statement(stream)]
+        while stream.peek().kind != END:
+            statements.append(self._statement(stream))
+        return statements
+
+    def _statement(self, stream):
+        """
+        statement ::= (assignment | expression) terminator
+        """
+        second = stream.peek(1)
+        if (self._is_name(stream.peek()) and second.kind == SYMBOL and
+                second.value in {self.syntax.assign_op,
+                                 self.syntax.paren_left}):
+            statement = self._assignment(stream)
+        else:
+            statement = self._expression(stream)[0]
+        stream.expect(self.syntax.terminator)
+        return statement
+
+    def _assignment(self, stream):
+        """
+        assignment ::= relation_name assign expression |
+            relation_name paren_left attribute_list paren_right
+            assign expression
+        """
+        lhs = [self._name(stream)]
+        if stream.accepts(self.syntax.paren_left):
+            lhs.append(self._attribute_list(stream))
+        operator = stream.expect(self.syntax.assign_op)
+        return [lhs, operator.value] + self._expression(stream)
+
+    def _expression(self, stream):
+        """
+        Return an expression as a list with a single, nested list.
+        """
+        operands = []
+        operators = []
+        while True:
+            # Read prefix operators and an operand.
+            token = stream.peek()
+            if token.kind == SYMBOL and self.grammar.is_unary(token.value):
+                stream.next()
+                operators.append((UNARY, [token.value,
+                                          self._parameters(token, stream)]))
+                continue
+            if token.kind == SYMBOL and token.value == '(':
+                stream.next()
+                operators.append(PAREN)
+                continue
+            operands.append(([[self._name(stream)]], None))
+
+            # Read closing parentheses and a binary operator.
+            while stream.accepts(')') and PAREN in operators:
+                stream.next()
+                self._reduce(operands, operators)
+                operators.pop()
+                operands.append((operands.pop()[0], None))
+
+            token = stream.peek()
+            level = self.levels.get(token.value)
+            if token.kind != SYMBOL or level is None:
+                break
+            stream.next()
+            operator = [token.value]
+            if stream.accepts(self.syntax.params_start) and stream.adjacent():
+                if self.syntax.theta_join_op not in self.levels or \
+                        token.value not in {self.syntax.join_op,
+                                            self.syntax.theta_join_op}:
+                    stream.error('Unexpected parameters')
+                operator = [self.syntax.theta_join_op,
+                            self._parameters(token, stream)]
+                level = self.levels[self.syntax.theta_join_op]
+            elif token.value == self.syntax.theta_join_op:
+                stream.error('Expected "{}"'.format(self.syntax.params_start))
+            self._reduce(operands, operators, level)
+            operators.append((level, operator))
+
+        self._reduce(operands, operators)
+        if operators:
+            stream.error('Expected ")"')
+        return operands.pop()[0]
+
+    def _conditions(self, stream):
+        """
+        conditions ::= condition | not_op conditions |
+            paren_left conditions paren_right |
+            conditions logical_binary_op conditions
+        """
+        logical = {self.syntax.and_op, self.syntax.or_op}
+        operands = []
+        operators = []
+        while True:
+            # Read prefix operators and a condition.
+            token = stream.peek()
+            if token.kind == SYMBOL and token.value == self.syntax.not_op \
+                    and not self._is_comparator(stream.peek(1)):
+                stream.next()
+                operators.append((UNARY, [token.value]))
+                continue
+            if stream.accepts(self.syntax.paren_left):
+                stream.next()
+                operators.append(PAREN)
+                continue
+            operands.append((self._condition(stream), None))
+
+            # Read closing parentheses and a logical operator.
+            while stream.accepts(self.syntax.paren_right) and \
+                    PAREN in operators:
+                stream.next()
+                self._reduce(operands, operators)
+                operators.pop()
+                inner = operands.pop()[0]
+                operands.append(([self.syntax.paren_left] + inner +
+                                 [self.syntax.paren_right], None))
+
+            token = stream.peek()
+            if token.kind != SYMBOL or token.value not in logical:
+                break
+            stream.next()
+            self._reduce(operands, operators, 1)
+            operators.append((1, [token.value]))
+
+        self._reduce(operands, operators)
+        if operators:
+            stream.error('Expected "{}"'.format(self.syntax.paren_right))
+        return operands.pop()[0]
+
+    def _condition(self, stream):
+        """
+        condition ::= operand comparator_op operand
+        """
+        left = self._operand(stream)
+        if not self._is_comparator(stream.peek()):
+            stream.error('Expected comparison operator')
+        return [left, stream.next().value, self._operand(stream)]
+
+    def _operand(self, stream):
+        """
+        operand ::= attribute_reference | string_literal | number
+        """
+        token = stream.peek()
+        if token.kind in {STRING, NUMBER}:
+            return stream.next().value
+        return self._name(stream, references=True)
+
+    def _parameters(self, operator, stream):
+        """
+        Return the parameters of an operator as a list.
+        """
+        if not (stream.accepts(self.syntax.params_start) and
+                stream.adjacent()):
+            stream.error('Expected "{}"'.format(self.syntax.params_start))
+        stream.next()
+
+        if operator.value == self.syntax.project_op:
+            params = self._name_list(stream, references=True)
+        elif operator.value == self.syntax.rename_op:
+            params = []
+            if not stream.accepts(self.syntax.paren_left):
+                params.append(self._name(stream))
+            if stream.accepts(self.syntax.paren_left) or not params:
+                params.append(self._attribute_list(stream))
+        else:
+            params = self._conditions(stream)
+
+        stream.expect(self.syntax.params_stop)
+        return params
+
+    def _attribute_list(self, stream):
+        """
+        Return a parenthesized attribute_list as a list.
+        """
+        stream.expect(self.syntax.paren_left)
+        names = self._name_list(stream)
+        stream.expect(self.syntax.paren_right)
+        return names
+
+    def _name_list(self, stream, references=False):
+        names = [self._name(stream, references)]
+        while stream.accepts(self.syntax.delim):
+            stream.next()
+            names.append(self._name(stream, references))
+        return names
+
+    def _name(self, stream, references=False):
+        """
+        Return a relation or attribute name, or an attribute reference.
+        """
+        token = stream.peek()
+        if not self._is_name(token) or \
+                (not references and '.' in token.value):
+            stream.error('Expected name')
+        stream.next()
+        return token.text.lower()
+
+    def _is_name(self, token):
+        # Keywords that look like identifiers are names where an operator
+        # cannot appear.
+        return token.kind == NAME or (token.kind == SYMBOL and
+                                      IDENTIFIER_PATTERN.fullmatch(token.text))
+
+    def _is_comparator(self, token):
+        return token.kind == SYMBOL and token.value in self.comparators
+
+    @staticmethod
+    def _reduce(operands, operators, level=float('inf')):
+        """
+        Apply the operators on the stack that bind at least as tightly as
+        level, stopping at an open parenthesis.
+
+        Operands are pairs of a token list and the precedence level of the
+        chain of operators it holds, if it can still be extended.
+        """
+        while operators and operators[-1] is not PAREN and \
+                operators[-1][0] <= level:
+            operator_level, operator = operators.pop()
+            right = operands.pop()[0]
+            if operator_level == UNARY:
+                operands.append(([operator + right], None))
+                continue
+            left, left_level = operands.pop()
+            if left_level == operator_level:
+                # Operators of the same precedence share a single list.
+                left[0].extend(operator + right)
+                operands.append((left, operator_level))
+            else:
+                operands.append(([left + operator + right], operator_level))
@@ -1,7 +1,7 @@
 from pyparsing import (alphanums, Regex, Word, alphas, quotedString,
-                       removeQuotes, Combine, Optional, downcaseTokens, ParserElement)
+                       removeQuotes, Combine, Optional, downcaseTokens)
 
-ParserElement.enablePackrat()
+from .packrat import PackratCache, DEFAULT_CACHE_SIZE
 
 
 class ProtoGrammar:
@@ -13,6 +13,64 @@ class ProtoGrammar:
     specification refer to the associated grammar file.
     """
 
+    # Compiled rules and their packrat caches, shared by every grammar of the
+    # same class, syntax and cache size.
+    _compiled = {}
+
+    syntax = None
+
+    packrat_cache_size = DEFAULT_CACHE_SIZE
+
+    def compiled(self, rule):
+        """
+        Return the parser for a rule. The parser is built once per grammar
+        class, syntax and cache size, and reused by every later call.
+
+        :param rule: the name of a rule, e.g. 'statements'.
+        :return: a pyparsing element.
+        """
+        return self._compile(rule)[0]
+
+    def packrat(self, rule):
+        """
+        Return the packrat cache of the parser for a rule, or None if the
+        parser is not memoized.
+
+        :param rule: the name of a rule, e.g. 'statements'.
+        :return: a PackratCache or None.
+        """
+        return self._compile(rule)[1]
+
+    def parse_rule(self, rule, instring, parse_all=False):
+        """
+        Parse the instring with the parser for a rule. The packrat cache of
+        the parser is cleared once the parse is done.
+
+        :param rule: the name of a rule, e.g. 'statements'.
+        :param instring: a string to parse.
+        :param parse_all: flag for requiring the entire instring to match.
+        :return: the parse results.
+        """
+        parser, cache = self._compile(rule)
+        try:
+            return parser.parseString(instring, parseAll=parse_all)
+        finally:
+            if cache is not None:
+                cache.clear()
+
+    def _compile(self, rule):
+        key = (type(self), self.syntax, self.packrat_cache_size, rule)
+        compiled = ProtoGrammar._compiled.get(key)
+        if compiled is None:
+            parser = getattr(self, rule).streamline()
+            cache = None
+            if self.packrat_cache_size != 0:
+                cache = PackratCache(self.packrat_cache_size)
+                cache.install(parser)
+            compiled = (parser, cache)
+            ProtoGrammar._compiled[key] = compiled
+        return compiled
+
     def parse(self, instring):
         """
         Defined by descendants.
@@ -42,7 +100,7 @@ class ProtoGrammar:
         Any successful match is converted to a single quoted string to simplify
         post-parsed operations.
         """
-        return quotedString.setParseAction(
+        return quotedString.copy().setParseAction(
             lambda s, l, t: "'{string}'".format(string=removeQuotes(s, l, t)))
 
     @property
@@ -1,44 +1,71 @@
 class Syntax:
+    """
+    The tokens of a relational algebra syntax.
+
+    A Syntax is immutable and hashable, so equal syntaxes can share compiled
+    grammars.
+    """
 
     def __init__(self, **kwargs):
 
         # First initialize a default syntax.
+        tokens = dict(
+            # General tokens.
+            terminator=';',
+            delim=',',
+            params_start='_{',
+            params_stop='}',
+            paren_left='(',
+            paren_right=')',
+
+            # Logical tokens.
+            not_op='not',
+            and_op='and',
+            or_op='or',
+
+            # Comparison operators.
+            equal_op='=',
+            not_equal_op='!=',
+            not_equal_alt_op='<>',
+            less_than_op='<',
+            less_than_equal_op='<=',
+            greater_than_op='>',
+            greater_than_equal_op='>=',
 
-        # General tokens.
-        self.terminator = ';'
-        self.delim = ','
-        self.params_start = '_{'
-        self.params_stop = '}'
-        self.paren_left = '('
-        self.paren_right = ')'
-
-        # Logical tokens.
-        self.not_op = 'not'
-        self.and_op = 'and'
-        self.or_op = 'or'
-
-        # Comparison operators.
-        self.equal_op = '='
-        self.not_equal_op = '!='
-        self.not_equal_alt_op = '<>'
-        self.less_than_op = '<'
-        self.less_than_equal_op = '<='
-        self.greater_than_op = '>'
-        self.greater_than_equal_op = '>='
-
-        # Relational algebra operators.
-        self.project_op = '\\project'
-        self.rename_op = '\\rename'
-        self.select_op = '\\select'
-        self.assign_op = ':='
-        self.join_op = '\\join'
-        self.theta_join_op = '\\theta_join'
-        self.natural_join_op = '\\natural_join'
-        self.difference_op = '\\difference'
-        self.union_op = '\\union'
-        self.intersect_op = '\\intersect'
+            # Relational algebra operators.
+            project_op='\\project',
+            rename_op='\\rename',
+            select_op='\\select',
+            assign_op=':=',
+            join_op='\\join',
+            theta_join_op='\\theta_join',
+            natural_join_op='\\natural_join',
+            difference_op='\\difference',
+            union_op='\\union',
+            intersect_op='\\intersect',
+        )
 
         # Now set any user defined syntax.
         for key in kwargs:
-            if hasattr(self, key):
-                setattr(self, key, kwargs[key])
\ No newline at end of file
+            if key in tokens:
+                tokens[key] = kwargs[key]
+
+        self.__dict__.update(tokens)
+        self.__dict__['_key'] = tuple(sorted(tokens.items()))
+
+    def __setattr__(self, key, value):
+        raise AttributeError('Syntax is immutable.')
+
+    def __delattr__(self, key):
+        raise AttributeError('Syntax is immutable.')
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return False
+        return self._key == other._key
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    def __hash__(self):
+        return hash(self._key)
@@ -1,8 +1,9 @@
 import copy
+import sys
 from enum import Enum
 
 from .errors import InputError, RelationReferenceError
-from .grammars.condition_grammar import get_attribute_references
+from .grammars.condition_grammar import get_condition_tree
 from .attributes import AttributeList
 
 
@@ -16,6 +17,8 @@ class Node:
         - A method of mutating a collection of tuples
     """
 
+    __slots__ = ('operator', 'name', 'attributes', '_hash', '__weakref__')
+
     def __init__(self, operator, name=None):
         """
         Construct a node.
@@ -24,48 +27,134 @@ class Node:
         the node.Operator enum.
         """
         self.operator = operator
-        self.name = name
+        self.name = sys.intern(name) if isinstance(name, str) else name
         self.attributes = None
+        self._hash = None
 
     def __eq__(self, other):
         """
         Return true if other is a node with the same operator, name and
-        attributes. Else return false.
+        attributes, and equal children. Else return false.
+
+        Nodes with different structural hashes are unequal, so most unequal
+        trees are told apart without comparing them, and shared subtrees are
+        not compared at all.
         :param other: A Node.
         :return: True if other is equivalent to this node.
         """
-        if type(self) is not type(other):
-            return False
-        if self.name != other.name:
-            return False
-        if self.operator != other.operator:
-            return False
-        if self.attributes != other.attributes:
+        if self is other:
+            return True
+        if type(self) is not type(other) or hash(self) != hash(other):
             return False
+
+        stack = [(self, other)]
+        while stack:
+            node, other = stack.pop()
+            if node is other:
+                continue
+            if node.signature != other.signature:
+                return False
+            stack.extend(zip(node.children, other.children))
         return True
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def __hash__(self):
+        """
+        Return a structural hash of the tree rooted at this node. The hash of
+        every node is computed once, from its signature and the hashes of its
+        children.
+        """
+        if self._hash is None:
+            stack = [self]
+            while stack:
+                node = stack[-1]
+                pending = [child for child in node.children
+                           if child._hash is None]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                node._hash = hash((node.signature,
+                                   tuple(child._hash
+                                         for child in node.children)))
+        return self._hash
+
+    @property
+    def signature(self):
+        """
+        Return a tuple of everything that identifies this node, apart from its
+        children.
+        """
+        attributes = None
+        if self.attributes is not None:
+            attributes = tuple(self.attributes.to_list())
+        return type(self), self.operator, self.name, attributes
+
+    @property
+    def children(self):
+        """
+        Return a list of the children of this node, from left to right.
+        """
+        return []
+
+    def post_order(self):
+        """
+        Return a list of the nodes in the tree rooted at this node, in
+        post-order.
+        :return: A list of Nodes, ending with this node.
+        """
+        return list(self.iter_post_order())
+
+    def iter_post_order(self):
+        """
+        Generate the nodes in the tree rooted at this node, in post-order.
+        The tree is walked with an explicit stack, so its depth is not limited
+        by the recursion limit.
+        :return: An iterator over Nodes, ending with this node.
+        """
+        stack = [(self, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if expanded:
+                yield node
+            else:
+                stack.append((node, True))
+                stack.extend((child, False)
+                             for child in reversed(node.children))
+
+    def iter_pre_order(self):
+        """
+        Generate the nodes in the tree rooted at this node, in pre-order.
+        :return: An iterator over Nodes, starting with this node.
+        """
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(node.children))
+
 
 class RelationNode(Node):
     """
     A relation.
     """
 
+    __slots__ = ()
+
     def __init__(self, name, schema):
         super().__init__(Operator.relation, name)
         self.attributes = AttributeList(schema.get_attributes(name), name)
 
-    def post_order(self):
-        return [self]
-
 
 class UnaryNode(Node):
     """
     A Node with one child.
     """
 
+    __slots__ = ('child',)
+
     def __init__(self, operator, child, name=None):
         super().__init__(operator, name)
         self.child = child
@@ -73,13 +162,13 @@ class UnaryNode(Node):
         if not name:
             self.name = self.child.name
 
-        self.attributes = copy.copy(child.attributes)
+        # Nodes that pass their child's attributes through share its list.
+        # Nodes that change the attributes copy it first.
+        self.attributes = child.attributes
 
-    def __eq__(self, other):
-        return super().__eq__(other) and self.child.__eq__(other.child)
-
-    def post_order(self):
-        return self.child.post_order() + [self]
+    @property
+    def children(self):
+        return [self.child]
 
 
 class SelectNode(UnaryNode):
@@ -87,13 +176,24 @@ class SelectNode(UnaryNode):
     A relation that results from the relation algebra select operator.
     """
 
+    __slots__ = ('conditions',)
+
     def __init__(self, child, conditions):
+        """
+        Construct a SelectNode.
+        :param child: The child of this Node.
+        :param conditions: A condition tree, or a condition expression to
+        parse into one.
+        """
         super().__init__(Operator.select, child)
-        self.attributes.validate(get_attribute_references(conditions))
+        if isinstance(conditions, str):
+            conditions = get_condition_tree(conditions)
+        self.attributes.validate(conditions.references)
         self.conditions = conditions
 
-    def __eq__(self, other):
-        return self.conditions == other.conditions and super().__eq__(other)
+    @property
+    def signature(self):
+        return super().signature + (self.conditions,)
 
 
 class ProjectNode(UnaryNode):
@@ -101,8 +201,11 @@ class ProjectNode(UnaryNode):
     A relation that results from the relation algebra project operator.
     """
 
+    __slots__ = ()
+
     def __init__(self, child, attributes):
         super().__init__(Operator.project, child=child)
+        self.attributes = copy.copy(self.attributes)
         self.attributes.trim(attributes)
 
 
@@ -111,6 +214,8 @@ class RenameNode(UnaryNode):
     A relation that results from the relation algebra rename operator.
     """
 
+    __slots__ = ()
+
     def __init__(self, child, name, attributes, schema):
         """
         Construct a RenameNode.
@@ -123,6 +228,7 @@ class RenameNode(UnaryNode):
         if schema.contains(name):
             raise RelationReferenceError(
                 'Relation \'{name}\' already exists.'.format(name=name))
+        self.attributes = copy.copy(self.attributes)
         self.attributes.rename(attributes, self.name)
 
 
@@ -131,6 +237,8 @@ class AssignNode(UnaryNode):
     A relation that results from the relation algebra assign operator.
     """
 
+    __slots__ = ()
+
     def __init__(self, child, name, attributes, schema):
         """
         Construct an AssignNode.
@@ -146,6 +254,7 @@ class AssignNode(UnaryNode):
             raise InputError('Assignment requires naming all attributes.')
 
         super().__init__(Operator.assign, child, name)
+        self.attributes = copy.copy(self.attributes)
         self.attributes.rename(attributes, name)
         schema.add(name, self.attributes.names)
 
@@ -155,18 +264,16 @@ class BinaryNode(Node):
     A Node with two children, a left and a right.
     """
 
+    __slots__ = ('left', 'right')
+
     def __init__(self, operator, left, right, name=None):
         super().__init__(operator, name)
         self.left = left
         self.right = right
 
-    def __eq__(self, other):
-        return (super().__eq__(other)
-                and self.left.__eq__(other.left)
-                and self.right.__eq__(other.right))
-
-    def post_order(self):
-        return self.left.post_order() + self.right.post_order() + [self]
+    @property
+    def children(self):
+        return [self.left, self.right]
 
 
 class JoinNode(BinaryNode):
@@ -174,6 +281,8 @@ class JoinNode(BinaryNode):
     A relation that results from the relation algebra cross join operator.
     """
 
+    __slots__ = ()
+
     def __init__(self, operator, left, right):
         if left.name and right.name and left.name == right.name:
             raise RelationReferenceError('Ambiguous relation reference.')
@@ -186,6 +295,8 @@ class CrossJoinNode(JoinNode):
     A relation that results from the relation algebra cross join operator.
     """
 
+    __slots__ = ()
+
     def __init__(self, left, right):
         super().__init__(Operator.cross_join, left, right)
 
@@ -195,11 +306,13 @@ class NaturalJoinNode(JoinNode):
     A relation that results from the relation algebra natural join operator.
     """
 
+    __slots__ = ()
+
     def __init__(self, left, right):
         super().__init__(Operator.natural_join, left, right)
         left_attributes = [attribute.prefixed
                            for attribute in self.left.attributes]
-        left_names = self.left.attributes.names
+        left_names = set(self.left.attributes.names)
         right_attributes = [attribute.prefixed
                             for attribute in self.right.attributes
                             if attribute.name not in left_names]
@@ -211,13 +324,25 @@ class ThetaJoinNode(JoinNode):
     A relation that results from the relation algebra theta join operator.
     """
 
+    __slots__ = ('conditions',)
+
     def __init__(self, left, right, conditions):
+        """
+        Construct a ThetaJoinNode.
+        :param left: The left child of this Node.
+        :param right: The right child of this Node.
+        :param conditions: A condition tree, or a condition expression to
+        parse into one.
+        """
         super().__init__(Operator.theta_join, left, right)
-        self.attributes.validate(get_attribute_references(conditions))
+        if isinstance(conditions, str):
+            conditions = get_condition_tree(conditions)
+        self.attributes.validate(conditions.references)
         self.conditions = conditions
 
-    def __eq__(self, other):
-        return self.conditions == other.conditions and super().__eq__(other)
+    @property
+    def signature(self):
+        return super().signature + (self.conditions,)
 
 
 class SetOperatorNode(BinaryNode):
@@ -225,6 +350,8 @@ class SetOperatorNode(BinaryNode):
     An abstract class for binary nodes with set operators.
     """
 
+    __slots__ = ()
+
     def __init__(self, operator, left, right):
         super().__init__(operator, left, right, None)
 
@@ -241,6 +368,8 @@ class UnionNode(SetOperatorNode):
     A relation that results from the relation algebra union operator.
     """
 
+    __slots__ = ()
+
     def __init__(self, left, right):
         super().__init__(Operator.union, left, right)
 
@@ -250,6 +379,8 @@ class DifferenceNode(SetOperatorNode):
     A relation that results from the relation algebra difference operator.
     """
 
+    __slots__ = ()
+
     def __init__(self, left, right):
         super().__init__(Operator.difference, left, right)
 
@@ -259,6 +390,8 @@ class IntersectNode(SetOperatorNode):
     A relation that results from the relation algebra intersect operator.
     """
 
+    __slots__ = ()
+
     def __init__(self, left, right):
         super().__init__(Operator.intersect, left, right)
 
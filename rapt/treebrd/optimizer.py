@@ -0,0 +1,858 @@
+import copy
+
+from .condition_node import BinaryConditionNode, IdentityConditionNode, \
+    ParenthesizedConditionNode
+from .errors import AttributeReferenceError
+from .estimator import Estimator
+from .grammars.syntax import Syntax
+from .node import UnaryNode, SelectNode, ProjectNode, JoinNode, \
+    CrossJoinNode, NaturalJoinNode, ThetaJoinNode
+
+# Joins of up to this many relations are ordered by dynamic programming, and
+# joins of more relations greedily.
+DYNAMIC_PROGRAMMING_LIMIT = 10
+
+
+class Optimizer:
+    """
+    A rule-based optimizer that rewrites relational algebra syntax trees into
+    equivalent trees that are cheaper to evaluate.
+
+    Selections are split into their conjuncts, and each conjunct is pushed
+    down to the lowest node whose attributes cover its references.
+    Comparisons that link the two sides of a join become its join
+    condition, so cross products turn into theta and natural joins. Given a
+    catalog, chains of joins are reordered to keep the estimated sizes of
+    their intermediate results small. The inputs of joins are then projected
+    onto the attributes that are used above them.
+
+    The trees are never modified. Nodes that are rewritten are replaced by
+    new nodes, and unchanged subtrees are shared with the original tree.
+    """
+
+    def __init__(self, syntax=None):
+        """
+        Initializes an Optimizer.
+
+        :param syntax: the syntax the conditions of the trees were written
+        in, or None for the default.
+        """
+        self.syntax = syntax or Syntax()
+
+    def optimize(self, root, catalog=None):
+        """
+        Return an optimized tree that is equivalent to the tree rooted at
+        root.
+
+        :param root: a treebrd node.
+        :param catalog: a Catalog with the statistics of the relations, or
+        None to keep joins in the order they were written.
+        :return: a treebrd node.
+        """
+        root = self.push_selections(root)
+        root = self.eliminate_cross_products(root)
+        if catalog is not None:
+            root = self.reorder_joins(root, catalog)
+        root = self.push_projections(root)
+        return root
+
+    def push_selections(self, root):
+        """
+        Return a tree where the conjuncts of every selection are moved to
+        the lowest node that covers their references.
+
+        A conjunct is never placed directly above a join that is an input
+        of another join, so it stays above the outer join instead.
+
+        :param root: a treebrd node.
+        :return: a treebrd node.
+        """
+        has_join = {}
+        chains = {}
+        for node in root.iter_post_order():
+            has_join[id(node)] = isinstance(node, JoinNode) or any(
+                has_join[id(child)] for child in node.children)
+            if isinstance(node, SelectNode):
+                length, bottom = chains.get(id(node.child), (0, node.child))
+                chains[id(node)] = (length + 1, bottom)
+
+        # Pending conjuncts travel down the tree in a dictionary of the depth
+        # they are placed at to lists of routes, each a tuple of the
+        # selection the conjunct came from, its condition, the depth it is
+        # placed at and the child positions it takes at joins. Conjuncts of
+        # outer selections come first.
+        results = []
+        stack = [(root, 0, {}, False)]
+        while stack:
+            node, depth, pending, visited = stack.pop()
+            if visited:
+                children = self._pop_children(node, results)
+                if isinstance(node, SelectNode):
+                    result = children[0]
+                else:
+                    result = self._replace_children(node, children)
+                results.append(self._select(result, pending))
+                continue
+
+            if isinstance(node, SelectNode):
+                for route in self._routes(node, depth, has_join, chains):
+                    pending.setdefault(route[2], []).append(route)
+            landed = [(select, condition) for select, condition, _, _ in
+                      pending.pop(depth, [])]
+            if len(node.children) == 1:
+                routed = [pending]
+            else:
+                routed = [{} for _ in node.children]
+                for target, routes in pending.items():
+                    for route in routes:
+                        routed[route[3][depth]].setdefault(
+                            target, []).append(route)
+            stack.append((node, depth, landed, True))
+            for child, child_pending in reversed(list(zip(node.children,
+                                                          routed))):
+                stack.append((child, depth + 1, child_pending, False))
+        return results.pop()
+
+    def eliminate_cross_products(self, root):
+        """
+        Return a tree where the comparisons in selections over joins are
+        moved into the lowest join whose two sides they link.
+
+        A cross join with such comparisons becomes a theta join. When the
+        comparisons equate exactly the attributes that the two sides have
+        in common, and the attributes of the right side that a natural join
+        drops are not used above it, it becomes a natural join instead.
+
+        :param root: a treebrd node.
+        :return: a treebrd node.
+        """
+        # Each node travels down with the attributes that the nodes above it
+        # use, or None if they may use all of them, the routes of the
+        # comparisons moving into the joins below it, and whether it is the
+        # right input of a join. A route is a tuple of the comparison, the
+        # positions of the joins it passes and the position reached.
+        results = []
+        stack = [(root, None, [], False, False)]
+        while stack:
+            node, needed, pending, right, visited = stack.pop()
+            if visited:
+                if isinstance(node, SelectNode):
+                    results.append(self._rebuild_chain(pending,
+                                                       results.pop()))
+                elif isinstance(node, JoinNode):
+                    results.append(self._join(
+                        node, self._pop_children(node, results), pending,
+                        needed, right))
+                else:
+                    results.append(self._rebuild(
+                        node, self._pop_children(node, results)))
+                continue
+
+            if isinstance(node, SelectNode):
+                chain, routes, used = self._chain_routes(node)
+                stack.append((node, needed, chain, right, True))
+                if needed is not None:
+                    needed = needed | used
+                stack.append((chain[-1][0].child, needed, routes, right,
+                              False))
+                continue
+
+            landed = []
+            routed = [[] for _ in node.children]
+            for condition, path, position in pending:
+                if position == len(path):
+                    landed.append(condition)
+                else:
+                    routed[path[position]].append(
+                        (condition, path, position + 1))
+            required = [None] * len(node.children)
+            if isinstance(node, ProjectNode):
+                required = [set(node.attributes)]
+            elif isinstance(node, JoinNode) and needed is not None:
+                conditions = [condition for condition, _, _ in pending]
+                if isinstance(node, ThetaJoinNode):
+                    conditions.append(node.conditions)
+                used = set(needed)
+                for condition in conditions:
+                    used |= self._resolve(condition, node.attributes)
+                common = set()
+                if isinstance(node, NaturalJoinNode):
+                    common = set(node.left.attributes.names).intersection(
+                        node.right.attributes.names)
+                required = [{attribute for attribute in child.attributes
+                             if attribute in used or
+                             attribute.name in common}
+                            for child in node.children]
+            stack.append((node, needed, landed, right, True))
+            is_join = isinstance(node, JoinNode)
+            for position in reversed(range(len(node.children))):
+                stack.append((node.children[position], required[position],
+                              routed[position], is_join and position == 1,
+                              False))
+        return results.pop()
+
+    def reorder_joins(self, root, catalog):
+        """
+        Return a tree where chains of cross and theta joins are reordered
+        to minimize the estimated sum of the sizes of their intermediate
+        results. Chains of up to DYNAMIC_PROGRAMMING_LIMIT relations are
+        ordered by dynamic programming and longer chains greedily, always
+        as left-deep trees. A chain is only reordered if that is estimated
+        to be cheaper than the order it was written in.
+
+        Chains that are inputs of other joins, or that contain a natural
+        join, are kept as they are. A reordered chain is projected onto its
+        original attributes, in their original order, unless its parent is
+        a projection.
+
+        :param root: a treebrd node.
+        :param catalog: a Catalog with the statistics of the relations.
+        :return: a treebrd node.
+        """
+        estimator = Estimator(catalog, self.syntax)
+        results = []
+        stack = [(root, False, False, False, None)]
+        while stack:
+            node, in_join, ordered, visited, region = stack.pop()
+            if visited:
+                if region is None:
+                    results.append(self._rebuild(
+                        node, self._pop_children(node, results)))
+                else:
+                    count = len(region[0])
+                    leaves = results[-count:]
+                    del results[-count:]
+                    results.append(self._reorder(node, region, leaves,
+                                                 ordered, estimator))
+                continue
+
+            region = None
+            children = node.children
+            if isinstance(node, (CrossJoinNode, ThetaJoinNode)) and \
+                    not in_join:
+                region = self._join_region(node)
+                if region is not None:
+                    children = region[0]
+            stack.append((node, in_join, ordered, True, region))
+            for child in reversed(children):
+                stack.append((child, isinstance(node, JoinNode),
+                              isinstance(node, ProjectNode), False, None))
+        return results.pop()
+
+    def push_projections(self, root):
+        """
+        Return a tree where the inputs of joins are projected onto the
+        attributes that the nodes above them use.
+
+        :param root: a treebrd node.
+        :return: a treebrd node.
+        """
+        # The attributes that a node must keep travel down with it, as a
+        # set of Attributes or None if it must keep all of them.
+        results = []
+        stack = [(root, None, False)]
+        while stack:
+            node, needed, visited = stack.pop()
+            if visited:
+                children = self._pop_children(node, results)
+                if isinstance(node, JoinNode):
+                    children = [
+                        self._project(new, required)
+                        if self._is_join_input(old) else new
+                        for old, new, required in zip(node.children,
+                                                      children, needed)]
+                results.append(self._rebuild(node, children))
+                continue
+
+            required = [None] * len(node.children)
+            if isinstance(node, SelectNode) and needed is not None:
+                required = [needed | self._resolve(node.conditions,
+                                                   node.attributes)]
+            elif isinstance(node, ProjectNode):
+                required = [set(node.attributes)]
+            elif isinstance(node, JoinNode) and needed is not None:
+                if isinstance(node, ThetaJoinNode):
+                    needed = needed | self._resolve(node.conditions,
+                                                    node.attributes)
+                common = set()
+                if isinstance(node, NaturalJoinNode):
+                    common = set(node.left.attributes.names).intersection(
+                        node.right.attributes.names)
+                required = [{attribute for attribute in child.attributes
+                             if attribute in needed or
+                             attribute.name in common}
+                            for child in node.children]
+            stack.append((node, required, True))
+            for child, child_needed in reversed(list(zip(node.children,
+                                                         required))):
+                stack.append((child, child_needed, False))
+        return results.pop()
+
+    def conjuncts(self, conditions):
+        """
+        Return the conjuncts of a condition tree.
+
+        A condition is only split where every logical operator of its
+        outermost chain is a conjunction, so its meaning does not depend on
+        the precedence of conjunction and disjunction.
+
+        :param conditions: a ConditionNode.
+        :return: a list of ConditionNodes.
+        """
+        conjuncts = []
+        stack = [conditions]
+        while stack:
+            condition = stack.pop()
+            inner = condition
+            if isinstance(inner, ParenthesizedConditionNode):
+                inner = inner.child
+            terms = self._conjunction_terms(inner)
+            if len(terms) > 1:
+                stack.extend(reversed(terms))
+            else:
+                conjuncts.append(condition)
+        return conjuncts
+
+    def conjunction(self, conditions):
+        """
+        Return a condition tree that is the conjunction of the conditions.
+
+        :param conditions: a list of ConditionNodes.
+        :return: a ConditionNode.
+        """
+        conditions = [self._parenthesize(condition)
+                      for condition in conditions]
+        result = conditions[0]
+        for condition in conditions[1:]:
+            result = BinaryConditionNode(self.syntax.and_op, result,
+                                         condition)
+        return result
+
+    def _conjunction_terms(self, condition):
+        """
+        Return the terms of the outermost chain of logical operators in the
+        condition if they are all conjunctions, or just the condition.
+        """
+        logical = {self.syntax.and_op, self.syntax.or_op}
+        terms = []
+        node = condition
+        while isinstance(node, BinaryConditionNode) and \
+                node.operator in logical:
+            if node.operator != self.syntax.and_op:
+                return [condition]
+            terms.append(node.right)
+            node = node.left
+        terms.append(node)
+        terms.reverse()
+        return terms
+
+    def _parenthesize(self, condition):
+        """
+        Return the condition, in parentheses if its outermost chain of
+        logical operators is not a conjunction.
+        """
+        if isinstance(condition, BinaryConditionNode) and \
+                condition.operator in {self.syntax.and_op,
+                                       self.syntax.or_op} and \
+                len(self._conjunction_terms(condition)) == 1:
+            return ParenthesizedConditionNode(condition)
+        return condition
+
+    def _is_comparison(self, condition):
+        syntax = self.syntax
+        return isinstance(condition, BinaryConditionNode) and \
+            condition.operator in {
+                syntax.equal_op, syntax.not_equal_op,
+                syntax.not_equal_alt_op, syntax.less_than_op,
+                syntax.less_than_equal_op, syntax.greater_than_op,
+                syntax.greater_than_equal_op}
+
+    def _chain_routes(self, select):
+        """
+        Return the chain of selections that starts at a select, as pairs of
+        each select and the conditions it keeps, the routes of the
+        comparisons that move into the join below the chain, and the
+        Attributes that the kept conditions use.
+        """
+        chain = []
+        node = select
+        while isinstance(node, SelectNode):
+            chain.append(node)
+            node = node.child
+        kept = []
+        routes = []
+        used = set()
+        for link in chain:
+            conditions = [link.conditions]
+            if isinstance(node, JoinNode):
+                conjuncts = self.conjuncts(link.conditions)
+                paths = [self._join_path(node, conjunct)
+                         if self._is_comparison(conjunct) else None
+                         for conjunct in conjuncts]
+                if any(path is not None for path in paths):
+                    conditions = []
+                    for conjunct, path in zip(conjuncts, paths):
+                        if path is None:
+                            conditions.append(conjunct)
+                        else:
+                            routes.append((conjunct, path, 0))
+            for condition in conditions:
+                used |= self._resolve(condition, select.attributes)
+            kept.append((link, conditions))
+        return kept, routes, used
+
+    def _rebuild_chain(self, chain, node):
+        """
+        Return the node under the selections of a chain, which are pairs of
+        each select and the conditions it keeps.
+        """
+        for select, conditions in reversed(chain):
+            if not conditions:
+                continue
+            if len(conditions) == 1 and conditions[0] is select.conditions:
+                node = self._rebuild(select, [node])
+            else:
+                node = SelectNode(node, self.conjunction(conditions))
+        return node
+
+    def _join_path(self, join, condition):
+        """
+        Return the positions of the joins from a join down to the lowest
+        cross or theta join whose two sides the condition links, or None
+        if there is no such join.
+        """
+        references = condition.references
+        path = []
+        node = join
+        while True:
+            for position, child in enumerate(node.children):
+                if self._covers(child, references):
+                    break
+            else:
+                if isinstance(node, (CrossJoinNode, ThetaJoinNode)):
+                    return tuple(path)
+                return None
+            if not isinstance(child, JoinNode):
+                return None
+            path.append(position)
+            node = child
+
+    def _join(self, node, children, conditions, needed, right):
+        """
+        Return the join with new children, and the conditions added to its
+        join condition. A join that is the right input of another join is
+        rendered inline, so it never becomes a natural join.
+        """
+        if not conditions:
+            return self._rebuild(node, children)
+        if isinstance(node, ThetaJoinNode):
+            conditions = [node.conditions] + conditions
+        elif not right and self._is_natural(children, conditions, needed):
+            return NaturalJoinNode(*children)
+        return ThetaJoinNode(children[0], children[1],
+                             self.conjunction(conditions))
+
+    def _is_natural(self, children, conditions, needed):
+        """
+        Return True if the cross join of the children under the conditions
+        is their natural join, and keeps the needed Attributes.
+        """
+        left, right = children
+        left_names = left.attributes.names
+        right_names = right.attributes.names
+        common = set(left_names).intersection(right_names)
+        if needed is None or not common or any(
+                left_names.count(name) != 1 or right_names.count(name) != 1
+                for name in common):
+            return False
+        equated = set()
+        for condition in conditions:
+            operands = [condition.left, condition.right]
+            if condition.operator != self.syntax.equal_op or not all(
+                    isinstance(operand, IdentityConditionNode) and
+                    operand.is_reference for operand in operands):
+                return False
+            first, second = [operand.value for operand in operands]
+            if not self._covers(left, [first]):
+                first, second = second, first
+            if not (self._covers(left, [first]) and
+                    self._covers(right, [second])):
+                return False
+            name = left.attributes.get_attribute(first).name
+            if name != right.attributes.get_attribute(second).name:
+                return False
+            equated.add(name)
+        return equated == common and not any(
+            attribute in needed for attribute in right.attributes
+            if attribute.name in common)
+
+    @staticmethod
+    def _join_region(root):
+        """
+        Return the inputs of the chain of cross and theta joins rooted at
+        root, from left to right, and the joins of the chain in post-order,
+        each with the start and stop positions of the inputs under it.
+        Return None if the chain contains a natural join, or has fewer than
+        three inputs.
+        """
+        leaves = []
+        spans = []
+        bounds = []
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if isinstance(node, NaturalJoinNode):
+                return None
+            if not isinstance(node, JoinNode):
+                bounds.append((len(leaves), len(leaves) + 1))
+                leaves.append(node)
+            elif expanded:
+                (start, _), (_, stop) = bounds[-2:]
+                bounds[-2:] = [(start, stop)]
+                spans.append((node, start, stop))
+            else:
+                stack.append((node, True))
+                stack.append((node.right, False))
+                stack.append((node.left, False))
+        if len(leaves) < 3:
+            return None
+        return leaves, spans
+
+    def _reorder(self, root, region, leaves, ordered, estimator):
+        """
+        Return the chain of joins rooted at root with new inputs, in the
+        order with the least estimated cost.
+        """
+        _, spans = region
+        attributes = root.attributes
+        references = attributes.to_list()
+        # A new order is projected back onto the written columns by their
+        # references, so each must name exactly its own attribute.
+        if not self._resolves(attributes, references):
+            return self._rebuild_region(spans, leaves)
+        owners = {}
+        distinct = {}
+        rows = []
+        for position, leaf in enumerate(leaves):
+            estimate = estimator.estimate(leaf)
+            rows.append(estimate.rows)
+            distinct.update(estimate.distinct)
+            for attribute in leaf.attributes:
+                owners[attribute] = position
+
+        # Each conjunct of a join condition is kept with the set of inputs it
+        # refers to, as a bit mask, and its selectivity.
+        conjuncts = []
+        for node, _, _ in spans:
+            if not isinstance(node, ThetaJoinNode):
+                continue
+            for conjunct in self.conjuncts(node.conditions):
+                mask = 0
+                try:
+                    for reference in conjunct.references:
+                        attribute = attributes.get_attribute(reference)
+                        mask |= 1 << owners[attribute]
+                except AttributeReferenceError:
+                    return self._rebuild_region(spans, leaves)
+                fraction = estimator.selectivity(conjunct, attributes,
+                                                 distinct)
+                conjuncts.append((conjunct, mask, fraction))
+
+        sizes = {}
+
+        def size(mask):
+            if mask not in sizes:
+                result = 1
+                for position, count in enumerate(rows):
+                    if mask >> position & 1:
+                        result *= count
+                for _, conjunct_mask, fraction in conjuncts:
+                    if conjunct_mask & ~mask == 0:
+                        result *= fraction
+                sizes[mask] = result
+            return sizes[mask]
+
+        written = sum(size(self._span_mask(start, stop))
+                      for _, start, stop in spans)
+        if len(leaves) <= DYNAMIC_PROGRAMMING_LIMIT:
+            order, cost = self._dynamic_order(len(leaves), size)
+        else:
+            order, cost = self._greedy_order(rows, conjuncts, size)
+        if not cost < written:
+            return self._rebuild_region(spans, leaves)
+
+        node = leaves[order[0]]
+        mask = 1 << order[0]
+        remaining = conjuncts
+        for position in order[1:]:
+            mask |= 1 << position
+            conditions = [conjunct for conjunct, conjunct_mask, _ in remaining
+                          if conjunct_mask & ~mask == 0]
+            remaining = [entry for entry in remaining
+                         if entry[1] & ~mask != 0]
+            if conditions:
+                node = ThetaJoinNode(node, leaves[position],
+                                     self.conjunction(conditions))
+            else:
+                node = CrossJoinNode(node, leaves[position])
+        if not ordered and node.attributes.to_list() != references:
+            node = ProjectNode(node, references)
+        return node
+
+    @staticmethod
+    def _resolves(attributes, references):
+        """
+        Return True if every reference resolves to the attribute in the same
+        position of the attributes.
+        """
+        try:
+            return all(attributes.get_attribute(reference) is attribute
+                       for reference, attribute in zip(references,
+                                                       attributes))
+        except AttributeReferenceError:
+            return False
+
+    @staticmethod
+    def _span_mask(start, stop):
+        return (1 << stop) - (1 << start)
+
+    @staticmethod
+    def _dynamic_order(count, size):
+        """
+        Return the left-deep order of count inputs with the least cost, the
+        sum of the sizes of its intermediate results, and its cost.
+        """
+        best = {1 << position: (0, [position]) for position in range(count)}
+        for mask in range(1, 1 << count):
+            if mask in best:
+                continue
+            choices = []
+            for position in range(count):
+                if mask >> position & 1:
+                    cost, order = best[mask & ~(1 << position)]
+                    choices.append((cost, order + [position]))
+            cost, order = min(choices, key=lambda choice: choice[0])
+            best[mask] = (cost + size(mask), order)
+        cost, order = best[(1 << count) - 1]
+        return order, cost
+
+    @staticmethod
+    def _greedy_order(rows, conjuncts, size):
+        """
+        Return a left-deep order of the inputs that starts with the
+        smallest input and adds the input that keeps the next intermediate
+        result smallest, and the sum of the sizes of its intermediate
+        results.
+        """
+        involved = [[] for _ in rows]
+        for _, mask, fraction in conjuncts:
+            position = 0
+            remaining = mask
+            while remaining:
+                if remaining & 1:
+                    involved[position].append((mask, fraction))
+                remaining >>= 1
+                position += 1
+        first = min(range(len(rows)), key=lambda position: rows[position])
+        order = [first]
+        mask = 1 << first
+        current = rows[first]
+        cost = 0
+        unplaced = set(range(len(rows))) - {first}
+        while unplaced:
+            choices = []
+            for position in unplaced:
+                joined = mask | 1 << position
+                result = current * rows[position]
+                for conjunct_mask, fraction in involved[position]:
+                    if conjunct_mask & ~joined == 0:
+                        result *= fraction
+                choices.append((result, position))
+            current, position = min(choices)
+            order.append(position)
+            mask |= 1 << position
+            unplaced.remove(position)
+            cost += current
+        return order, cost
+
+    def _rebuild_region(self, spans, leaves):
+        """
+        Return the chain of joins in its original order, with new inputs.
+        """
+        results = []
+        for node, start, stop in spans:
+            right = results.pop() if isinstance(node.right, JoinNode) \
+                else leaves[stop - 1]
+            left = results.pop() if isinstance(node.left, JoinNode) \
+                else leaves[start]
+            results.append(self._rebuild(node, [left, right]))
+        return results.pop()
+
+    def _routes(self, select, depth, has_join, chains):
+        """
+        Return the routes of the conjuncts of a select at a depth, as tuples
+        of the select, the condition, the depth of the node it is placed
+        above, and the child positions it takes at joins, by depth.
+        """
+        conjuncts = self.conjuncts(select.conditions)
+        paths = [self._path(select, depth, conjunct, has_join, chains)
+                 for conjunct in conjuncts]
+        if all(target == depth + 1 for target, _ in paths):
+            # Nothing moves, so the condition is kept as it was written.
+            return [(select, select.conditions, depth + 1, {})]
+        return [(select, conjunct, target, positions)
+                for conjunct, (target, positions) in zip(conjuncts, paths)]
+
+    def _path(self, select, depth, conjunct, has_join, chains):
+        """
+        Return the depth of the node that the conjunct of the select at a
+        depth should be placed above, and the child positions taken at
+        joins on the way there, by depth.
+        """
+        references = conjunct.references
+        positions = {}
+        depth += 1
+        landing = depth
+        node = select.child
+        while has_join[id(node)]:
+            if isinstance(node, SelectNode):
+                # Selections keep the attributes of their child, so a chain
+                # of them is passed in one step.
+                length, node = chains[id(node)]
+                depth += length
+                landing = depth
+                continue
+            if not isinstance(node, (ProjectNode, JoinNode)):
+                break
+            for position, child in enumerate(node.children):
+                if self._covers(child, references):
+                    break
+            else:
+                break
+            if isinstance(node, JoinNode):
+                positions[depth] = position
+            parent, node = node, child
+            depth += 1
+            if not (isinstance(parent, JoinNode) and
+                    self._is_join_base(node)):
+                landing = depth
+        return landing, positions
+
+    def _select(self, node, conditions):
+        """
+        Return the node under selections for the conditions, which are
+        pairs of the select they came from and a condition. Consecutive
+        conditions from the same select share a selection.
+        """
+        groups = []
+        for select, condition in conditions:
+            if groups and groups[-1][0] is select:
+                groups[-1][1].append(condition)
+            else:
+                groups.append((select, [condition]))
+        for select, group in reversed(groups):
+            if node is select.child and len(group) == 1 and \
+                    group[0] is select.conditions:
+                node = select
+            else:
+                node = SelectNode(node, self.conjunction(group))
+        return node
+
+    @staticmethod
+    def _covers(node, references):
+        try:
+            node.attributes.validate(references)
+        except AttributeReferenceError:
+            return False
+        return True
+
+    @staticmethod
+    def _resolve(conditions, attributes):
+        return {attributes.get_attribute(reference)
+                for reference in conditions.references}
+
+    @staticmethod
+    def _is_join_base(node):
+        """
+        Return True if the node is a join, or selections over a join.
+        """
+        while isinstance(node, SelectNode):
+            node = node.child
+        return isinstance(node, JoinNode)
+
+    def _is_join_input(self, node):
+        """
+        Return True if the node can be projected as the input of a join.
+        Joins are rendered inline by their parent join, so they are not
+        wrapped.
+        """
+        return not self._is_join_base(node)
+
+    @staticmethod
+    def _project(node, attributes):
+        """
+        Return the node, projected onto the attributes if it has others.
+        """
+        if attributes is None or len(attributes) == len(node.attributes):
+            return node
+        references = [attribute.prefixed for attribute in node.attributes
+                      if attribute in attributes]
+        if len(set(node.attributes.to_list())) != len(node.attributes):
+            return node
+        # A relation without attributes cannot be expressed in SQL.
+        return ProjectNode(node, references or [node.attributes.to_list()[0]])
+
+    @staticmethod
+    def _pop_children(node, results):
+        count = len(node.children)
+        if not count:
+            return []
+        children = results[-count:]
+        del results[-count:]
+        return children
+
+    @staticmethod
+    def _replace_children(node, children):
+        """
+        Return the node with new children whose attributes are the same as
+        the old ones, or the node itself if the children are the same.
+        """
+        if all(new is old for new, old in zip(children, node.children)):
+            return node
+        replacement = copy.copy(node)
+        replacement._hash = None
+        if isinstance(replacement, UnaryNode):
+            replacement.child = children[0]
+        else:
+            replacement.left, replacement.right = children
+        return replacement
+
+    def _rebuild(self, node, children):
+        """
+        Return the node with new children whose attributes may be fewer
+        than the old ones.
+        """
+        if all(new is old for new, old in zip(children, node.children)):
+            return node
+        if isinstance(node, SelectNode):
+            return SelectNode(children[0], node.conditions)
+        if isinstance(node, ProjectNode):
+            return ProjectNode(children[0], node.attributes.to_list())
+        if isinstance(node, CrossJoinNode):
+            return CrossJoinNode(*children)
+        if isinstance(node, NaturalJoinNode):
+            return NaturalJoinNode(*children)
+        if isinstance(node, ThetaJoinNode):
+            return ThetaJoinNode(children[0], children[1], node.conditions)
+        return self._replace_children(node, children)
+
+
+def optimize(root, syntax=None):
+    """
+    Return an optimized tree that is equivalent to the tree rooted at root.
+
+    :param root: a treebrd node.
+    :param syntax: the syntax the conditions of the tree were written in.
+    :return: a treebrd node.
+    """
+    return Optimizer(syntax).optimize(root)
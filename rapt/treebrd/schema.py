@@ -1,64 +1,283 @@
-import copy
+import hashlib
+import json
 
-from rapt.treebrd.errors import RelationReferenceError
+from rapt.treebrd.errors import AttributeReferenceError, InputError, \
+    RelationReferenceError
 
 
-class Schema:
+class Statistics:
     """
-    A Schema is a description of relational data.
+    Statistics about the contents of a relation, used to estimate the cost
+    of queries.
     """
 
-    def __init__(self, definition):
-        self._data = {}
-        for name, attributes in definition.items():
-            self._data[name.lower()] = [attr.lower() for attr in attributes]
+    __slots__ = ('rows', 'distinct')
+
+    def __init__(self, rows=None, distinct=None):
+        """
+        Initializes Statistics.
+
+        :param rows: the number of rows in the relation, or None if it is not
+        known.
+        :param distinct: a mapping of attributes to their number of distinct
+        values.
+        :raise InputError: Raised if a count is not a non-negative integer.
+        """
+        distinct = {attr.lower(): count
+                    for attr, count in (distinct or {}).items()}
+        for count in [rows] + list(distinct.values()):
+            if count is not None and (
+                    not isinstance(count, int) or isinstance(count, bool) or
+                    count < 0):
+                raise InputError(
+                    'Invalid count {count}.'.format(count=count))
+        self.rows = rows
+        self.distinct = distinct
 
     def __eq__(self, other):
-        if type(self) is not type(other):
-            return False
-        if self.to_dict() != other.to_dict():
-            return False
-        return True
+        return isinstance(other, Statistics) and \
+            self.to_dict() == other.to_dict()
 
     def __ne__(self, other):
         return not self.__eq__(other)
 
+    def distinct_count(self, attribute):
+        """
+        Return the number of distinct values of an attribute, or None if it
+        is not known.
+        """
+        return self.distinct.get(attribute)
+
+    def to_dict(self):
+        """
+        Return a dictionary with the row count and the distinct counts, the
+        form that Schema accepts.
+        """
+        return {'rows': self.rows, 'distinct': dict(self.distinct)}
+
+
+class Catalog:
+    """
+    A read-only source of relation definitions, looked up by name.
+
+    Nodes only ask a catalog about the relations a query names, so a
+    catalog can load definitions as they are needed. Subclasses implement
+    lookup and names.
+    """
+
+    def lookup(self, name):
+        """
+        Return the attributes of the relation with the specified name.
+        :param name: A name of a relation.
+        :return: A tuple of attributes, or None if there is no such relation.
+        """
+        raise NotImplementedError
+
+    def names(self):
+        """
+        Return the names of every relation in the catalog.
+        :return: An iterable of relation names.
+        """
+        raise NotImplementedError
+
+    @property
+    def fingerprint(self):
+        """
+        Return a digest of the relations in the catalog. Catalogs with the
+        same fingerprint have the same relations, and the fingerprint of a
+        catalog is the same in every process.
+        """
+        return _digest(sorted(self.to_dict().items()))
+
+    def statistics(self, name):
+        """
+        Return the statistics of the relation with the specified name.
+        :param name: A name of a relation.
+        :return: Statistics, or None if there are none for the relation.
+        """
+        return None
+
+    def keys(self, name):
+        """
+        Return the keys declared for the relation with the specified name.
+        No two rows of the relation have the same values for a key.
+        :param name: A name of a relation.
+        :return: A tuple of keys, each a tuple of attributes.
+        """
+        return ()
+
+    def overlay(self):
+        """
+        Return an empty Schema layered on top of this catalog. Adding
+        relations to the overlay does not change the catalog.
+        :return: A Schema.
+        """
+        schema = Schema({}, self)
+        schema._is_overlay = True
+        return schema
+
     def contains(self, name):
         """
-        Return true if the Schema contains a relation with the specified name.
+        Return true if the catalog contains a relation with the specified
+        name.
         :param name: A name of a relation.
-        :return: True if the Schema contains a relation with the specified name.
+        :return: True if the catalog contains a relation with the specified
+        name.
         """
-        return name in self._data
+        return self.lookup(name) is not None
 
     def to_dict(self):
         """
-        Return a dictionary containing the name-attribute pairs in this Schema.
+        Return a dictionary containing the name-attribute pairs in this
+        catalog.
         :return: A dictionary of name-attribute pairs.
         """
-        return copy.deepcopy(self._data)
+        return {name: list(self.lookup(name)) for name in self.names()}
 
     def get_attributes(self, name):
         """
         Return the list of attributes associated with the specified relation.
-        :param name: A name of a relation in the Schema.
+        :param name: A name of a relation in the catalog.
         :return: A list of attributes.
         :raise RelationReferenceError: Raised if the name does not exist.
         """
-        attributes = self._data.get(name, None)
+        attributes = self.lookup(name)
         if not attributes:
             raise RelationReferenceError(
                 'Relation \'{name}\' does not exist.'.format(name=name))
-        return attributes[:]
+        return list(attributes)
+
+
+class Schema(Catalog):
+    """
+    A Schema is a description of relational data.
+
+    A Schema can be layered on top of a base catalog with overlay. Relations
+    added to the overlay are kept in the overlay, and lookups fall back to
+    the base, which is never modified. Only overlays can be added to, so a
+    Schema built once can be shared by any number of translations.
+    """
+
+    def __init__(self, definition, base=None, statistics=None, keys=None):
+        """
+        Initializes a Schema.
+
+        :param definition: a mapping of relation names to their attributes.
+        :param base: a Catalog to look up relations in when they are not in
+        the definition.
+        :param statistics: a mapping of relation names to their Statistics,
+        or to dictionaries with a 'rows' count and a 'distinct' mapping of
+        attributes to their number of distinct values. Relations may be in
+        the definition or the base.
+        :param keys: a mapping of relation names to lists of keys, each a
+        list of attributes that no two rows of the relation share values for.
+        :raise RelationReferenceError: Raised if statistics or keys are given
+        for a relation that does not exist.
+        :raise AttributeReferenceError: Raised if statistics or keys are given
+        for an attribute that the relation does not have.
+        """
+        self._base = base
+        self._fingerprint = None
+        self._is_overlay = False
+        self._data = {}
+        for name, attributes in definition.items():
+            self._data[name.lower()] = tuple(attr.lower()
+                                             for attr in attributes)
+        self._statistics = {}
+        for name, relation_statistics in (statistics or {}).items():
+            if not isinstance(relation_statistics, Statistics):
+                relation_statistics = Statistics(**relation_statistics)
+            name = name.lower()
+            attributes = self.get_attributes(name)
+            _check_attributes(name, attributes, relation_statistics.distinct)
+            self._statistics[name] = relation_statistics
+        self._keys = {}
+        for name, relation_keys in (keys or {}).items():
+            name = name.lower()
+            attributes = self.get_attributes(name)
+            relation_keys = tuple(tuple(attr.lower() for attr in key)
+                                  for key in relation_keys)
+            for key in relation_keys:
+                _check_attributes(name, attributes, key)
+            self._keys[name] = relation_keys
+
+    def __eq__(self, other):
+        if type(self) is not type(other):
+            return False
+        if self.to_dict() != other.to_dict():
+            return False
+        return True
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    @property
+    def fingerprint(self):
+        if self._fingerprint is None:
+            base = self._base.fingerprint if self._base is not None else None
+            value = [base, sorted(self._data.items())]
+            if self._statistics:
+                value.append(sorted(
+                    (name, stats.rows, sorted(stats.distinct.items()))
+                    for name, stats in self._statistics.items()))
+            if self._keys:
+                value.append(sorted(
+                    (name, [list(key) for key in keys])
+                    for name, keys in self._keys.items()))
+            self._fingerprint = _digest(value)
+        return self._fingerprint
+
+    def lookup(self, name):
+        attributes = self._data.get(name)
+        if attributes is None and self._base is not None:
+            return self._base.lookup(name)
+        return attributes
+
+    def statistics(self, name):
+        statistics = self._statistics.get(name)
+        if statistics is None and self._base is not None:
+            return self._base.statistics(name)
+        return statistics
+
+    def keys(self, name):
+        keys = self._keys.get(name)
+        if keys is None and self._base is not None:
+            return self._base.keys(name)
+        return keys or ()
+
+    def names(self):
+        names = set(self._data)
+        if self._base is not None:
+            names.update(self._base.names())
+        return names
 
     def add(self, name, attributes):
         """
-        Add the relation to the Schema.
+        Add the relation to the Schema. Only an overlay can be changed, so
+        a Schema that is shared, or whose fingerprint keys cached results,
+        stays the same.
         :param name: The name of a relation.
         :param attributes: A list of attributes for the relation.
+        :raise InputError: Raised if the Schema is not an overlay.
         :raise RelationReferenceError: Raised if the name already exists.
         """
-        if name in self._data:
+        if not self._is_overlay:
+            raise InputError('Relations can only be added to an overlay.')
+        if self.contains(name):
             raise RelationReferenceError(
                 'Relation \'{name}\' already exists.'.format(name=name))
-        self._data[name] = attributes[:]
\ No newline at end of file
+        self._data[name] = tuple(attributes)
+        self._fingerprint = None
+
+
+def _check_attributes(name, attributes, names):
+    for attr in names:
+        if attr not in attributes:
+            raise AttributeReferenceError(
+                'Relation \'{name}\' has no attribute \'{attr}\'.'.format(
+                    name=name, attr=attr))
+
+
+def _digest(value):
+    encoded = json.dumps(value, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha1(encoded).hexdigest()
@@ -1,9 +1,22 @@
-from rapt.treebrd.schema import Schema
-from .utility import flatten
+import io
+import weakref
+from collections import namedtuple
+
+from rapt.treebrd.schema import Catalog, Schema
+from .grammars.lexer import Lexer
 from .node import SelectNode, ProjectNode, RenameNode, \
     AssignNode, CrossJoinNode, NaturalJoinNode, UnionNode, DifferenceNode, \
     IntersectNode, ThetaJoinNode, RelationNode
 
+# Kinds of operations in an expression.
+RELATION = 'relation'
+UNARY = 'unary'
+BINARY = 'binary'
+
+# An operation of a parsed expression: its kind, the operator or relation
+# name, and the parameters of the operator.
+Operation = namedtuple('Operation', ['kind', 'operator', 'param'])
+
 
 class TreeBRD:
     """
@@ -11,13 +24,83 @@ class TreeBRD:
     that builds forests of relational algebra syntax trees. STARBuilder
     """
 
-    def __init__(self, grammar):
+    def __init__(self, grammar, parser=None, intern=False):
+        """
+        Initializes a TreeBRD.
+
+        :param grammar: a grammar that defines the operators and syntax.
+        :param parser: a parser to use instead of the grammar's own, such as
+        a PrecedenceParser for the grammar.
+        :param intern: flag for sharing identical subtrees between the trees
+        this builder builds, which then form a DAG. Equal interned nodes are
+        the same object.
+        """
         self.grammar = grammar
+        self.parser = parser
+        # Interned nodes, keyed by their signature and the identities of
+        # their children. Nodes that are no longer used are dropped.
+        self._interned = weakref.WeakValueDictionary() if intern else None
+
+    def parse(self, instring):
+        """
+        Return the statements in the instring as parse trees that do not
+        depend on a schema. A parse tree is a tuple of the operations of a
+        statement in post-order. Parse trees are immutable and hashable, so
+        they can be cached and bound to any number of schemas.
+
+        :param instring: a relational algebra string.
+        :return: a tuple of parse trees.
+        """
+        return tuple(self._operations(exp) for exp in self._tokens(instring))
+
+    def bind(self, trees, schema):
+        """
+        Return the syntax trees for parse trees, with the relations and
+        attributes they reference resolved in the schema. Relations assigned
+        by a statement are available to the statements after it.
+
+        :param trees: parse trees returned by parse.
+        :param schema: a mapping of relation names to their attributes, or
+        a Catalog.
+        :return: a list of syntax trees.
+        """
+        _schema = self._overlay(schema)
+        return [self._bind(operations, _schema) for operations in trees]
 
     def build(self, instring, schema):
-        ra = self.grammar.parse(instring).asList()
-        _schema = Schema(schema)
-        return [self.to_node(statement, _schema) for statement in ra[:]]
+        return self.bind(self.parse(instring), schema)
+
+    def iter_build(self, source, schema):
+        """
+        Generate the syntax trees for the statements in the source, parsing
+        and building one statement at a time.
+
+        :param source: a relational algebra string, a file object, or an
+        iterable of lines.
+        :param schema: a mapping of relation names to their attributes, or
+        a Catalog.
+        :return: an iterator over the roots of the syntax trees.
+        """
+        if isinstance(source, str):
+            source = io.StringIO(source)
+        _schema = self._overlay(schema)
+        for statement in Lexer(self.grammar.syntax).statements(source):
+            for exp in self._tokens(statement):
+                yield self.to_node(exp, _schema)
+
+    @staticmethod
+    def _overlay(schema):
+        """
+        Return a Schema for the relations assigned while building, on top of
+        the schema. A Catalog is used as it is, without copying it.
+
+        :param schema: a mapping of relation names to their attributes, or
+        a Catalog.
+        :return: a Schema overlay.
+        """
+        if not isinstance(schema, Catalog):
+            schema = Schema(schema)
+        return schema.overlay()
 
     def to_node(self, exp, schema):
         """
@@ -30,50 +113,129 @@ class TreeBRD:
         for verification and generating attributes.
         :return: A Node.
         """
-        # A relation node.
-        if len(exp) == 1 and isinstance(exp[0], str):
-            node = RelationNode(name=exp[0], schema=schema)
-
-        # An expression.
-        elif len(exp) == 1 and isinstance(exp[0], list):
-            node = self.to_node(exp[0], schema)
-
-        # Unary operators.
-        elif isinstance(exp[0], str) and self.grammar.is_unary(exp[0]):
-            child = self.to_node(exp[2:], schema)
-            node = self.create_unary_node(operator=exp[0], child=child,
-                                          param=exp[1], schema=schema)
-
-        # Assignment.
-        elif exp[1] is self.grammar.syntax.assign_op:
-            child = self.to_node(exp[2:], schema)
-            node = self.create_unary_node(operator=exp[1], child=child,
-                                          param=exp[0], schema=schema)
-
-        # Binary operators.
-        elif self.grammar.is_binary(exp[1]):
-            # Pyparsing will put different operators with the same precedence
-            # in the same list. This can be a problem when we mix operators with
-            # and without parameters (for example join). We avoid this below
-            # and build from right to left, to create the correct syntax tree.
-            if isinstance(exp[-2], str):
-                # Operator without parameters
-                op_pos = -2
-                param = None
+        return self._bind(self._operations(exp), schema)
+
+    def _tokens(self, instring):
+        """
+        Return the statements in the instring as nested lists of tokens.
+        """
+        if self.parser:
+            return self.parser.parse(instring)
+        return self.grammar.parse(instring).asList()
+
+    def _bind(self, operations, schema):
+        # The nodes are built bottom up from a post-order list of operations,
+        # so the depth of the expression is not limited by recursion.
+        nodes = []
+        for operation, operator, param in operations:
+            if operation == RELATION:
+                node = RelationNode(name=operator, schema=schema)
+            elif operation == UNARY:
+                node = self.create_unary_node(operator=operator,
+                                              child=nodes.pop(),
+                                              param=param, schema=schema)
             else:
-                op_pos = -3
-                param = exp[-2]
+                right = nodes.pop()
+                left = nodes.pop()
+                node = self.create_binary_node(operator=operator, left=left,
+                                               right=right, param=param)
+            nodes.append(self.intern(node))
+        return nodes.pop()
 
-            operator = exp[op_pos]
-            left = self.to_node(exp[:op_pos], schema)
-            right = self.to_node(exp[-1], schema)
-            node = self.create_binary_node(operator=operator, left=left,
-                                           right=right, param=param)
+    def intern(self, node):
+        """
+        Return the interned node that is equal to node, whose children must
+        already be interned. If there is none, node is interned and returned.
 
-        else:
-            raise ValueError
+        :param node: A Node.
+        :return: A Node.
+        """
+        if self._interned is None:
+            return node
+        key = (node.signature, tuple(id(child) for child in node.children))
+        interned = self._interned.get(key)
+        if interned is None:
+            self._interned[key] = interned = node
+        return interned
 
-        return node
+    def _operations(self, exp):
+        """
+        Return the operations of an expression in post-order, as a tuple of
+        Operations.
+
+        Sub-expressions are tracked as a list with the start and stop of a
+        slice, to avoid copying long chains of binary operators.
+        """
+        operations = []
+        pending = [(exp, 0, len(exp))]
+        while pending:
+            exp, start, stop = pending.pop()
+            first = exp[start]
+
+            # A relation.
+            if stop - start == 1 and isinstance(first, str):
+                operations.append(Operation(RELATION, first, None))
+
+            # An expression.
+            elif stop - start == 1 and isinstance(first, list):
+                pending.append((first, 0, len(first)))
+
+            # Unary operators.
+            elif isinstance(first, str) and self.grammar.is_unary(first):
+                operations.append(
+                    self._operation(UNARY, first, exp[start + 1]))
+                pending.append((exp, start + 2, stop))
+
+            # Assignment.
+            elif exp[start + 1] == self.grammar.syntax.assign_op:
+                operations.append(
+                    self._operation(UNARY, exp[start + 1], first))
+                pending.append((exp, start + 2, stop))
+
+            # Binary operators.
+            elif self.grammar.is_binary(exp[start + 1]):
+                # Pyparsing will put different operators with the same
+                # precedence in the same list. This can be a problem when we
+                # mix operators with and without parameters (for example
+                # join). We avoid this below and build from right to left, to
+                # create the correct syntax tree.
+                if isinstance(exp[stop - 2], str):
+                    # Operator without parameters
+                    op_pos = stop - 2
+                    param = None
+                else:
+                    op_pos = stop - 3
+                    param = exp[stop - 2]
+
+                right = exp[stop - 1]
+                operations.append(
+                    self._operation(BINARY, exp[op_pos], param))
+                pending.append((exp, start, op_pos))
+                pending.append((right, 0, len(right)))
+
+            else:
+                raise ValueError
+
+        operations.reverse()
+        return tuple(operations)
+
+    def _operation(self, kind, operator, param):
+        """
+        Return an Operation, with the tokens of its parameters converted to
+        immutable values: a condition tree for conditions, a tuple of
+        attributes for a projection, and a pair of the name and a tuple of
+        attributes for a rename or an assignment.
+        """
+        syntax = self.grammar.syntax
+        if operator in (syntax.select_op, syntax.theta_join_op):
+            param = self.grammar.condition_tree(param)
+        elif operator == syntax.project_op:
+            param = tuple(param)
+        elif operator in (syntax.rename_op, syntax.assign_op):
+            name = param[0] if isinstance(param[0], str) else None
+            attributes = param[-1] if isinstance(param[-1], list) else []
+            param = (name, tuple(attributes))
+        return Operation(kind, operator, param)
 
     def create_unary_node(self, operator, child, param=None, schema=None):
         """
@@ -82,29 +244,22 @@ class TreeBRD:
         :param schema:
         :param child:
         :param operator: A relational algebra operator (see constants.py)
-        :param param: A list of parameters for the operator.
+        :param param: The parameters of the operator, as in an Operation.
         :return: A Unary Node.
         """
 
         if operator == self.grammar.syntax.select_op:
-            conditions = ' '.join(flatten(param))
-            node = SelectNode(child, conditions)
+            node = SelectNode(child, param)
 
         elif operator == self.grammar.syntax.project_op:
             node = ProjectNode(child, param)
 
         elif operator == self.grammar.syntax.rename_op:
-            name = None
-            attributes = []
-            if isinstance(param[0], str):
-                name = param.pop(0)
-            if param:
-                attributes = param[0]
+            name, attributes = param
             node = RenameNode(child, name, attributes, schema)
 
         elif operator == self.grammar.syntax.assign_op:
-            name = param[0]
-            attributes = [] if len(param) < 2 else param[1]
+            name, attributes = param
             node = AssignNode(child, name, attributes, schema)
 
         else:
@@ -117,6 +272,7 @@ class TreeBRD:
         Return a Node whose type depends on the specified operator.
 
         :param operator: A relational algebra operator (see constants.py)
+        :param param: The parameters of the operator, as in an Operation.
         :return: A Node.
         """
 
@@ -128,8 +284,7 @@ class TreeBRD:
             node = NaturalJoinNode(left, right)
 
         elif operator == self.grammar.syntax.theta_join_op:
-            conditions = ' '.join(flatten(param))
-            node = ThetaJoinNode(left, right, conditions)
+            node = ThetaJoinNode(left, right, param)
 
         # Set operators
         elif operator == self.grammar.syntax.union_op:
@@ -1,3 +1,16 @@
 def flatten(lst):
-    return sum(([l] if not isinstance(l, list) else flatten(l)
-                for l in lst), [])
+    """
+    Return a list of the items in a nested list, in order, without the
+    nesting.
+    """
+    flat = []
+    stack = [iter(lst)]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, list):
+                stack.append(iter(item))
+                break
+            flat.append(item)
+        else:
+            stack.pop()
+    return flat
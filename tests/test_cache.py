@@ -0,0 +1,99 @@
+from unittest import TestCase
+
+from rapt.cache import ResultCache
+from rapt.rapt import Rapt
+from rapt.treebrd.errors import RelationReferenceError
+from rapt.treebrd.schema import Schema
+
+
+class TestResultCache(TestCase):
+    def test_get_computes_once(self):
+        cache = ResultCache()
+        calls = []
+        for _ in range(3):
+            self.assertEqual(1, cache.get('a', lambda: calls.append(1) or 1))
+        self.assertEqual([1], calls)
+        self.assertEqual({'hits': 2, 'misses': 1, 'evictions': 0, 'size': 1},
+                         cache.stats)
+
+    def test_lru_evicts_least_recently_used(self):
+        cache = ResultCache(2)
+        cache.get('a', lambda: 1)
+        cache.get('b', lambda: 2)
+        cache.get('a', lambda: 1)
+        cache.get('c', lambda: 3)
+        self.assertEqual(1, cache.get('a', lambda: None))
+        self.assertIsNone(cache.get('b', lambda: None))
+        self.assertEqual(2, cache.evictions)
+
+    def test_fifo_evicts_oldest(self):
+        cache = ResultCache(2, 'fifo')
+        cache.get('a', lambda: 1)
+        cache.get('b', lambda: 2)
+        cache.get('a', lambda: 1)
+        cache.get('c', lambda: 3)
+        self.assertIsNone(cache.get('a', lambda: None))
+
+    def test_unbounded(self):
+        cache = ResultCache(None)
+        for i in range(100):
+            cache.get(i, lambda: i)
+        self.assertEqual(100, cache.stats['size'])
+
+    def test_exceptions_are_not_stored(self):
+        cache = ResultCache()
+
+        def fail():
+            raise ValueError
+
+        self.assertRaises(ValueError, cache.get, 'a', fail)
+        self.assertEqual(0, cache.stats['size'])
+
+    def test_exception_when_policy_is_unknown(self):
+        self.assertRaises(ValueError, ResultCache, 2, 'random')
+
+
+class TestRaptCache(TestCase):
+    def setUp(self):
+        self.rapt = Rapt(cache_size=8)
+        self.definition = {'alpha': ['a1', 'a2'], 'beta': ['b1']}
+        self.instring = 'x := \\project_{a1} alpha; x \\join beta;'
+
+    def test_cache_is_disabled_by_default(self):
+        self.assertIsNone(Rapt().cache)
+
+    def test_repeated_requests_hit(self):
+        first = self.rapt.to_sql(self.instring, self.definition)
+        second = self.rapt.to_sql(self.instring, Schema(self.definition))
+        self.assertEqual(first, second)
+        self.assertEqual(1, self.rapt.cache.hits)
+
+    def test_results_equal_uncached_results(self):
+        for rapt in [Rapt(), self.rapt]:
+            self.assertEqual(
+                Rapt().to_qtree(self.instring, self.definition),
+                rapt.to_qtree(self.instring, self.definition))
+
+    def test_returned_lists_are_copies(self):
+        self.rapt.to_sql(self.instring, self.definition).clear()
+        self.assertEqual(2, len(self.rapt.to_sql(self.instring,
+                                                 self.definition)))
+
+    def test_requests_are_keyed_by_schema_flags_and_format(self):
+        self.rapt.to_sql(self.instring, self.definition)
+        self.rapt.to_sql(self.instring, {'alpha': ['a1'], 'beta': ['b1']})
+        self.rapt.to_sql(self.instring, self.definition, True)
+        self.rapt.to_sql_sequence(self.instring, self.definition)
+        self.rapt.to_qtree(self.instring, self.definition)
+        self.assertEqual(0, self.rapt.cache.hits)
+        self.assertEqual(5, self.rapt.cache.misses)
+
+    def test_errors_are_not_cached(self):
+        for _ in range(2):
+            self.assertRaises(RelationReferenceError, self.rapt.to_sql,
+                              'gamma;', self.definition)
+        self.assertEqual(2, self.rapt.cache.misses)
+
+    def test_cache_policy_is_configurable(self):
+        self.assertEqual('fifo',
+                         Rapt(cache_size=2, cache_policy='fifo').cache.policy)
@@ -1,4 +1,5 @@
 import functools
+import re
 
 from rapt.rapt import Rapt
 from rapt.transformers.sql import sql_translator
@@ -180,12 +181,84 @@ class TestThetaJoin(TestSQLSequence):
         self.assertEqual(expected, actual)
 
 
+class TestIncremental(TestSQLSequence):
+    def test_each_node_is_translated_once(self):
+        builder = TreeBRD(ExtendedGrammar())
+        root = builder.build('\\project_{a1} \\select_{a1 = 1} '
+                             '(alpha \\join beta);', self.schema)[0]
+        translator = sql_translator.Translator()
+        dispatched = []
+        dispatch = translator._dispatch
+        translator._dispatch = lambda node: dispatched.append(node) or \
+            dispatch(node)
+        translator.translate_sequence(root)
+        self.assertEqual(root.post_order(), dispatched)
+
+    def test_same_statements_as_translating_each_subtree(self):
+        ra = '\\project_{a1} \\select_{a1 = 1} \\rename_{r} ' \
+             '\\select_{a2 = 2} (alpha \\join beta);'
+        root = TreeBRD(ExtendedGrammar()).build(ra, self.schema)[0]
+        expected = sql_translator.translate(root.post_order(), True)
+        self.assertEqual(expected,
+                         sql_translator.translate_sequence(root, True))
+
+
+class TestTempTables(TestSQLSequence):
+    def setUp(self):
+        self.translate = self.translate_func(functools.partial(Rapt(
+            grammar='Extended Grammar').to_sql_sequence,
+            use_bag_semantics=True, use_temp_tables=True))
+
+    def test_relation(self):
+        expected = [['SELECT alpha.a1, alpha.a2, alpha.a3 FROM alpha']]
+        self.assertEqual(expected, self.translate('alpha;'))
+
+    def test_steps_read_from_temp_tables(self):
+        root = TreeBRD(ExtendedGrammar()).build(
+            '\\project_{a1} \\select_{a1 = 1} alpha;', self.schema)[0]
+        table = '_1'
+        expected = ['SELECT alpha.a1, alpha.a2, alpha.a3 FROM alpha',
+                    'CREATE TEMPORARY TABLE {}(a1, a2, a3) AS '
+                    'SELECT alpha.a1, alpha.a2, alpha.a3 FROM alpha '
+                    'WHERE a1 = 1'.format(table),
+                    'SELECT alpha.a1 FROM {} AS alpha'.format(table)]
+        self.assertEqual(expected,
+                         sql_translator.translate_sequence(root, True, True))
+
+    def test_join_is_not_stored(self):
+        root = TreeBRD(ExtendedGrammar()).build(
+            '\\select_{a1 = b1} (alpha \\join beta);', self.schema)[0]
+        sequence = sql_translator.translate_sequence(root, True, True)
+        self.assertFalse(any(sql.startswith('CREATE') for sql in sequence))
+        self.assertEqual(sql_translator.translate([root], True)[0],
+                         sequence[-1])
+
+    def test_statements_name_temp_tables_apart(self):
+        ra = 'x := \\project_{a1} \\select_{a1 = 1} alpha; ' \
+             '\\project_{b1} \\select_{b1 = 1} beta; ' \
+             '\\project_{a1} \\select_{a1 = 1} x;'
+        tables = [re.match(r'CREATE TEMPORARY TABLE (\w+)', sql).group(1)
+                  for sequence in self.translate(ra) for sql in sequence
+                  if sql.startswith('CREATE')]
+        self.assertEqual(5, len(tables))
+        self.assertEqual(len(tables), len(set(tables)))
+
+    def test_output_is_linear(self):
+        depth = 1000
+        ra = '\\select_{a1 = 1} ' * depth + 'alpha;'
+        rapt = Rapt(grammar='Extended Grammar', parser='Precedence Parser')
+        sequence = rapt.to_sql_sequence(ra, self.schema,
+                                        use_temp_tables=True)[0]
+        self.assertEqual(depth + 1, len(sequence))
+        self.assertEqual(depth, sum(sql.count('a1 = 1') for sql in sequence))
+
+
 class TestSet:
     def test_simple(self):
         ra = 'gamma {operator} gammatwin;'.format(operator=self.ra_operator)
 
         root_list = TreeBRD(self.grammar).build(instring=ra, schema=self.schema)
-        name = id(root_list[0])
+        name = 1
         root_list = root_list[0].post_order()
         actual = sql_translator.translate(root_list, use_bag_semantics=True)
 
@@ -202,8 +275,8 @@ class TestSet:
         ra = 'gamma {operator} gammatwin {operator} gammaprime;'.format(operator=self.ra_operator)
 
         root_list = TreeBRD(self.grammar).build(instring=ra, schema=self.schema)
-        root_name = id(root_list[0])
-        child_name = id(root_list[0].left)
+        root_name = 2
+        child_name = 1
         root_list = root_list[0].post_order()
         actual = sql_translator.translate(root_list, use_bag_semantics=True)
 
@@ -1,10 +1,14 @@
 import functools
+import io
+import re
+from unittest import TestCase
 
 from rapt.rapt import Rapt
 from rapt.transformers.sql import sql_translator
 from rapt.treebrd.grammars import CoreGrammar
 from rapt.treebrd.grammars.extended_grammar import ExtendedGrammar
 from rapt.treebrd.errors import AttributeReferenceError
+from rapt.treebrd.schema import Schema
 from rapt.treebrd.treebrd import TreeBRD
 
 from tests.transformers.test_transfomer import TestTransformer
@@ -431,12 +435,101 @@ class TestThetaJoin(TestSQL):
         self.assertEqual(expected, actual)
 
 
+class TestIterSQL(TestSQL):
+    def setUp(self):
+        super().setUp()
+        self.iter_sql = self.translate_func(functools.partial(Rapt(
+            grammar='Extended Grammar').iter_sql, use_bag_semantics=True))
+
+    def test_string(self):
+        ra = 'niche := \\select_{b1 = 1} beta; \\project_{b1} niche;'
+        self.assertEqual(self.translate(ra), list(self.iter_sql(ra)))
+
+    def test_lines(self):
+        ra = ['niche := \\select_{b1 = 1}\n', 'beta;\n',
+              '\\project_{b1} niche;\n']
+        self.assertEqual(self.translate(''.join(ra)),
+                         list(self.iter_sql(ra)))
+
+    def test_exception_when_statement_is_invalid(self):
+        results = self.iter_sql('alpha; \\select_{b1=1} alpha;')
+        self.assertEqual('SELECT alpha.a1, alpha.a2, alpha.a3 FROM alpha',
+                         next(results))
+        self.assertRaises(AttributeReferenceError, next, results)
+
+    def test_schema_is_wrapped_once(self):
+        class Definition(dict):
+            reads = 0
+
+            def items(self):
+                Definition.reads += 1
+                return super().items()
+
+        schema = Definition(self.schema)
+        rapt = Rapt(grammar='Extended Grammar', optimize=True,
+                    minimize_distinct=True)
+        ra = 'alpha; \\select_{b1 = 1} beta; \\project_{a1} alpha;'
+        self.assertEqual(3, len(list(rapt.iter_sql(ra, schema))))
+        self.assertEqual(1, Definition.reads)
+
+
+class TestTempNames(TestSQL):
+    def test_names_are_numbered_in_order(self):
+        ra = '(alpha \\union alpha) \\join \\select_{a1 = 1} ' \
+             '(alpha \\difference alpha);'
+        actual = self.translate(ra)[0]
+        self.assertEqual(['_1', '_3', '_2', '_4'],
+                         re.findall(r'AS (_\d+)', actual))
+
+    def test_statements_are_named_alike(self):
+        ra = 'alpha \\union alpha; alpha \\union alpha;'
+        first, second = self.translate(ra)
+        self.assertEqual(first, second)
+
+    def test_shared_nodes_are_named_apart(self):
+        ra = '(alpha \\union alpha) \\join (alpha \\union alpha);'
+        actual = Rapt(grammar='Extended Grammar', intern=True).to_sql(
+            ra, self.schema, use_bag_semantics=True)[0]
+        self.assertEqual(self.translate(ra)[0], actual)
+        self.assertEqual(['_1', '_3', '_2', '_4'],
+                         re.findall(r'AS (_\d+)', actual))
+
+
+class TestRendering(TestSQL):
+    def setUp(self):
+        super().setUp()
+        self.rapt = Rapt(grammar='Extended Grammar')
+        self.ra = 'x := \\rename_{y} (alpha \\union alpha); ' \
+                  '\\select_{a1 = 1} \\select_{a2 = 2} ' \
+                  '(x \\join_{x.a1 = beta.b1} beta);'
+
+    def test_fragments_join_to_sql(self):
+        for root in self.rapt.to_syntax_tree(self.ra, self.schema):
+            query = sql_translator.Translator().translate(root)
+            self.assertEqual(query.to_sql(), ''.join(query.fragments()))
+
+    def test_write(self):
+        sink = io.StringIO()
+        self.rapt.write_sql(self.ra, self.schema, sink)
+        expected = ''.join(sql + ';\n'
+                           for sql in self.rapt.to_sql(self.ra, self.schema))
+        self.assertEqual(expected, sink.getvalue())
+
+    def test_deep_plan(self):
+        depth = 10000
+        ra = ''.join('\\rename_{{r{}}} '.format(i) for i in range(depth))
+        rapt = Rapt(grammar='Extended Grammar', parser='Precedence Parser')
+        sql = rapt.to_sql(ra + 'alpha;', self.schema)[0]
+        self.assertEqual(depth, sql.count(') AS r'))
+        self.assertTrue(sql.endswith(') AS r0(a1, a2, a3)'))
+
+
 class TestSet:
     def test_simple(self):
         ra = 'gamma {operator} gammatwin;'.format(operator=self.ra_operator)
 
         root_list = TreeBRD(self.grammar).build(instring=ra, schema=self.schema)
-        name = id(root_list[0])
+        name = 1
         actual = sql_translator.translate(root_list, use_bag_semantics=True)
 
         expected = ['SELECT g1, g2 FROM ('
@@ -450,8 +543,8 @@ class TestSet:
         ra = 'gamma {operator} gammatwin {operator} gammaprime;'.format(operator=self.ra_operator)
 
         root_list = TreeBRD(self.grammar).build(instring=ra, schema=self.schema)
-        root_name = id(root_list[0])
-        child_name = id(root_list[0].left)
+        root_name = 2
+        child_name = 1
         actual = sql_translator.translate(root_list, use_bag_semantics=True)
 
         expected = ['SELECT g1, g2 FROM ('
@@ -467,7 +560,7 @@ class TestSet:
     def test_select_simple(self):
         ra = '\\select_{{g1 = g2}} (gamma {operator} gammatwin);'.format(operator=self.ra_operator)
         root_list = TreeBRD(self.grammar).build(instring=ra, schema=self.schema)
-        name = id(root_list[0].child)
+        name = 1
         actual = sql_translator.translate(root_list, use_bag_semantics=True)
         expected = ['SELECT g1, g2 FROM '
                     '(SELECT gamma.g1, gamma.g2 FROM gamma '
@@ -480,7 +573,7 @@ class TestSet:
     def test_project_simple(self):
         ra = '\\project_{{g2}} (gamma {operator} gammatwin);'.format(operator=self.ra_operator)
         root_list = TreeBRD(self.grammar).build(instring=ra, schema=self.schema)
-        name = id(root_list[0].child)
+        name = 1
         actual = sql_translator.translate(root_list, use_bag_semantics=True)
         expected = ['SELECT g2 FROM '
                     '(SELECT gamma.g1, gamma.g2 FROM gamma '
@@ -494,7 +587,7 @@ class TestSet:
         ra = '\\project_{{g1, g2}} gammaprime {operator} gamma;'.format(operator=self.ra_operator)
 
         root_list = TreeBRD(self.grammar).build(instring=ra, schema=self.schema)
-        name = id(root_list[0])
+        name = 1
         actual = sql_translator.translate(root_list, use_bag_semantics=True)
 
         expected = ['SELECT g1, g2 FROM '
@@ -508,7 +601,7 @@ class TestSet:
         ra = '\\rename_{{g}} (gamma {operator} gammatwin);'.format(operator=self.ra_operator)
 
         root_list = TreeBRD(self.grammar).build(instring=ra, schema=self.schema)
-        name = id(root_list[0].child)
+        name = 1
         actual = sql_translator.translate(root_list, use_bag_semantics=True)
 
         expected = ['SELECT g.g1, g.g2 FROM '
@@ -523,7 +616,7 @@ class TestSet:
         ra = '\\rename_{{g(a, b)}} (gamma {operator} gammatwin);'.format(operator=self.ra_operator)
 
         root_list = TreeBRD(self.grammar).build(instring=ra, schema=self.schema)
-        name = id(root_list[0].child)
+        name = 1
         actual = sql_translator.translate(root_list, use_bag_semantics=True)
 
         expected = ['SELECT g.a, g.b FROM '
@@ -548,3 +641,76 @@ class TestIntersection(TestSQL, TestSet):
     grammar = ExtendedGrammar()
     ra_operator = '\\intersect'
     sql_operator = 'INTERSECT'
+
+
+class TestMinimalDistinct(TestCase):
+    def setUp(self):
+        self.schema = Schema(
+            {'alpha': ['a1', 'a2'], 'beta': ['b1', 'a1'], 'gamma': ['g1']},
+            keys={'alpha': [['a1']], 'beta': [['b1', 'a1']]})
+        self.translate = functools.partial(
+            Rapt(grammar='Extended Grammar', minimize_distinct=True).to_sql,
+            schema=self.schema)
+
+    def test_relation_with_key(self):
+        self.assertEqual(['SELECT alpha.a1, alpha.a2 FROM alpha'],
+                         self.translate('alpha;'))
+
+    def test_relation_without_key(self):
+        self.assertEqual(['SELECT DISTINCT gamma.g1 FROM gamma'],
+                         self.translate('gamma;'))
+
+    def test_project_keeping_key(self):
+        self.assertEqual(['SELECT alpha.a1 FROM alpha WHERE a2 = 1'],
+                         self.translate('\\project_{a1} \\select_{a2 = 1} '
+                                        'alpha;'))
+
+    def test_project_dropping_key(self):
+        self.assertEqual(['SELECT DISTINCT alpha.a2 FROM alpha'],
+                         self.translate('\\project_{a2} alpha;'))
+
+    def test_join_keeping_keys(self):
+        expected = ['SELECT beta.b1, alpha.a1 FROM '
+                    '(SELECT alpha.a1, alpha.a2 FROM alpha) AS alpha '
+                    'NATURAL JOIN (SELECT beta.b1, beta.a1 FROM beta) AS beta']
+        self.assertEqual(expected, self.translate(
+            '\\project_{b1, a1} (alpha \\natural_join beta);'))
+
+    def test_join_dropping_keys(self):
+        actual = self.translate('\\project_{a2} (alpha \\natural_join beta);')
+        self.assertTrue(actual[0].startswith('SELECT DISTINCT alpha.a2 FROM'))
+
+    def test_one_distinct_at_top(self):
+        actual = self.translate('\\project_{a1} (\\project_{a1, g1} '
+                                '(\\project_{a1} beta \\join gamma));')
+        self.assertEqual(1, actual[0].count('DISTINCT'))
+        self.assertTrue(actual[0].startswith('SELECT DISTINCT'))
+
+    def test_union(self):
+        expected = ['SELECT DISTINCT a1 FROM (SELECT alpha.a1 FROM alpha '
+                    'UNION ALL SELECT beta.a1 FROM beta) AS _1']
+        self.assertEqual(expected, self.translate(
+            '\\project_{a1} alpha \\union \\project_{a1} beta;'))
+
+    def test_difference(self):
+        expected = ['SELECT a1 FROM (SELECT alpha.a1 FROM alpha '
+                    'EXCEPT SELECT beta.a1 FROM beta) AS _1']
+        self.assertEqual(expected, self.translate(
+            '\\project_{a1} alpha \\difference \\project_{a1} beta;'))
+
+    def test_assign(self):
+        self.assertEqual(['CREATE TEMPORARY TABLE r(a2) AS '
+                          'SELECT DISTINCT alpha.a2 FROM alpha'],
+                         self.translate('r := \\project_{a2} alpha;'))
+
+    def test_sequence(self):
+        rapt = Rapt(grammar='Extended Grammar', minimize_distinct=True)
+        expected = [['SELECT alpha.a1, alpha.a2 FROM alpha',
+                     'SELECT DISTINCT alpha.a2 FROM alpha']]
+        self.assertEqual(expected, rapt.to_sql_sequence(
+            '\\project_{a2} alpha;', self.schema))
+
+    def test_disabled_by_default(self):
+        actual = Rapt(grammar='Extended Grammar').to_sql('alpha;', self.schema)
+        self.assertEqual(['SELECT DISTINCT alpha.a1, alpha.a2 FROM alpha'],
+                         actual)
@@ -1,8 +1,11 @@
-from unittest import skip
+from unittest import skip, TestCase
 from rapt.rapt import Rapt
 
+from rapt.transformers.qtree import qtree_translator
 from rapt.transformers.qtree.constants import *
 from rapt.treebrd.grammars.extended_grammar import ExtendedGrammar
+from rapt.treebrd.schema import Schema
+from rapt.treebrd.treebrd import TreeBRD
 from tests.transformers.test_transfomer import TestTransformer
 
 
@@ -134,4 +137,42 @@ class TestDifference(TestQTreeTransformer):
         expected = [
             '\Tree[.${}$ [.$gamma$ ] [.$gammatwin$ ] ]'.format(DIFFERENCE_OP)]
         actual = self.translate(ra)
-        self.assertEqual(expected, actual)
\ No newline at end of file
+        self.assertEqual(expected, actual)
+
+
+class TestDeepTrees(TestCase):
+    @staticmethod
+    def nested_selects(depth):
+        exp = ['alpha']
+        for _ in range(depth):
+            exp = ['\\select', [['a1', '=', '1']], exp]
+        return TreeBRD(ExtendedGrammar()).to_node(
+            [exp], Schema({'alpha': ['a1']}))
+
+    def test_deeply_nested_tree(self):
+        depth = 100000
+        qtree = qtree_translator.translate([self.nested_selects(depth)])[0]
+        self.assertEqual(depth, qtree.count('a1 = 1'))
+        self.assertTrue(qtree.endswith('[.$alpha$ ]' + ' ]' * depth))
+
+    def test_text_built_is_linear_in_depth(self):
+        def copied(depth):
+            # The number of characters each node's translation holds itself,
+            # besides the translations of its children that it refers to.
+            translator = qtree_translator.Translator()
+            dispatch = translator._dispatch
+            counts = []
+
+            def counting(node):
+                result = dispatch(node)
+                blocks = result if isinstance(result, tuple) else (result,)
+                counts.append(sum(len(block) for block in blocks
+                                  if isinstance(block, str)))
+                return result
+
+            translator._dispatch = counting
+            translator.translate(self.nested_selects(depth))
+            return sum(counts)
+
+        single, double, triple = copied(1000), copied(2000), copied(3000)
+        self.assertEqual(double - single, triple - double)
@@ -1,6 +1,8 @@
 from pyparsing import ParseException
 
 from rapt.treebrd.grammars.core_grammar import CoreGrammar
+from rapt.treebrd.grammars.extended_grammar import ExtendedGrammar
+from rapt.treebrd.grammars.syntax import Syntax
 from tests.treebrd.grammars.grammar_test_case import GrammarTestCase
 
 
@@ -20,4 +22,26 @@ class TestCoreGrammar(GrammarTestCase):
         self.assertRaises(ParseException, parse, "relation.")
         self.assertRaises(ParseException, parse, ".attribute")
         self.assertRaises(ParseException, parse, "relation.attribute.attribute")
-        self.assertRaises(ParseException, parse, ".")
\ No newline at end of file
+        self.assertRaises(ParseException, parse, ".")
+
+class TestCompiled(GrammarTestCase):
+    def test_compiled_is_shared_by_equal_syntax(self):
+        first = CoreGrammar(Syntax(join_op='\\cross'))
+        second = CoreGrammar(Syntax(join_op='\\cross'))
+        self.assertIs(first.compiled('statements'),
+                      second.compiled('statements'))
+
+    def test_compiled_is_not_shared_by_different_syntax(self):
+        first = CoreGrammar()
+        second = CoreGrammar(Syntax(join_op='\\cross'))
+        self.assertIsNot(first.compiled('statements'),
+                         second.compiled('statements'))
+
+    def test_compiled_is_not_shared_by_different_grammar(self):
+        self.assertIsNot(CoreGrammar().compiled('statements'),
+                         ExtendedGrammar().compiled('statements'))
+
+    def test_parse_with_custom_syntax(self):
+        grammar = CoreGrammar(Syntax(join_op='\\cross', assign_op='<-'))
+        expected = [[['x'], '<-', [['a'], '\\cross', ['b']]]]
+        self.assertEqual(expected, grammar.parse('x <- a \\cross b;').asList())
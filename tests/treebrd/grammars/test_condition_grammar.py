@@ -1,6 +1,7 @@
 import unittest
 from pyparsing import ParseException
 from rapt.treebrd.grammars.condition_grammar import ConditionGrammar, get_attribute_references
+from rapt.treebrd.grammars.syntax import Syntax
 from tests.treebrd.grammars.grammar_test_case import GrammarTestCase
 
 
@@ -152,4 +153,27 @@ class TestConditionAttrs(unittest.TestCase):
 
     def test_conditions_binary_man_attrs(self):
         expected = ['answer', 'known', 'answer', 'unknown']
-        self.assertEqual(expected, get_attribute_references('answer=known and answer=unknown'))
\ No newline at end of file
+        self.assertEqual(expected, get_attribute_references('answer=known and answer=unknown'))
+
+    def test_conditions_with_parentheses_and_not(self):
+        expected = ['a.answer', 'known', 'other']
+        self.assertEqual(expected, get_attribute_references(
+            'not (a.answer = known) or ("x" = other and 1 < 2)'))
+
+    def test_conditions_with_custom_syntax(self):
+        syntax = Syntax(and_op='also', equal_op='eq')
+        expected = ['answer', 'known']
+        self.assertEqual(expected, get_attribute_references(
+            'answer eq 42 also known eq 7', syntax))
+
+
+class TestConditionReferences(unittest.TestCase):
+    def test_references_from_tokens(self):
+        tokens = [['(', 'a', '=', "'also'", ')', 'and', ['not', '1', '<', 'b']]]
+        self.assertEqual(['a', 'b'], ConditionGrammar().references(tokens))
+
+    def test_references_when_attribute_is_named_like_operator(self):
+        syntax = Syntax(and_op='also')
+        tokens = [['also', '=', '1', 'also', '2', '=', 'also']]
+        self.assertEqual(['also', 'also'],
+                         ConditionGrammar(syntax).references(tokens))
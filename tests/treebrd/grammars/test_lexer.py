@@ -0,0 +1,74 @@
+from unittest import TestCase
+
+from pyparsing import ParseException
+
+from rapt.treebrd.grammars.lexer import Lexer, Token, SYMBOL, NAME, NUMBER, \
+    STRING, END
+from rapt.treebrd.grammars.syntax import Syntax
+
+
+class TestLexer(TestCase):
+    def setUp(self):
+        self.lexer = Lexer(Syntax())
+
+    def tokenize(self, instring):
+        return list(self.lexer.tokenize(instring))
+
+    def test_tokenize_with_offsets(self):
+        expected = [Token(SYMBOL, '\\select', '\\select', 0),
+                    Token(SYMBOL, '_{', '_{', 7),
+                    Token(NAME, 'a.b', 'a.b', 9),
+                    Token(SYMBOL, '<=', '<=', 13),
+                    Token(NUMBER, '-1.5', '-1.5', 16),
+                    Token(SYMBOL, 'and', 'AND', 21),
+                    Token(NAME, 'c', 'C', 25),
+                    Token(SYMBOL, '<>', '<>', 26),
+                    Token(STRING, "'x'", '"x"', 28),
+                    Token(SYMBOL, '}', '}', 31),
+                    Token(NAME, 'alpha', 'Alpha', 33),
+                    Token(SYMBOL, ';', ';', 38),
+                    Token(END, None, '', 39)]
+        actual = self.tokenize('\\select_{a.b <= -1.5 AND C<>"x"} Alpha;')
+        self.assertEqual(expected, actual)
+
+    def test_tokenize_when_keyword_is_caseless(self):
+        actual = self.tokenize('a \\JOIN b')
+        self.assertEqual(Token(SYMBOL, '\\join', '\\JOIN', 2), actual[1])
+
+    def test_tokenize_when_keyword_is_part_of_identifier(self):
+        actual = [token.kind for token in self.tokenize('android or_x nothing')]
+        self.assertEqual([NAME, NAME, NAME, END], actual)
+
+    def test_tokenize_when_keyword_touches_identifier(self):
+        self.assertRaises(ParseException, self.tokenize, 'a\\join b')
+        self.assertRaises(ParseException, self.tokenize, 'x:= a')
+
+    def test_tokenize_when_token_is_unknown(self):
+        with self.assertRaises(ParseException) as context:
+            self.tokenize('alpha  # beta')
+        self.assertEqual(7, context.exception.loc)
+
+    def test_tokenize_with_custom_syntax(self):
+        lexer = Lexer(Syntax(select_op='select', assign_op='<-',
+                             params_start='[', params_stop=']'))
+        actual = [(token.kind, token.value) for token in
+                  lexer.tokenize('x <- SELECT[a < -1] selection;')]
+        expected = [(NAME, 'x'), (SYMBOL, '<-'), (SYMBOL, 'select'),
+                    (SYMBOL, '['), (NAME, 'a'), (SYMBOL, '<'),
+                    (NUMBER, '-1'), (SYMBOL, ']'), (NAME, 'selection'),
+                    (SYMBOL, ';'), (END, None)]
+        self.assertEqual(expected, actual)
+
+    def test_pattern_is_shared_by_equal_syntax(self):
+        self.assertIs(Lexer(Syntax(and_op='&')).pattern,
+                      Lexer(Syntax(and_op='&')).pattern)
+
+    def test_statements_across_lines(self):
+        lines = ['alpha; \\project_{a}\n', 'beta;', " \\select_{a = ';'} gamma;\n"]
+        expected = ['alpha;', ' \\project_{a}\nbeta;',
+                    " \\select_{a = ';'} gamma;"]
+        self.assertEqual(expected, list(self.lexer.statements(lines)))
+
+    def test_statements_when_last_is_not_terminated(self):
+        expected = ['alpha;', ' beta']
+        self.assertEqual(expected, list(self.lexer.statements(['alpha; beta'])))
@@ -0,0 +1,86 @@
+from unittest import TestCase
+
+from pyparsing import ParserElement, ParseException, Word, alphas, quotedString
+
+from rapt.rapt import Rapt
+from rapt.treebrd.grammars import CoreGrammar
+from rapt.treebrd.grammars.condition_grammar import ConditionGrammar
+from rapt.treebrd.grammars.packrat import PackratCache
+
+
+class TestPackratCache(TestCase):
+    def setUp(self):
+        self.grammar = CoreGrammar()
+        self.instring = '\\select_{a = 1} (alpha \\join beta);'
+
+    def test_global_packrat_is_disabled(self):
+        self.assertFalse(ParserElement._packratEnabled)
+
+    def test_quoted_string_is_not_modified(self):
+        ConditionGrammar().parse_rule('conditions', '"x" = a')
+        self.assertEqual(['"x"'], quotedString.parseString('"x"').asList())
+
+    def test_parse_records_hits_and_misses(self):
+        cache = self.grammar.packrat('statements')
+        hits, misses = cache.hits, cache.misses
+        self.grammar.parse(self.instring)
+        self.assertGreater(cache.hits, hits)
+        self.assertGreater(cache.misses, misses)
+
+    def test_cache_is_cleared_after_parse(self):
+        self.grammar.parse(self.instring)
+        self.assertEqual(0, self.grammar.packrat('statements').stats['size'])
+
+    def test_cache_is_cleared_after_failed_parse(self):
+        self.assertRaises(ParseException, self.grammar.parse, 'alpha \\join;')
+        self.assertEqual(0, self.grammar.packrat('statements').stats['size'])
+
+    def test_cache_size_is_configurable(self):
+        grammar = CoreGrammar(packrat_cache_size=128)
+        self.assertEqual(128, grammar.packrat('statements').size)
+        self.assertEqual(grammar.parse(self.instring).asList(),
+                         self.grammar.parse(self.instring).asList())
+
+    def test_cache_size_zero_disables_memoization(self):
+        grammar = CoreGrammar(packrat_cache_size=0)
+        self.assertIsNone(grammar.packrat('statements'))
+        self.assertEqual(grammar.parse(self.instring).asList(),
+                         self.grammar.parse(self.instring).asList())
+
+    def test_grammars_of_equal_configuration_share_cache(self):
+        self.assertIs(self.grammar.packrat('statements'),
+                      CoreGrammar().packrat('statements'))
+        self.assertIsNot(self.grammar.packrat('statements'),
+                         CoreGrammar(packrat_cache_size=8).packrat(
+                             'statements'))
+
+    def test_rapt_configures_cache_size(self):
+        grammar = Rapt(packrat_cache_size=256).builder.grammar
+        self.assertEqual(256, grammar.packrat('statements').size)
+
+
+class TestPackratCacheBound(TestCase):
+    def test_oldest_results_are_evicted(self):
+        parser = Word(alphas)
+        cache = PackratCache(2)
+        cache.install(parser)
+        for instring in ['one', 'two', 'three']:
+            parser.parseString(instring)
+        self.assertEqual(2, cache.stats['size'])
+        self.assertEqual(3, cache.misses)
+
+    def test_repeated_parse_hits(self):
+        parser = Word(alphas)
+        cache = PackratCache()
+        cache.install(parser)
+        parser.parseString('one')
+        self.assertEqual(['one'], parser.parseString('one').asList())
+        self.assertEqual({'hits': 1, 'misses': 1, 'size': 1}, cache.stats)
+
+    def test_failures_are_memoized(self):
+        parser = Word(alphas)
+        cache = PackratCache()
+        cache.install(parser)
+        self.assertRaises(ParseException, parser.parseString, '42')
+        self.assertRaises(ParseException, parser.parseString, '42')
+        self.assertEqual(1, cache.hits)
@@ -0,0 +1,153 @@
+from unittest import TestCase
+
+from pyparsing import ParseException, ParseResults
+
+from rapt.treebrd.grammars import CoreGrammar, ExtendedGrammar
+from rapt.treebrd.grammars.precedence_parser import PrecedenceParser
+from rapt.treebrd.grammars.syntax import Syntax
+from tests.treebrd.grammars import test_extended_grammar
+from tests.treebrd.grammars.core_grammar import test_assignment, \
+    test_core_join, test_core_project, test_core_rename, test_core_select, \
+    test_core_union
+
+
+class PrecedenceStatements:
+    """
+    Stands in for the statements rule of a grammar, but parses with a
+    PrecedenceParser.
+    """
+
+    def __init__(self, grammar):
+        self.parser = PrecedenceParser(grammar)
+
+    def parseString(self, instring, parseAll=False):
+        return ParseResults(self.parser.parse(instring))
+
+
+class PrecedenceGrammar:
+    """
+    A grammar whose statements are parsed with a PrecedenceParser.
+    """
+
+    def __init__(self, grammar):
+        self.grammar = grammar
+        self.statements = PrecedenceStatements(grammar)
+
+    def __getattr__(self, name):
+        return getattr(self.grammar, name)
+
+
+class PrecedenceTestCase:
+    """
+    Runs a grammar test case against the PrecedenceParser.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.parser = PrecedenceGrammar(self.parser)
+        if hasattr(self, 'parse'):
+            self.parse = self.parse_function(self.parser.statements)
+
+
+class TestAssignment(PrecedenceTestCase, test_assignment.TestAssignment):
+    pass
+
+
+class TestJoin(PrecedenceTestCase, test_core_join.TestJoin):
+    pass
+
+
+class TestProject(PrecedenceTestCase, test_core_project.TestProject):
+    pass
+
+
+class TestRename(PrecedenceTestCase, test_core_rename.TestProject):
+    pass
+
+
+class TestSelect(PrecedenceTestCase, test_core_select.TestSelect):
+    pass
+
+
+class TestUnion(PrecedenceTestCase, test_core_union.TestUnion):
+    pass
+
+
+class TestIntersect(PrecedenceTestCase, test_extended_grammar.TestIntersect):
+    pass
+
+
+class TestNaturalJoin(PrecedenceTestCase,
+                      test_extended_grammar.TestNaturalJoin):
+    pass
+
+
+class TestThetaJoin(PrecedenceTestCase, test_extended_grammar.TestThetaJoin):
+    pass
+
+
+class TestPrecedenceParser(TestCase):
+    """
+    Compares the PrecedenceParser with the grammar it is built from.
+    """
+
+    def assertSameParse(self, grammar, instring):
+        try:
+            expected = grammar.parse(instring).asList()
+        except ParseException:
+            self.assertRaises(ParseException,
+                              PrecedenceParser(grammar).parse, instring)
+        else:
+            self.assertEqual(expected, PrecedenceParser(grammar).parse(instring))
+
+    def test_conditions(self):
+        conditions = [
+            'a = 1', '(a = 1)', '((a = 1))', 'not a = 1', 'not not a = 1',
+            'not (a = 1 and b = 2) or c = 3', 'a = 1 and not b = 2 and c = 3',
+            'not a = 1 and b = 2', '(a = 1) and ((b = 1) or c = 1)',
+            'r.a = "x\\"y" and b = \'q\'\'\'', 'a = -1.5 and b <= .5',
+            'not = 1', 'not not = 1', 'or_x = and', 'ab=1and c=2', 'a = ',
+            '(a = 1', 'a = 1)', 'a.b.c = 1']
+        for grammar in (CoreGrammar(), ExtendedGrammar()):
+            for condition in conditions:
+                self.assertSameParse(
+                    grammar, '\\select_{' + condition + '} alpha;')
+
+    def test_expressions(self):
+        expressions = [
+            'alpha;', '(alpha);', 'alpha; beta;', '', ';', 'alpha', '(alpha;',
+            'alpha);', 'and;', 'alpha\\join beta;', 'x:=alpha;',
+            '\\SELECT_{A=1} ALPHA \\JOIN beta;', '\\select _{a=1} alpha;',
+            '\\select_ {a=1} alpha;', '\\select_{a=1}alpha\\union beta;',
+            '\\project_{} alpha;', '\\rename_{x()} alpha;',
+            '\\rename_{x(a, b)} alpha;', '\\rename_{(a)} alpha;',
+            'alpha \\join_{a = 1} beta \\natural_join gamma \\union delta '
+            '\\intersect epsilon;',
+            'alpha \\difference (beta \\union gamma) \\union delta;',
+            '\\select_{a = 1 and (b = 2 or not (c = 3))} '
+            '(alpha \\union beta) \\join gamma;',
+            'x(a) := \\project_{a} alpha; y := x \\union x;']
+        for grammar in (CoreGrammar(), ExtendedGrammar()):
+            for expression in expressions:
+                self.assertSameParse(grammar, expression)
+
+    def test_custom_syntax(self):
+        syntax = Syntax(select_op='select', join_op='cross', and_op='also',
+                        assign_op='<-', params_start='[', params_stop=']')
+        self.assertSameParse(ExtendedGrammar(syntax),
+                             'x <- select[a = 1 also b < -2] alpha cross beta;')
+
+    def test_long_chain(self):
+        parser = PrecedenceParser(CoreGrammar())
+        relations = ['r{}'.format(i) for i in range(5000)]
+        actual = parser.parse(' \\join '.join(relations) + ';')
+        self.assertEqual(len(relations) * 2 - 1, len(actual[0]))
+
+    def test_deep_nesting(self):
+        parser = PrecedenceParser(CoreGrammar())
+        depth = 5000
+        actual = parser.parse('\\select_{a = 1} (' * depth + 'r' +
+                              ')' * depth + ';')[0]
+        for _ in range(depth):
+            actual = actual[2]
+        self.assertEqual(['r'], actual)
@@ -8,4 +8,15 @@ class TestSyntax(TestCase):
         self.assertEqual(new_op, Syntax(and_op=new_op).and_op)
 
     def test___init__cannot_set_unknown_attributes(self):
-        self.assertFalse(hasattr(Syntax(foo='bar'), 'foo'))
\ No newline at end of file
+        self.assertFalse(hasattr(Syntax(foo='bar'), 'foo'))
+
+    def test___eq__when_tokens_are_equal(self):
+        self.assertEqual(Syntax(and_op='&'), Syntax(and_op='&'))
+        self.assertEqual(hash(Syntax(and_op='&')), hash(Syntax(and_op='&')))
+
+    def test___eq__when_tokens_differ(self):
+        self.assertNotEqual(Syntax(), Syntax(and_op='&'))
+
+    def test___setattr__is_not_allowed(self):
+        syntax = Syntax()
+        self.assertRaises(AttributeError, setattr, syntax, 'and_op', '&')
@@ -1,5 +1,7 @@
+import copy
 from unittest import TestCase
 from rapt.treebrd.attributes import Attribute, AttributeList
+from rapt.treebrd.errors import AttributeReferenceError
 
 __author__ = 'Noel'
 
@@ -43,6 +45,21 @@ class TestAttribute(TestCase):
         self.assertEqual(hash(attribute_a), hash(attribute_b))
 
 
+    def test_prefixed_without_prefix(self):
+        self.assertEqual('Name', Attribute('Name', None).prefixed)
+
+    def test_names_are_interned(self):
+        attribute_a = Attribute(''.join(['Na', 'me']), 'Prefix')
+        attribute_b = Attribute('Name', ''.join(['Pre', 'fix']))
+        self.assertIs(attribute_a.name, attribute_b.name)
+        self.assertIs(attribute_a.prefixed, attribute_b.prefixed)
+
+    def test_copy(self):
+        attribute = Attribute('Name', 'Prefix')
+        self.assertEqual(attribute, copy.copy(attribute))
+        self.assertEqual(attribute, copy.deepcopy(attribute))
+
+
 class TestAttributeList(TestCase):
     def test_trim_when_restriction_is_empty(self):
         a_list = AttributeList(['A', 'B', 'C'], 'prefix')
@@ -126,3 +143,61 @@ class TestAttributeList(TestCase):
         a_list = AttributeList(['a', 'b', 'c'], 'old')
         a_list.rename(['A', 'B', 'C'], 'prefix')
         self.assertEqual(expected, a_list.to_list())
+
+
+class TestAttributeListLookup(TestCase):
+    def test_get_attribute_by_name(self):
+        a_list = AttributeList(['A', 'B'], 'prefix')
+        self.assertEqual(Attribute('B', 'prefix'), a_list.get_attribute('B'))
+
+    def test_get_attribute_by_prefixed_name(self):
+        a_list = AttributeList.merge(AttributeList(['A'], 'first'),
+                                     AttributeList(['A'], 'second'))
+        self.assertEqual(Attribute('A', 'second'),
+                         a_list.get_attribute('second.A'))
+
+    def test_exception_when_reference_is_ambiguous(self):
+        a_list = AttributeList.merge(AttributeList(['A'], 'first'),
+                                     AttributeList(['A'], 'second'))
+        self.assertRaises(AttributeReferenceError, a_list.get_attribute, 'A')
+
+    def test_exception_when_prefix_does_not_match(self):
+        a_list = AttributeList(['A'], None)
+        self.assertRaises(AttributeReferenceError, a_list.get_attribute,
+                          'prefix.A')
+
+    def test_lookup_after_extend(self):
+        a_list = AttributeList(['A'], 'prefix')
+        a_list.get_attribute('A')
+        a_list.extend(['B'], 'other')
+        self.assertEqual(Attribute('B', 'other'),
+                         a_list.get_attribute('other.B'))
+
+    def test_lookup_after_trim(self):
+        a_list = AttributeList(['A', 'B'], 'prefix')
+        a_list.get_attribute('A')
+        a_list.trim(['B'])
+        self.assertRaises(AttributeReferenceError, a_list.get_attribute, 'A')
+        self.assertEqual(Attribute('B', 'prefix'), a_list.get_attribute('B'))
+
+    def test_lookup_after_rename(self):
+        a_list = AttributeList(['A', 'B'], 'old')
+        a_list.get_attribute('old.A')
+        a_list.rename(['C', 'D'], 'new')
+        self.assertRaises(AttributeReferenceError, a_list.get_attribute,
+                          'old.A')
+        self.assertEqual(Attribute('C', 'new'), a_list.get_attribute('new.C'))
+
+    def test_copy_keeps_its_own_lookups(self):
+        a_list = AttributeList(['A', 'B'], 'prefix')
+        a_list.get_attribute('A')
+        other = copy.copy(a_list)
+        other.trim(['B'])
+        self.assertEqual(Attribute('A', 'prefix'), a_list.get_attribute('A'))
+        self.assertRaises(AttributeReferenceError, other.get_attribute, 'A')
+
+    def test_trim_wide_list(self):
+        names = ['c{}'.format(i) for i in range(5000)]
+        a_list = AttributeList(names, 'wide')
+        a_list.trim(list(reversed(names)))
+        self.assertEqual(list(reversed(names)), a_list.names)
@@ -0,0 +1,118 @@
+import os
+import tempfile
+from unittest import TestCase, mock
+
+from rapt.rapt import Rapt
+from rapt.treebrd.catalog import CsvCatalog, JsonCatalog
+from rapt.treebrd.errors import InputError, RelationReferenceError
+from rapt.treebrd.schema import Schema
+
+
+class CatalogTestCase(TestCase):
+    catalog_class = None
+    contents = ''
+
+    def setUp(self):
+        self.catalog = self.open(self.contents)
+
+    def tearDown(self):
+        self.catalog.close()
+
+    def open(self, contents):
+        handle, path = tempfile.mkstemp()
+        self.addCleanup(os.remove, path)
+        with os.fdopen(handle, 'w', encoding='utf-8') as catalog_file:
+            catalog_file.write(contents)
+        return self.catalog_class(path)
+
+
+class TestJsonCatalog(CatalogTestCase):
+    catalog_class = JsonCatalog
+    contents = '{"Alpha": ["A1", "a2"],\n "beta": ["b1"], "gamma\\"s": []}'
+
+    def test_get_attributes(self):
+        self.assertEqual(['a1', 'a2'], self.catalog.get_attributes('alpha'))
+
+    def test_contains(self):
+        self.assertTrue(self.catalog.contains('beta'))
+        self.assertFalse(self.catalog.contains('delta'))
+
+    def test_names(self):
+        self.assertEqual({'alpha', 'beta', 'gamma"s'},
+                         set(self.catalog.names()))
+
+    def test_to_dict(self):
+        self.assertEqual({'alpha': ['a1', 'a2'], 'beta': ['b1'],
+                          'gamma"s': []}, self.catalog.to_dict())
+
+    def test_exception_when_missing(self):
+        self.assertRaises(RelationReferenceError,
+                          self.catalog.get_attributes, 'delta')
+
+    def test_only_looked_up_definitions_are_decoded(self):
+        with mock.patch.object(JsonCatalog, '_decode',
+                               wraps=self.catalog._decode) as decode:
+            self.catalog.get_attributes('beta')
+            self.catalog.get_attributes('beta')
+        decode.assert_called_once_with(b'["b1"]')
+
+    def test_empty_object(self):
+        with self.open(' { } ') as catalog:
+            self.assertEqual({}, catalog.to_dict())
+
+    def test_exception_when_invalid(self):
+        for contents in ['', '[]', '{"alpha": ["a1"],}', '{"alpha": 1}',
+                         '{"alpha": ["a1"] "beta": []}']:
+            self.assertRaises(InputError, self.open, contents)
+
+    def test_exception_when_definition_is_invalid(self):
+        with self.open('{"alpha": [1], "beta": ["b1" "b2"]}') as catalog:
+            self.assertRaises(InputError, catalog.get_attributes, 'alpha')
+            self.assertRaises(InputError, catalog.get_attributes, 'beta')
+
+
+class TestCsvCatalog(CatalogTestCase):
+    catalog_class = CsvCatalog
+    contents = 'Alpha, A1, a2\r\n\n"beta",b1\ngamma'
+
+    def test_get_attributes(self):
+        self.assertEqual(['a1', 'a2'], self.catalog.get_attributes('alpha'))
+        self.assertEqual(['b1'], self.catalog.get_attributes('beta'))
+
+    def test_to_dict(self):
+        self.assertEqual({'alpha': ['a1', 'a2'], 'beta': ['b1'],
+                          'gamma': []}, self.catalog.to_dict())
+
+    def test_empty_file(self):
+        with self.open('') as catalog:
+            self.assertEqual({}, catalog.to_dict())
+
+
+class TestCatalogOverlay(CatalogTestCase):
+    catalog_class = JsonCatalog
+    contents = '{"alpha": ["a1", "a2"], "beta": ["b1"]}'
+
+    def test_overlay_does_not_change_catalog(self):
+        schema = self.catalog.overlay()
+        schema.add('x', ['a1'])
+        self.assertTrue(schema.contains('alpha'))
+        self.assertFalse(self.catalog.contains('x'))
+
+    def test_translation_equals_schema_translation(self):
+        instring = 'x := \\project_{a1} alpha; x \\join beta;'
+        definition = {'alpha': ['a1', 'a2'], 'beta': ['b1']}
+        self.assertEqual(Rapt().to_sql(instring, Schema(definition)),
+                         Rapt().to_sql(instring, self.catalog))
+
+
+class TestCatalogFingerprint(CatalogTestCase):
+    catalog_class = JsonCatalog
+    contents = '{"alpha": ["a1", "a2"]}'
+
+    def test_equal_files_have_equal_fingerprints(self):
+        with self.open(self.contents) as catalog:
+            self.assertEqual(self.catalog.fingerprint, catalog.fingerprint)
+
+    def test_different_files_have_different_fingerprints(self):
+        with self.open('{"alpha": ["a1"]}') as catalog:
+            self.assertNotEqual(self.catalog.fingerprint, catalog.fingerprint)
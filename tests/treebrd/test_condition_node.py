@@ -0,0 +1,97 @@
+from unittest import TestCase
+
+from rapt.treebrd.condition_node import IdentityConditionNode, \
+    UnaryConditionNode, ParenthesizedConditionNode, BinaryConditionNode
+from rapt.treebrd.grammars.condition_grammar import ConditionGrammar, \
+    get_condition_tree
+from rapt.treebrd.grammars.syntax import Syntax
+
+
+class TestConditionTree(TestCase):
+    def test_comparison(self):
+        expected = BinaryConditionNode('=', IdentityConditionNode('a'),
+                                       IdentityConditionNode('42'))
+        self.assertEqual(expected, get_condition_tree('a = 42'))
+
+    def test_logical_operators_group_to_the_left(self):
+        first = BinaryConditionNode('=', IdentityConditionNode('a'),
+                                    IdentityConditionNode('1'))
+        second = BinaryConditionNode('<', IdentityConditionNode('b'),
+                                     IdentityConditionNode('2'))
+        third = BinaryConditionNode('>', IdentityConditionNode('c'),
+                                    IdentityConditionNode('3'))
+        expected = BinaryConditionNode(
+            'or', BinaryConditionNode('and', first, second), third)
+        self.assertEqual(expected,
+                         get_condition_tree('a = 1 and b < 2 or c > 3'))
+
+    def test_not_and_parentheses(self):
+        comparison = BinaryConditionNode('=', IdentityConditionNode('a'),
+                                         IdentityConditionNode("'x'"))
+        expected = UnaryConditionNode(
+            'not', ParenthesizedConditionNode(comparison))
+        self.assertEqual(expected, get_condition_tree('not (a = "x")'))
+
+    def test_attribute_named_like_operator(self):
+        syntax = Syntax(not_op='neg')
+        tokens = ['neg', '=', '1']
+        expected = BinaryConditionNode('=', IdentityConditionNode('neg'),
+                                       IdentityConditionNode('1'))
+        self.assertEqual(expected,
+                         ConditionGrammar(syntax).condition_tree(tokens))
+
+    def test_deeply_nested_parentheses(self):
+        depth = 5000
+        tokens = ['('] * depth + ['a', '=', '1'] + [')'] * depth
+        tree = ConditionGrammar().condition_tree(tokens)
+        self.assertEqual(' '.join(tokens), str(tree))
+        self.assertIsInstance(tree, ParenthesizedConditionNode)
+
+    def test_deeply_nested_not(self):
+        depth = 5000
+        tokens = ['a', '=', '1']
+        for _ in range(depth):
+            tokens = ['not', tokens]
+        tree = ConditionGrammar().condition_tree([tokens])
+        self.assertEqual('not ' * depth + 'a = 1', str(tree))
+
+    def test_deep_trees_are_equal(self):
+        instring = ' and '.join(['not (a = 1)'] * 5000)
+        tokens = [instring.replace('(', '( ').replace(')', ' )').split()]
+        first = ConditionGrammar().condition_tree(tokens)
+        second = ConditionGrammar().condition_tree(tokens)
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+
+    def test_inequality(self):
+        self.assertNotEqual(get_condition_tree('a = 1'),
+                            get_condition_tree('(a = 1)'))
+        self.assertNotEqual(get_condition_tree('a = 1'), 'a = 1')
+        self.assertNotEqual(get_condition_tree('a = 1 and b = 2'),
+                            get_condition_tree('a = 1 or b = 2'))
+
+
+class TestConditionString(TestCase):
+    def test_tokens_are_separated_by_spaces(self):
+        tree = get_condition_tree('not(a.b=1)or "x"<>c')
+        self.assertEqual("not ( a.b = 1 ) or 'x' <> c", str(tree))
+
+    def test_custom_syntax(self):
+        syntax = Syntax(and_op='also', equal_op='eq')
+        tree = get_condition_tree('a eq 1 also b eq a', syntax)
+        self.assertEqual('a eq 1 also b eq a', str(tree))
+
+    def test_long_chain(self):
+        instring = ' and '.join(['a = 1'] * 5000)
+        tokens = [instring.split()]
+        tree = ConditionGrammar().condition_tree(tokens)
+        self.assertEqual(instring, str(tree))
+
+
+class TestConditionReferences(TestCase):
+    def test_references_in_order(self):
+        tree = get_condition_tree('not (a = b) or 1 < c and "d" = 2')
+        self.assertEqual(['a', 'b', 'c'], tree.references)
+
+    def test_no_references(self):
+        self.assertEqual([], get_condition_tree('1 = 1').references)
@@ -0,0 +1,197 @@
+from unittest import TestCase
+
+from rapt.rapt import Rapt
+from rapt.treebrd.estimator import Estimator, DEFAULT_ROWS, \
+    DEFAULT_SELECTIVITY, EQUALITY_SELECTIVITY
+from rapt.treebrd.grammars import ExtendedGrammar
+from rapt.treebrd.schema import Schema
+from rapt.treebrd.treebrd import TreeBRD
+
+
+class EstimatorTestCase(TestCase):
+    def setUp(self):
+        self.schema = Schema(
+            {'alpha': ['a1', 'a2'], 'beta': ['b1', 'a1'],
+             'gamma': ['g1', 'g2']},
+            statistics={
+                'alpha': {'rows': 100, 'distinct': {'a1': 10, 'a2': 100}},
+                'beta': {'rows': 1000, 'distinct': {'a1': 50, 'b1': 1000}}})
+        self.builder = TreeBRD(ExtendedGrammar())
+
+    def estimate(self, instring):
+        root = self.builder.build(instring, self.schema)[0]
+        return Estimator(self.schema).estimate(root)
+
+    def assertRows(self, expected, instring):
+        self.assertAlmostEqual(expected, self.estimate(instring).rows)
+
+
+class TestRelation(EstimatorTestCase):
+    def test_rows(self):
+        self.assertRows(100, 'alpha;')
+
+    def test_default_rows(self):
+        self.assertRows(DEFAULT_ROWS, 'gamma;')
+
+    def test_distinct(self):
+        estimate = self.estimate('alpha;')
+        self.assertEqual([10, 100], sorted(estimate.distinct.values()))
+
+    def test_without_catalog(self):
+        root = self.builder.build('alpha;', self.schema)[0]
+        self.assertEqual(DEFAULT_ROWS, Estimator().estimate(root).rows)
+
+
+class TestSelect(EstimatorTestCase):
+    def test_equality_with_constant(self):
+        self.assertRows(10, '\\select_{a1 = 1} alpha;')
+
+    def test_equality_without_distinct_count(self):
+        self.assertRows(DEFAULT_ROWS * EQUALITY_SELECTIVITY,
+                        '\\select_{g1 = 1} gamma;')
+
+    def test_inequality(self):
+        self.assertRows(90, '\\select_{a1 != 1} alpha;')
+
+    def test_range(self):
+        self.assertRows(100 * DEFAULT_SELECTIVITY, '\\select_{a1 < 1} alpha;')
+
+    def test_conjunction(self):
+        self.assertRows(0.1, '\\select_{a1 = 1 and a2 = 1} alpha;')
+
+    def test_disjunction(self):
+        self.assertRows(100 * (0.1 + 0.01 - 0.001),
+                        '\\select_{a1 = 1 or a2 = 1} alpha;')
+
+    def test_negation(self):
+        self.assertRows(90, '\\select_{not (a1 = 1)} alpha;')
+
+    def test_equality_with_constant_leaves_one_value(self):
+        self.assertRows(1, '\\project_{a1} \\select_{a1 = 1} alpha;')
+
+
+class TestProject(EstimatorTestCase):
+    def test_distinct_values(self):
+        self.assertRows(10, '\\project_{a1} alpha;')
+
+    def test_unknown_distinct_values(self):
+        self.assertRows(DEFAULT_ROWS, '\\project_{g1} gamma;')
+
+
+class TestJoin(EstimatorTestCase):
+    def test_cross_join(self):
+        self.assertRows(100000, 'alpha \\join beta;')
+
+    def test_theta_join(self):
+        self.assertRows(2000,
+                        'alpha \\theta_join_{alpha.a1 = beta.a1} beta;')
+
+    def test_natural_join(self):
+        self.assertRows(2000, 'alpha \\natural_join beta;')
+
+    def test_natural_join_distinct(self):
+        estimate = self.estimate('alpha \\natural_join beta;')
+        self.assertEqual(3, len(estimate.distinct))
+
+    def test_natural_join_with_repeated_name(self):
+        definition = {'alpha': ['a1', 'a2'], 'gamma': ['a1', 'c1']}
+        instring = 'alpha \\natural_join (gamma \\join \\rename_{g2} gamma);'
+        root = self.builder.build(instring, definition)[0]
+        estimate = Estimator(Schema(definition)).estimate(root)
+        self.assertAlmostEqual(DEFAULT_ROWS ** 3 * EQUALITY_SELECTIVITY,
+                               estimate.rows)
+
+
+class TestSetOperators(EstimatorTestCase):
+    def test_union(self):
+        self.assertRows(200, 'alpha \\union alpha;')
+
+    def test_intersect(self):
+        self.assertRows(10, '\\project_{a1} beta \\intersect '
+                            '\\project_{a1} alpha;')
+
+    def test_difference(self):
+        self.assertRows(100, 'alpha \\difference alpha;')
+
+    def test_rename(self):
+        estimate = self.estimate('\\rename_{r(x, y)} alpha;')
+        self.assertEqual(100, estimate.rows)
+        self.assertEqual(['x', 'y'], sorted(
+            attribute.name for attribute in estimate.distinct))
+
+
+class TestCost(EstimatorTestCase):
+    def work(self, instring):
+        root = self.builder.build(instring, self.schema)[0]
+        return Estimator(self.schema).work(root)
+
+    def test_relation(self):
+        self.assertEqual(100, self.work('alpha;'))
+
+    def test_select(self):
+        self.assertEqual(100, self.work('\\select_{a1 = 1} alpha;'))
+
+    def test_cross_join(self):
+        self.assertEqual(100000, self.work('alpha \\join beta;'))
+
+    def test_equi_join(self):
+        self.assertAlmostEqual(
+            100 + 1000 + 2000,
+            self.work('alpha \\theta_join_{alpha.a1 = beta.a1} beta;'))
+
+    def test_natural_join(self):
+        self.assertAlmostEqual(100 + 1000 + 2000,
+                               self.work('alpha \\natural_join beta;'))
+
+    def test_range_join(self):
+        self.assertEqual(100000,
+                         self.work('alpha \\theta_join_{a2 < b1} beta;'))
+
+    def test_cost(self):
+        root = self.builder.build('\\select_{a1 = 1} alpha;',
+                                  self.schema)[0]
+        self.assertEqual(200, Estimator(self.schema).cost(root))
+
+    def test_plan(self):
+        root = self.builder.build('alpha \\join \\select_{b1 = 1} beta;',
+                                  self.schema)[0]
+        plan = Estimator(self.schema).plan(root)
+        self.assertEqual([0, 1, 1, 2], [step.depth for step in plan])
+        self.assertEqual([root, root.left, root.right, root.right.child],
+                         [step.node for step in plan])
+        self.assertEqual(sum(step.work for step in plan), plan[0].cost)
+
+    def test_explain(self):
+        root = self.builder.build('\\select_{a1 = 1} alpha;',
+                                  self.schema)[0]
+        expected = ('select a1 = 1 (rows=10, work=100, cost=200)\n'
+                    '  relation alpha (rows=100, work=100, cost=100)')
+        self.assertEqual(expected, Estimator(self.schema).explain(root))
+
+
+class TestRaptExplain(EstimatorTestCase):
+    def test_explain(self):
+        rapt = Rapt(grammar='Extended Grammar')
+        expected = ['project alpha.a1 (rows=10, work=100, cost=200)\n'
+                    '  relation alpha (rows=100, work=100, cost=100)',
+                    'relation beta (rows=1,000, work=1,000, cost=1,000)']
+        self.assertEqual(expected, rapt.explain(
+            '\\project_{a1} alpha; beta;', self.schema))
+
+    def test_explain_optimized_plan(self):
+        rapt = Rapt(grammar='Extended Grammar', optimize=True)
+        plan = rapt.explain('\\select_{b1 = 1} (alpha \\join beta);',
+                            self.schema)[0]
+        self.assertTrue(plan.startswith('cross join'))
+
+    def test_explain_natural_join_with_repeated_name(self):
+        rapt = Rapt(grammar='Extended Grammar')
+        plan = rapt.explain(
+            'alpha \\natural_join (gamma \\join \\rename_{g2} gamma);',
+            {'alpha': ['a1', 'a2'], 'gamma': ['a1', 'c1']})[0]
+        self.assertTrue(plan.startswith('natural join'))
+
+    def test_estimate_cost(self):
+        rapt = Rapt(grammar='Extended Grammar')
+        self.assertEqual([200, 1000], rapt.estimate_cost(
+            '\\project_{a1} alpha; beta;', self.schema))
@@ -2,7 +2,8 @@ import logging
 from unittest import TestCase
 
 from rapt.treebrd.errors import RelationReferenceError
-from rapt.treebrd.node import Node, Operator, RelationNode
+from rapt.treebrd.node import Node, Operator, RelationNode, SelectNode, \
+    CrossJoinNode, ProjectNode
 from rapt.treebrd.attributes import AttributeList
 from rapt.treebrd.schema import Schema
 
@@ -21,7 +22,7 @@ class NodeTestCase(TestCase):
             'twin': ['t1', 't2', 't3'],
             'twin_prime': ['t1', 't2', 't3'],
             'ambiguous': ['d1', 'd1']
-        })
+        }).overlay()
         self.alpha = RelationNode('alpha', self.schema)
         self.beta = RelationNode('beta', self.schema)
         self.gamma = RelationNode('gamma', self.schema)
@@ -91,4 +92,80 @@ class TestRelationNode(NodeTestCase):
         expected = AttributeList(self.schema.get_attributes('alpha'),
                                  'alpha').to_list()
         node = RelationNode('alpha', self.schema)
-        self.assertEqual(expected, node.attributes.to_list())
\ No newline at end of file
+        self.assertEqual(expected, node.attributes.to_list())
+
+
+class TestTraversal(NodeTestCase):
+    def setUp(self):
+        super().setUp()
+        self.select = SelectNode(self.alpha, 'a1 = 1')
+        self.join = CrossJoinNode(self.select, self.beta)
+        self.root = ProjectNode(self.join, ['a1', 'b1'])
+
+    def test_post_order(self):
+        expected = [self.alpha, self.select, self.beta, self.join, self.root]
+        self.assertEqual(expected, self.root.post_order())
+
+    def test_iter_post_order_is_lazy(self):
+        nodes = self.root.iter_post_order()
+        self.assertIs(self.alpha, next(nodes))
+        self.assertEqual([self.select, self.beta, self.join, self.root],
+                         list(nodes))
+
+    def test_iter_pre_order(self):
+        expected = [self.root, self.join, self.select, self.alpha, self.beta]
+        self.assertEqual(expected, list(self.root.iter_pre_order()))
+
+    def test_traversal_of_relation(self):
+        self.assertEqual([self.alpha], list(self.alpha.iter_post_order()))
+        self.assertEqual([self.alpha], list(self.alpha.iter_pre_order()))
+
+    def test_traversal_of_deep_tree(self):
+        node = self.alpha
+        for _ in range(10000):
+            node = ProjectNode(node, ['a1'])
+        self.assertEqual(10001, sum(1 for _ in node.iter_post_order()))
+        self.assertIs(self.alpha, list(node.iter_pre_order())[-1])
+
+
+class TestStructuralHash(NodeTestCase):
+    def test_equal_trees_have_equal_hashes(self):
+        first = ProjectNode(SelectNode(self.alpha, 'a1 = 1'), ['a1'])
+        second = ProjectNode(SelectNode(RelationNode('alpha', self.schema),
+                                        'a1 = 1'), ['a1'])
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+
+    def test_unequal_conditions(self):
+        self.assertNotEqual(SelectNode(self.alpha, 'a1 = 1'),
+                            SelectNode(self.alpha, 'a1 = 2'))
+
+    def test_nodes_can_be_dictionary_keys(self):
+        counts = {}
+        for _ in range(3):
+            node = CrossJoinNode(RelationNode('alpha', self.schema),
+                                 self.beta)
+            counts[node] = counts.get(node, 0) + 1
+        self.assertEqual([3], list(counts.values()))
+
+    def test_hash_and_equality_of_deep_trees(self):
+        first, second = self.alpha, RelationNode('alpha', self.schema)
+        for _ in range(10000):
+            first = ProjectNode(first, ['a1'])
+            second = ProjectNode(second, ['a1'])
+        self.assertEqual(hash(first), hash(second))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, ProjectNode(self.alpha, ['a1']))
+
+
+class TestCompactNodes(NodeTestCase):
+    def test_nodes_have_no_instance_dictionary(self):
+        select = SelectNode(self.alpha, 'a1 = 1')
+        nodes = [self.alpha, select, ProjectNode(select, ['a1']),
+                 CrossJoinNode(select, self.beta)]
+        for node in nodes:
+            self.assertFalse(hasattr(node, '__dict__'), type(node).__name__)
+
+    def test_names_are_interned(self):
+        other = RelationNode(''.join(['al', 'pha']), self.schema)
+        self.assertIs(self.alpha.name, other.name)
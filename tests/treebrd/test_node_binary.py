@@ -173,22 +173,22 @@ class TestCrossNode(BinaryTestCase):
     def test_condition_when_init_has_condition(self):
         condition = 'a1 = b1'
         actual = ThetaJoinNode(self.alpha, self.beta, condition).conditions
-        self.assertEqual(condition, actual)
+        self.assertEqual('a1 = b1', str(actual))
 
     def test_condition_when_multiple_conditions(self):
         condition = 'a1>41 and b1<43'
         actual = ThetaJoinNode(self.alpha, self.beta, condition).conditions
-        self.assertEqual(condition, actual)
+        self.assertEqual('a1 > 41 and b1 < 43', str(actual))
 
     def test_condition_when_with_prefix(self):
         condition = 'alpha.a1>41'
         actual = ThetaJoinNode(self.alpha, self.beta, condition).conditions
-        self.assertEqual(condition, actual)
+        self.assertEqual('alpha.a1 > 41', str(actual))
 
     def test_condition_when_multiple_conditions_with_prefix(self):
         condition = 'alpha.a1>41 and beta.b1<43'
         actual = ThetaJoinNode(self.alpha, self.beta, condition).conditions
-        self.assertEqual(condition, actual)
+        self.assertEqual('alpha.a1 > 41 and beta.b1 < 43', str(actual))
 
     def test_exception_when_first_attribute_in_condition_is_wrong(self):
         self.assertRaises(AttributeReferenceError, ThetaJoinNode, self.alpha,
@@ -88,24 +88,21 @@ class TestSelect(UnaryTestCase):
         self.assertEqual(Operator.select, actual)
 
     def test_condition_when_init_has_condition(self):
-        condition = 'a1=42'
-        actual = SelectNode(self.alpha, condition).conditions
-        self.assertEqual(condition, actual)
+        actual = SelectNode(self.alpha, 'a1=42').conditions
+        self.assertEqual('a1 = 42', str(actual))
 
     def test_condition_when_multiple_conditions(self):
-        condition = 'a1>41 and a1<43'
-        node = SelectNode(self.alpha, condition)
-        self.assertEqual(condition, node.conditions)
+        node = SelectNode(self.alpha, 'a1>41 and a1<43')
+        self.assertEqual('a1 > 41 and a1 < 43', str(node.conditions))
 
     def test_condition_when_with_prefix(self):
-        condition = 'alpha.a1>41'
-        node = SelectNode(self.alpha, condition)
-        self.assertEqual(condition, node.conditions)
+        node = SelectNode(self.alpha, 'alpha.a1>41')
+        self.assertEqual('alpha.a1 > 41', str(node.conditions))
 
     def test_condition_when_multiple_conditions_with_prefix(self):
-        condition = 'alpha.a1>41 and alpha.a1<43'
-        node = SelectNode(self.alpha, condition)
-        self.assertEqual(condition, node.conditions)
+        node = SelectNode(self.alpha, 'alpha.a1>41 and alpha.a1<43')
+        self.assertEqual('alpha.a1 > 41 and alpha.a1 < 43',
+                         str(node.conditions))
 
     def test_exception_when_first_attribute_in_condition_is_wrong(self):
         self.assertRaises(AttributeReferenceError, SelectNode, self.alpha,
@@ -290,3 +287,27 @@ class TestAssignment(TestUnaryNode):
     def test_exception_when_name_conflicts(self):
         self.assertRaises(InputError, RenameNode, self.beta,
                           'alpha', ['a', 'b'], self.schema)
+
+
+class TestSharedAttributes(UnaryTestCase):
+    def test_select_shares_attributes_of_child(self):
+        node = SelectNode(self.gamma, 'c1 = 1')
+        self.assertIs(self.gamma.attributes, node.attributes)
+
+    def test_project_does_not_change_child(self):
+        expected = self.gamma.attributes.to_list()
+        node = ProjectNode(SelectNode(self.gamma, 'c1 = 1'), ['c2'])
+        self.assertEqual(['gamma.c2'], node.attributes.to_list())
+        self.assertEqual(expected, self.gamma.attributes.to_list())
+
+    def test_rename_does_not_change_child(self):
+        expected = self.gamma.attributes.to_list()
+        node = RenameNode(self.gamma, 'other', ['x', 'y', 'z'], self.schema)
+        self.assertEqual(['other.x', 'other.y', 'other.z'],
+                         node.attributes.to_list())
+        self.assertEqual(expected, self.gamma.attributes.to_list())
+
+    def test_assign_does_not_change_child(self):
+        expected = self.gamma.attributes.to_list()
+        AssignNode(self.gamma, 'other', ['x', 'y', 'z'], self.schema)
+        self.assertEqual(expected, self.gamma.attributes.to_list())
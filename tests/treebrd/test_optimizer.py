@@ -0,0 +1,358 @@
+from unittest import TestCase
+
+from rapt.rapt import Rapt
+from rapt.transformers.sql import sql_translator
+from rapt.treebrd.grammars import ExtendedGrammar, PrecedenceParser
+from rapt.treebrd.node import SelectNode, RelationNode
+from rapt.treebrd.optimizer import Optimizer, optimize, \
+    DYNAMIC_PROGRAMMING_LIMIT
+from rapt.treebrd.schema import Schema
+from rapt.treebrd.treebrd import TreeBRD
+
+
+class OptimizerTestCase(TestCase):
+    def setUp(self):
+        self.schema = {'alpha': ['a1', 'a2', 'a3'],
+                       'beta': ['b1', 'b2'],
+                       'gamma': ['g1', 'g2']}
+        self.builder = TreeBRD(ExtendedGrammar())
+
+    def build(self, instring):
+        return self.builder.build(instring, self.schema)[0]
+
+    def sql(self, root):
+        return sql_translator.translate([root])[0]
+
+
+class TestPushSelections(OptimizerTestCase):
+    def push(self, instring):
+        return Optimizer().push_selections(self.build(instring))
+
+    def test_conjuncts_pushed_into_join_sides(self):
+        actual = self.push(
+            '\\select_{a1 = 1 and b1 = 2} (alpha \\join beta);')
+        expected = self.build(
+            '(\\select_{a1 = 1} alpha) \\join (\\select_{b1 = 2} beta);')
+        self.assertEqual(expected, actual)
+
+    def test_parenthesized_conjunction_is_split(self):
+        actual = self.push(
+            '\\select_{(a1 = 1 and b1 = 2)} (alpha \\join beta);')
+        expected = self.build(
+            '(\\select_{a1 = 1} alpha) \\join (\\select_{b1 = 2} beta);')
+        self.assertEqual(expected, actual)
+
+    def test_disjunction_is_not_split(self):
+        instring = '\\select_{a1 = 1 or b1 = 2} (alpha \\join beta);'
+        self.assertEqual(self.build(instring), self.push(instring))
+
+    def test_mixed_chain_is_not_split(self):
+        instring = ('\\select_{a1 = 1 and b1 = 2 or a2 = 3} '
+                    '(alpha \\join beta);')
+        self.assertEqual(self.build(instring), self.push(instring))
+
+    def test_condition_on_both_sides_stays_above_join(self):
+        instring = '\\select_{a1 = b1} (alpha \\join beta);'
+        self.assertEqual(self.build(instring), self.push(instring))
+
+    def test_condition_on_both_sides_stays_above_outer_join(self):
+        actual = self.push(
+            '\\select_{a1 = b1 and g1 = 3} (alpha \\join beta \\join gamma);')
+        expected = self.build(
+            '\\select_{a1 = b1} (alpha \\join beta \\join '
+            '\\select_{g1 = 3} gamma);')
+        self.assertEqual(expected, actual)
+
+    def test_conditions_of_consecutive_selects(self):
+        actual = self.push(
+            '\\select_{b1 = 2} \\select_{a1 = 1} (alpha \\join beta);')
+        expected = self.build(
+            '(\\select_{a1 = 1} alpha) \\join (\\select_{b1 = 2} beta);')
+        self.assertEqual(expected, actual)
+
+    def test_pushed_through_projection(self):
+        actual = self.push(
+            '\\select_{a1 = 1} \\project_{a1, b1} (alpha \\join beta);')
+        expected = self.build(
+            '\\project_{a1, b1} ((\\select_{a1 = 1} alpha) \\join beta);')
+        self.assertEqual(expected, actual)
+
+    def test_not_pushed_through_set_operation(self):
+        instring = '\\select_{a1 = 1} (alpha \\union alpha);'
+        self.assertEqual(self.build(instring), self.push(instring))
+
+    def test_select_without_join_is_unchanged(self):
+        root = self.build('\\select_{a1 = 1 and a2 = 2} alpha;')
+        self.assertIs(root, Optimizer().push_selections(root))
+
+    def test_tree_is_not_modified(self):
+        instring = '\\select_{a1 = 1 and b1 = 2} (alpha \\join beta);'
+        root = self.build(instring)
+        before = self.sql(root)
+        Optimizer().push_selections(root)
+        self.assertEqual(before, self.sql(root))
+
+    def test_shared_subtrees(self):
+        builder = TreeBRD(ExtendedGrammar(), intern=True)
+        root = builder.build(
+            '\\select_{a1 = 1} (alpha \\join beta) \\union '
+            '\\select_{b1 = 2} (alpha \\join beta);', self.schema)[0]
+        before = self.sql(root)
+        actual = Optimizer().push_selections(root)
+        expected = self.build(
+            '((\\select_{a1 = 1} alpha) \\join beta) \\union '
+            '(alpha \\join \\select_{b1 = 2} beta);')
+        self.assertEqual(expected, actual)
+        self.assertEqual(before, self.sql(root))
+
+    def test_deep_chain(self):
+        depth = 5000
+        grammar = ExtendedGrammar()
+        builder = TreeBRD(grammar, PrecedenceParser(grammar))
+        root = builder.build('\\select_{a1 = 1} ' * depth +
+                             '(alpha \\join beta);', self.schema)[0]
+        node = Optimizer().push_selections(root).left
+        for _ in range(depth):
+            self.assertIsInstance(node, SelectNode)
+            node = node.child
+        self.assertIsInstance(node, RelationNode)
+
+
+class TestEliminateCrossProducts(OptimizerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.schema['delta'] = ['a1', 'd1']
+
+    def eliminate(self, instring):
+        return Optimizer().eliminate_cross_products(self.build(instring))
+
+    def test_theta_join(self):
+        actual = self.eliminate('\\select_{a1 < b1} (alpha \\join beta);')
+        expected = self.build('alpha \\theta_join_{a1 < b1} beta;')
+        self.assertEqual(expected, actual)
+
+    def test_other_conditions_are_kept(self):
+        actual = self.eliminate(
+            '\\select_{a1 = b1 and a2 = 1} (alpha \\join beta);')
+        expected = self.build(
+            '\\select_{a2 = 1} (alpha \\theta_join_{a1 = b1} beta);')
+        self.assertEqual(expected, actual)
+
+    def test_disjunction_is_kept(self):
+        instring = '\\select_{a1 = b1 or a2 = b2} (alpha \\join beta);'
+        self.assertEqual(self.build(instring), self.eliminate(instring))
+
+    def test_added_to_theta_join(self):
+        actual = self.eliminate(
+            '\\select_{a2 = b2} (alpha \\theta_join_{a1 = b1 or a3 = b1} '
+            'beta);')
+        expected = self.build(
+            'alpha \\theta_join_{(a1 = b1 or a3 = b1) and a2 = b2} beta;')
+        self.assertEqual(expected, actual)
+
+    def test_inner_join(self):
+        actual = self.eliminate(
+            '\\select_{a1 = b1 and b2 = g1} (alpha \\join beta \\join gamma);')
+        expected = self.build(
+            '(alpha \\theta_join_{a1 = b1} beta) \\theta_join_{b2 = g1} '
+            'gamma;')
+        self.assertEqual(expected, actual)
+
+    def test_natural_join(self):
+        actual = self.eliminate(
+            '\\project_{a2, d1} \\select_{alpha.a1 = delta.a1} '
+            '(alpha \\join delta);')
+        expected = self.build(
+            '\\project_{a2, d1} (alpha \\natural_join delta);')
+        self.assertEqual(expected, actual)
+
+    def test_natural_join_needs_dropped_attribute(self):
+        actual = self.eliminate(
+            '\\project_{a2, delta.a1} \\select_{alpha.a1 = delta.a1} '
+            '(alpha \\join delta);')
+        expected = self.build(
+            '\\project_{a2, delta.a1} '
+            '(alpha \\theta_join_{alpha.a1 = delta.a1} delta);')
+        self.assertEqual(expected, actual)
+
+    def test_natural_join_without_projection(self):
+        actual = self.eliminate(
+            '\\select_{alpha.a1 = delta.a1} (alpha \\join delta);')
+        expected = self.build(
+            'alpha \\theta_join_{alpha.a1 = delta.a1} delta;')
+        self.assertEqual(expected, actual)
+
+    def test_rapt_core_grammar(self):
+        instring = '\\select_{a1 = b1} (alpha \\join beta);'
+        expected = self.sql(self.build('alpha \\theta_join_{a1 = b1} beta;'))
+        rapt = Rapt(grammar='Core Grammar', optimize=True)
+        self.assertEqual([expected], rapt.to_sql(instring, self.schema))
+
+
+class TestReorderJoins(OptimizerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.catalog = Schema(self.schema, statistics={
+            'alpha': {'rows': 1000000, 'distinct': {'a1': 1000000}},
+            'beta': {'rows': 1000, 'distinct': {'b1': 1000, 'b2': 10}},
+            'gamma': {'rows': 10, 'distinct': {'g1': 10}}})
+
+    def reorder(self, instring, catalog=None):
+        root = self.build(instring)
+        return Optimizer().reorder_joins(root, catalog or self.catalog)
+
+    def test_cross_product_is_avoided(self):
+        actual = self.reorder(
+            '(alpha \\join gamma) \\theta_join_{a1 = b1 and b2 = g1} beta;')
+        expected = self.build(
+            '\\project_{alpha.a1, alpha.a2, alpha.a3, gamma.g1, gamma.g2, '
+            'beta.b1, beta.b2} ((beta \\theta_join_{b2 = g1} gamma) '
+            '\\theta_join_{a1 = b1} alpha);')
+        self.assertEqual(expected, actual)
+
+    def test_parent_projection_keeps_order(self):
+        actual = self.reorder(
+            '\\project_{a2} ((alpha \\join gamma) '
+            '\\theta_join_{a1 = b1 and b2 = g1} beta);')
+        expected = self.build(
+            '\\project_{a2} ((beta \\theta_join_{b2 = g1} gamma) '
+            '\\theta_join_{a1 = b1} alpha);')
+        self.assertEqual(expected, actual)
+
+    def test_cheapest_order_is_kept(self):
+        instring = ('(alpha \\theta_join_{a1 = b1} beta) '
+                    '\\theta_join_{b2 = g1} gamma;')
+        root = self.build(instring)
+        self.assertIs(root, Optimizer().reorder_joins(root, self.catalog))
+
+    def test_two_relations_are_kept(self):
+        root = self.build('alpha \\theta_join_{a1 = b1} beta;')
+        self.assertIs(root, Optimizer().reorder_joins(root, self.catalog))
+
+    def test_natural_join_is_kept(self):
+        root = self.build('(alpha \\join gamma) \\natural_join beta;')
+        self.assertIs(root, Optimizer().reorder_joins(root, self.catalog))
+
+    def test_ambiguous_columns_keep_written_order(self):
+        schema = {'delta': ['a1', 'd1'], 'gamma': ['g1', 'g2']}
+        catalog = Schema(schema, statistics={
+            'delta': {'rows': 50}, 'gamma': {'rows': 100000}})
+        instring = '(delta \\intersect delta) \\join gamma \\join ' \
+                   '(\\rename_{e} delta);'
+        root = self.builder.build(instring, schema)[0]
+        self.assertIs(root, Optimizer().reorder_joins(root, catalog))
+        rapt = Rapt(grammar='Extended Grammar', optimize=True)
+        self.assertEqual(Rapt(grammar='Extended Grammar').to_sql(
+            instring, catalog), rapt.to_sql(instring, catalog))
+
+    def test_join_inputs_are_reordered(self):
+        actual = self.reorder(
+            '\\select_{a1 = 1} ((alpha \\join gamma) '
+            '\\theta_join_{a1 = b1 and b2 = g1} beta) \\union '
+            '\\select_{a1 = 1} ((alpha \\join gamma) '
+            '\\theta_join_{a1 = b1 and b2 = g1} beta);')
+        branch = ('\\select_{a1 = 1} \\project_{alpha.a1, alpha.a2, '
+                  'alpha.a3, gamma.g1, gamma.g2, beta.b1, beta.b2} '
+                  '((beta \\theta_join_{b2 = g1} gamma) '
+                  '\\theta_join_{a1 = b1} alpha)')
+        expected = self.build(branch + ' \\union ' + branch + ';')
+        self.assertEqual(expected, actual)
+
+    def test_greedy(self):
+        count = DYNAMIC_PROGRAMMING_LIMIT + 2
+        schema = {'r{}'.format(i): ['x{}'.format(i), 'y{}'.format(i)]
+                  for i in range(count)}
+        order = list(range(0, count, 2)) + list(range(1, count, 2))
+        conditions = ' and '.join('y{} = x{}'.format(i, i + 1)
+                                  for i in range(count - 1))
+        relations = ' \\join '.join('r{}'.format(i) for i in order)
+        root = self.builder.build(
+            '\\project_{x0} \\select_{' + conditions + '} (' + relations +
+            ');', schema)[0]
+        optimizer = Optimizer()
+        root = optimizer.eliminate_cross_products(root)
+        node = optimizer.reorder_joins(root, Schema(schema)).child
+        names = []
+        while not node.name:
+            names.append(node.right.name)
+            node = node.left
+        names.append(node.name)
+        self.assertEqual(['r{}'.format(i) for i in range(count)],
+                         names[::-1])
+
+    def test_rapt_reorders_with_statistics(self):
+        instring = '\\select_{a1 = b1 and b2 = g1} (alpha \\join gamma ' \
+                   '\\join beta);'
+        rapt = Rapt(grammar='Extended Grammar', optimize=True)
+        actual = rapt.to_syntax_tree(instring, self.catalog)[0]
+        self.assertEqual(
+            ['beta', 'gamma', 'alpha'],
+            [actual.child.left.left.name, actual.child.left.right.name,
+             actual.child.right.name])
+
+    def test_rapt_keeps_written_order_without_reordering(self):
+        instring = '\\select_{a1 = b1 and b2 = g1} (alpha \\join gamma ' \
+                   '\\join beta);'
+        rapt = Rapt(grammar='Extended Grammar', optimize=True,
+                    reorder_joins=False)
+        expected = Optimizer().optimize(self.build(instring))
+        self.assertEqual(expected,
+                         rapt.to_syntax_tree(instring, self.catalog)[0])
+        self.assertEqual('alpha', expected.left.left.name)
+
+
+class TestPushProjections(OptimizerTestCase):
+    def test_join_inputs_are_projected(self):
+        root = self.build('\\project_{a1, b1} (alpha \\join beta);')
+        actual = Optimizer().push_projections(root)
+        expected = self.build(
+            '\\project_{a1, b1} ((\\project_{a1} alpha) \\join '
+            '(\\project_{b1} beta));')
+        self.assertEqual(expected, actual)
+
+    def test_condition_attributes_are_kept(self):
+        root = self.build(
+            '\\project_{a1} \\select_{a2 = b2} (alpha \\join beta);')
+        actual = Optimizer().push_projections(root)
+        expected = self.build(
+            '\\project_{a1} \\select_{a2 = b2} ((\\project_{a1, a2} alpha) '
+            '\\join (\\project_{b2} beta));')
+        self.assertEqual(expected, actual)
+
+    def test_natural_join_attributes_are_kept(self):
+        schema = {'alpha': ['a1', 'a2'], 'beta': ['a1', 'b2']}
+        root = self.builder.build(
+            '\\project_{b2} (alpha \\natural_join beta);', schema)[0]
+        actual = Optimizer().push_projections(root)
+        expected = self.builder.build(
+            '\\project_{b2} ((\\project_{a1} alpha) \\natural_join beta);',
+            schema)[0]
+        self.assertEqual(expected, actual)
+
+    def test_every_attribute_used(self):
+        root = self.build('alpha \\join beta;')
+        self.assertIs(root, Optimizer().push_projections(root))
+
+
+class TestOptimize(OptimizerTestCase):
+    def test_optimize(self):
+        root = self.build(
+            '\\project_{a1, b1} \\select_{a2 = 1 and b2 = 2} '
+            '(alpha \\join beta);')
+        expected = self.build(
+            '\\project_{a1, b1} ((\\project_{a1} \\select_{a2 = 1} alpha) '
+            '\\join (\\project_{b1} \\select_{b2 = 2} beta));')
+        self.assertEqual(expected, optimize(root))
+
+    def test_rapt_optimize(self):
+        instring = '\\select_{a1 = 1 and b1 = 2} (alpha \\join beta);'
+        expected = self.sql(self.build(
+            '(\\select_{a1 = 1} alpha) \\join (\\select_{b1 = 2} beta);'))
+        rapt = Rapt(grammar='Extended Grammar', optimize=True)
+        self.assertEqual([expected], rapt.to_sql(instring, self.schema))
+
+    def test_rapt_default_is_unoptimized(self):
+        instring = '\\select_{a1 = 1 and b1 = 2} (alpha \\join beta);'
+        rapt = Rapt(grammar='Extended Grammar')
+        self.assertEqual([self.sql(self.build(instring))],
+                         rapt.to_sql(instring, self.schema))
@@ -1,6 +1,7 @@
 from unittest import TestCase
-from rapt.treebrd.errors import RelationReferenceError
-from rapt.treebrd.schema import Schema
+from rapt.treebrd.errors import RelationReferenceError, \
+    AttributeReferenceError, InputError
+from rapt.treebrd.schema import Schema, Statistics
 
 
 class TestSchema(TestCase):
@@ -27,11 +28,145 @@ class TestSchema(TestCase):
         self.assertEqual(expected, actual)
 
     def test_add(self):
-        schema = Schema({'alpha': ['a1']})
+        schema = Schema({'alpha': ['a1']}).overlay()
         schema.add('beta', ['b1'])
         self.assertTrue(schema.contains('beta'))
         self.assertEqual(['b1'], schema.get_attributes('beta'))
 
     def test_exception_when_name_conflicts(self):
+        schema = Schema({'alpha': ['a1']}).overlay()
+        self.assertRaises(RelationReferenceError, schema.add, 'alpha', [])
+
+    def test_exception_when_schema_is_not_an_overlay(self):
         schema = Schema({'alpha': ['a1']})
-        self.assertRaises(RelationReferenceError, schema.add, 'alpha', [])
\ No newline at end of file
+        fingerprint = schema.fingerprint
+        self.assertRaises(InputError, schema.add, 'beta', ['b1'])
+        self.assertFalse(schema.contains('beta'))
+        self.assertEqual(fingerprint, schema.fingerprint)
+
+class TestSchemaOverlay(TestCase):
+    def setUp(self):
+        self.base = Schema({'Alpha': ['A1'], 'beta': ['b1']})
+        self.overlay = self.base.overlay()
+
+    def test_overlay_contains_base_relations(self):
+        self.assertTrue(self.overlay.contains('alpha'))
+        self.assertEqual(['a1'], self.overlay.get_attributes('alpha'))
+
+    def test_add_does_not_change_base(self):
+        self.overlay.add('gamma', ['g1'])
+        self.assertTrue(self.overlay.contains('gamma'))
+        self.assertFalse(self.base.contains('gamma'))
+
+    def test_exception_when_name_conflicts_with_base(self):
+        self.assertRaises(RelationReferenceError, self.overlay.add,
+                          'alpha', [])
+
+    def test_to_dict_merges_layers(self):
+        self.overlay.add('gamma', ['g1'])
+        self.assertEqual({'alpha': ['a1'], 'beta': ['b1'], 'gamma': ['g1']},
+                         self.overlay.to_dict())
+
+    def test_equal_to_flat_schema(self):
+        self.assertEqual(Schema({'alpha': ['a1'], 'beta': ['b1']}),
+                         self.overlay)
+
+    def test_exception_when_missing(self):
+        self.assertRaises(RelationReferenceError,
+                          self.overlay.get_attributes, 'gamma')
+
+
+class TestSchemaFingerprint(TestCase):
+    def test_equal_schemas_have_equal_fingerprints(self):
+        self.assertEqual(Schema({'Alpha': ['a1'], 'beta': ['b1']}).fingerprint,
+                         Schema({'beta': ['b1'], 'alpha': ['A1']}).fingerprint)
+
+    def test_different_schemas_have_different_fingerprints(self):
+        self.assertNotEqual(Schema({'alpha': ['a1']}).fingerprint,
+                            Schema({'alpha': ['a1', 'a2']}).fingerprint)
+
+    def test_fingerprint_changes_when_relation_is_added(self):
+        schema = Schema({'alpha': ['a1']}).overlay()
+        before = schema.fingerprint
+        schema.add('beta', ['b1'])
+        self.assertNotEqual(before, schema.fingerprint)
+
+    def test_fingerprint_is_stable(self):
+        self.assertEqual('10482a0e664542435128019b177d9ef36469decd',
+                         Schema({'alpha': ['a1']}).fingerprint)
+
+    def test_statistics_change_fingerprint(self):
+        statistics = {'alpha': {'rows': 10}}
+        self.assertNotEqual(
+            Schema({'alpha': ['a1']}).fingerprint,
+            Schema({'alpha': ['a1']}, statistics=statistics).fingerprint)
+
+
+class TestSchemaStatistics(TestCase):
+    def test_no_statistics(self):
+        self.assertIsNone(Schema({'alpha': ['a1']}).statistics('alpha'))
+
+    def test_statistics_from_dictionary(self):
+        schema = Schema({'Alpha': ['A1', 'a2']}, statistics={
+            'ALPHA': {'rows': 10, 'distinct': {'A1': 5}}})
+        statistics = schema.statistics('alpha')
+        self.assertEqual(10, statistics.rows)
+        self.assertEqual(5, statistics.distinct_count('a1'))
+        self.assertIsNone(statistics.distinct_count('a2'))
+
+    def test_statistics_object(self):
+        statistics = Statistics(rows=10)
+        schema = Schema({'alpha': ['a1']}, statistics={'alpha': statistics})
+        self.assertIs(statistics, schema.statistics('alpha'))
+
+    def test_statistics_of_base(self):
+        base = Schema({'alpha': ['a1']}, statistics={'alpha': {'rows': 10}})
+        self.assertEqual(10, base.overlay().statistics('alpha').rows)
+
+    def test_statistics_for_base_relation(self):
+        base = Schema({'alpha': ['a1']})
+        schema = Schema({}, base, statistics={'alpha': {'rows': 10}})
+        self.assertEqual(10, schema.statistics('alpha').rows)
+        self.assertIsNone(base.statistics('alpha'))
+
+    def test_statistics_for_missing_relation(self):
+        self.assertRaises(RelationReferenceError, Schema, {'alpha': ['a1']},
+                          statistics={'beta': {'rows': 10}})
+
+    def test_statistics_for_missing_attribute(self):
+        self.assertRaises(AttributeReferenceError, Schema, {'alpha': ['a1']},
+                          statistics={'alpha': {'distinct': {'b1': 10}}})
+
+    def test_invalid_count(self):
+        self.assertRaises(InputError, Statistics, rows=-1)
+        self.assertRaises(InputError, Statistics, distinct={'a1': 1.5})
+
+
+class TestSchemaKeys(TestCase):
+    def test_no_keys(self):
+        self.assertEqual((), Schema({'alpha': ['a1']}).keys('alpha'))
+
+    def test_keys(self):
+        schema = Schema({'alpha': ['a1', 'a2']},
+                        keys={'Alpha': [['A1'], ['a1', 'a2']]})
+        self.assertEqual((('a1',), ('a1', 'a2')), schema.keys('alpha'))
+
+    def test_keys_of_base(self):
+        base = Schema({'alpha': ['a1']}, keys={'alpha': [['a1']]})
+        self.assertEqual((('a1',),), base.overlay().keys('alpha'))
+
+    def test_keys_for_missing_relation(self):
+        self.assertRaises(RelationReferenceError, Schema, {'alpha': ['a1']},
+                          keys={'beta': [['a1']]})
+
+    def test_keys_for_missing_attribute(self):
+        self.assertRaises(AttributeReferenceError, Schema, {'alpha': ['a1']},
+                          keys={'alpha': [['b1']]})
+
+    def test_fingerprint(self):
+        definition = {'alpha': ['a1', 'a2']}
+        self.assertEqual(Schema(definition).fingerprint,
+                         Schema(definition, keys={}).fingerprint)
+        self.assertNotEqual(Schema(definition).fingerprint,
+                            Schema(definition,
+                                   keys={'alpha': [['a1']]}).fingerprint)
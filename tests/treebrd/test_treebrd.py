@@ -1,12 +1,20 @@
 from unittest import TestCase
 
 import functools
-
-from rapt.treebrd.errors import RelationReferenceError
-from rapt.treebrd.grammars import ExtendedGrammar
-from rapt.treebrd.node import RelationNode, ProjectNode, \
+import io
+
+from pyparsing import ParseException
+
+from rapt.rapt import Rapt
+from rapt.transformers.sql import sql_translator
+from rapt.treebrd.errors import RelationReferenceError, \
+    AttributeReferenceError
+from rapt.treebrd.grammars import ExtendedGrammar, PrecedenceParser
+from rapt.treebrd.grammars.condition_grammar import get_condition_tree
+from rapt.treebrd.grammars.syntax import Syntax
+from rapt.treebrd.node import RelationNode, ProjectNode, SelectNode, \
     CrossJoinNode, NaturalJoinNode, \
-    ThetaJoinNode
+    ThetaJoinNode, UnionNode
 from rapt.treebrd.schema import Schema
 from rapt.treebrd.treebrd import TreeBRD
 
@@ -225,4 +233,289 @@ class TestNaturalJoin(JoinTestCase):
     def test_exception_when_join_two_identical_relations(self):
         left = RelationNode('alpha', self.schema)
         right = RelationNode('alpha', self.schema)
-        self.assertRaises(RelationReferenceError, NaturalJoinNode, left, right)
\ No newline at end of file
+        self.assertRaises(RelationReferenceError, NaturalJoinNode, left, right)
+
+class TestSelect(TreeBRDTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.definition = {'alpha': ['a1', 'a2']}
+        cls.schema = Schema(cls.definition)
+
+    def test_select_with_custom_syntax(self):
+        syntax = Syntax(and_op='also', equal_op='eq')
+        builder = TreeBRD(ExtendedGrammar(syntax))
+        forest = builder.build('\\select_{a1 eq 1 also a2 eq a1} alpha;',
+                               self.definition)
+        child = RelationNode('alpha', self.schema)
+        conditions = get_condition_tree('a1 eq 1 also a2 eq a1', syntax)
+        expected = SelectNode(child, conditions)
+        self.assertEqual(expected, forest[0])
+
+    def test_select_conditions_are_a_tree(self):
+        builder = TreeBRD(ExtendedGrammar())
+        forest = builder.build('\\select_{not (a1 = 1) or a2 < "x"} alpha;',
+                               self.definition)
+        conditions = forest[0].conditions
+        self.assertEqual('or', conditions.operator)
+        self.assertEqual(['a1', 'a2'], conditions.references)
+        self.assertEqual("not ( a1 = 1 ) or a2 < 'x'", str(conditions))
+
+    def test_exception_when_custom_syntax_has_wrong_attribute(self):
+        syntax = Syntax(and_op='also', equal_op='eq')
+        builder = TreeBRD(ExtendedGrammar(syntax))
+        self.assertRaises(AttributeReferenceError, builder.build,
+                          '\\select_{a1 eq 1 also a3 eq a1} alpha;',
+                          self.definition)
+
+
+class TestPrecedenceParser(TreeBRDTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.definition = {'alpha': ['a1', 'a2'], 'beta': ['b1']}
+
+    def test_build_when_parser_is_given(self):
+        grammar = ExtendedGrammar()
+        instring = 'x := \\project_{a1} \\select_{a2 = 1} alpha; ' \
+                   'x \\join_{a1 = b1} beta \\union (x \\join beta);'
+        expected = TreeBRD(grammar).build(instring, self.definition)
+        actual = TreeBRD(grammar, PrecedenceParser(grammar)).build(
+            instring, self.definition)
+        self.assertEqual(expected, actual)
+
+    def test_rapt_when_parser_is_configured(self):
+        rapt = Rapt(grammar='Extended Grammar', parser='Precedence Parser')
+        self.assertIsInstance(rapt.builder.parser, PrecedenceParser)
+        self.assertEqual(
+            Rapt(grammar='Extended Grammar').to_sql('alpha;', self.definition),
+            rapt.to_sql('alpha;', self.definition))
+
+
+class TestIterBuild(TreeBRDTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.definition = {'alpha': ['a1', 'a2'], 'beta': ['b1']}
+        cls.builder = TreeBRD(ExtendedGrammar())
+
+    def test_iter_build_when_source_is_string(self):
+        instring = 'x := \\select_{a1 = "1;2"} alpha; x \\join beta;'
+        expected = self.builder.build(instring, self.definition)
+        actual = list(self.builder.iter_build(instring, self.definition))
+        self.assertEqual(expected, actual)
+
+    def test_iter_build_when_source_is_file(self):
+        instring = 'x := alpha;\n\\project_{a1}\nx;\n'
+        expected = self.builder.build(instring, self.definition)
+        actual = list(self.builder.iter_build(io.StringIO(instring),
+                                              self.definition))
+        self.assertEqual(expected, actual)
+
+    def test_iter_build_reads_one_statement_at_a_time(self):
+        consumed = []
+
+        def lines():
+            for i in range(1000):
+                consumed.append(i)
+                yield 'alpha;\n'
+
+        forest = self.builder.iter_build(lines(), self.definition)
+        next(forest)
+        self.assertEqual([0], consumed)
+
+    def test_exception_when_last_statement_is_not_terminated(self):
+        forest = self.builder.iter_build('alpha; beta', self.definition)
+        self.assertEqual(RelationNode('alpha', Schema(self.definition)),
+                         next(forest))
+        self.assertRaises(ParseException, next, forest)
+
+
+class TestDeepExpressions(TreeBRDTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.definition = {'alpha': ['a1', 'a2'], 'beta': ['b1']}
+        cls.builder = TreeBRD(ExtendedGrammar())
+
+    @staticmethod
+    def nested_projects(depth):
+        exp = ['alpha']
+        for _ in range(depth):
+            exp = ['\\project', ['a1'], exp]
+        return [exp]
+
+    def test_build_and_translate_deeply_nested_unary_operators(self):
+        depth = 100000
+        root = self.builder.to_node(self.nested_projects(depth),
+                                    Schema(self.definition))
+        self.assertEqual(depth + 1, len(root.post_order()))
+        self.assertEqual(['SELECT DISTINCT alpha.a1 FROM alpha'],
+                         sql_translator.translate([root]))
+
+    def test_build_long_chain_of_binary_operators(self):
+        length = 10000
+        exp = [['alpha']]
+        for i in range(length):
+            exp += ['\\union', ['alpha']]
+        root = self.builder.to_node([exp], Schema(self.definition))
+        self.assertEqual(2 * length + 1, len(root.post_order()))
+        self.assertIsInstance(root.left, UnionNode)
+
+    def test_translate_deeply_nested_text(self):
+        depth = 5000
+        rapt = Rapt(grammar='Extended Grammar', parser='Precedence Parser')
+        instring = '\\select_{a1 = 1} ' * depth + 'alpha \\join beta;'
+        sql = rapt.to_sql(instring, self.definition)[0]
+        self.assertEqual(depth, sql.count('a1 = 1'))
+        qtree = rapt.to_qtree(instring, self.definition)[0]
+        self.assertEqual(depth, qtree.count('a1 = 1'))
+
+    def test_translate_deeply_nested_conditions(self):
+        depth = 5000
+        rapt = Rapt(grammar='Extended Grammar', parser='Precedence Parser')
+        condition = '(not ' * depth + 'a1 = 1' + ')' * depth
+        sql = rapt.to_sql('\\select_{' + condition + '} alpha;',
+                          self.definition)[0]
+        self.assertEqual(depth, sql.count('not'))
+
+
+class TestIntern(TreeBRDTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.definition = {'alpha': ['a1', 'a2'], 'beta': ['b1']}
+
+    def test_identical_subtrees_are_shared(self):
+        builder = TreeBRD(ExtendedGrammar(), intern=True)
+        root = builder.build('\\select_{a1 = 1} alpha \\union '
+                             '\\select_{a1 = 1} alpha;', self.definition)[0]
+        self.assertIs(root.left, root.right)
+
+    def test_statements_share_subtrees(self):
+        builder = TreeBRD(ExtendedGrammar(), intern=True)
+        first, second = builder.build(
+            '\\project_{a1} (alpha \\join beta); alpha \\join beta;',
+            self.definition)
+        self.assertIs(first.child, second)
+
+    def test_builds_share_subtrees(self):
+        builder = TreeBRD(ExtendedGrammar(), intern=True)
+        first = builder.build('alpha \\join beta;', self.definition)[0]
+        second = builder.build('alpha \\join beta;', self.definition)[0]
+        self.assertIs(first, second)
+
+    def test_different_schemas_are_not_shared(self):
+        builder = TreeBRD(ExtendedGrammar(), intern=True)
+        first = builder.build('alpha;', self.definition)[0]
+        second = builder.build('alpha;', {'alpha': ['a1']})[0]
+        self.assertIsNot(first, second)
+
+    def test_interned_trees_equal_built_trees(self):
+        instring = '\\select_{a1 = b1} (alpha \\join beta) \\union ' \
+                   '\\select_{a1 = b1} (alpha \\join beta);'
+        expected = TreeBRD(ExtendedGrammar()).build(instring, self.definition)
+        actual = TreeBRD(ExtendedGrammar(), intern=True).build(
+            instring, self.definition)
+        self.assertEqual(expected, actual)
+
+    def test_shared_subtrees_translate(self):
+        instring = '\\select_{a1 = 1} alpha \\union \\select_{a1 = 1} alpha;'
+        expected = Rapt().to_sql(instring, self.definition)[0]
+        actual = Rapt(intern=True).to_sql(instring, self.definition)[0]
+        self.assertEqual(expected, actual)
+
+    def test_long_conditions_are_shared(self):
+        builder = TreeBRD(ExtendedGrammar(), intern=True)
+        instring = '\\select_{' + ' and '.join(['a1 = 1'] * 1500) + \
+            '} alpha;'
+        first = builder.build(instring, self.definition)[0]
+        second = builder.build(instring, self.definition)[0]
+        self.assertIs(first, second)
+
+    def test_builds_are_not_shared_by_default(self):
+        builder = TreeBRD(ExtendedGrammar())
+        first = builder.build('alpha;', self.definition)[0]
+        second = builder.build('alpha;', self.definition)[0]
+        self.assertIsNot(first, second)
+
+
+class TestPrebuiltSchema(TreeBRDTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.definition = {'alpha': ['a1', 'a2'], 'beta': ['b1']}
+        cls.builder = TreeBRD(ExtendedGrammar())
+
+    def setUp(self):
+        self.schema = Schema(self.definition)
+
+    def test_build_with_schema_equals_build_with_definition(self):
+        instring = 'x := \\project_{a1} alpha; x \\join beta;'
+        self.assertEqual(self.builder.build(instring, self.definition),
+                         self.builder.build(instring, self.schema))
+
+    def test_assignments_do_not_change_schema(self):
+        self.builder.build('x := alpha;', self.schema)
+        self.assertFalse(self.schema.contains('x'))
+        self.assertEqual(Schema(self.definition), self.schema)
+
+    def test_schema_is_reused_between_builds(self):
+        self.builder.build('x := alpha;', self.schema)
+        forest = self.builder.build('x := beta; x;', self.schema)
+        self.assertEqual(['b1'], forest[1].attributes.names)
+
+    def test_iter_build_assignments_do_not_change_schema(self):
+        forest = self.builder.iter_build('x := alpha; x;', self.schema)
+        self.assertEqual(2, len(list(forest)))
+        self.assertFalse(self.schema.contains('x'))
+
+    def test_rapt_accepts_schema(self):
+        instring = 'x := alpha; \\project_{a1} x;'
+        self.assertEqual(Rapt().to_sql(instring, self.definition),
+                         Rapt().to_sql(instring, self.schema))
+        self.assertFalse(self.schema.contains('x'))
+
+
+class TestParseAndBind(TreeBRDTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.definition = {'alpha': ['a1', 'a2'], 'beta': ['b1']}
+        cls.builder = TreeBRD(ExtendedGrammar())
+        cls.instring = 'x := \\rename_{y(c1, c2)} \\select_{a1 = 1} alpha;' \
+                       '\\project_{c1} x \\join_{c1 = b1} beta;'
+
+    def test_bind_equals_build(self):
+        trees = self.builder.parse(self.instring)
+        self.assertEqual(self.builder.build(self.instring, self.definition),
+                         self.builder.bind(trees, self.definition))
+
+    def test_parse_does_not_need_schema(self):
+        trees = self.builder.parse('gamma \\join delta;')
+        self.assertRaises(RelationReferenceError, self.builder.bind, trees,
+                          self.definition)
+
+    def test_parse_trees_are_hashable(self):
+        self.assertEqual(hash(self.builder.parse(self.instring)),
+                         hash(self.builder.parse(self.instring)))
+
+    def test_bind_to_many_schemas(self):
+        trees = self.builder.parse('\\project_{a1} alpha;')
+        for attributes in [['a1'], ['a2', 'a1'], ['a1', 'a3', 'a4']]:
+            root = self.builder.bind(trees, {'alpha': attributes})[0]
+            self.assertEqual(['a1'], root.attributes.names)
+            self.assertEqual(attributes, root.child.attributes.names)
+
+    def test_bind_does_not_change_trees(self):
+        trees = self.builder.parse(self.instring)
+        expected = self.builder.parse(self.instring)
+        self.builder.bind(trees, self.definition)
+        self.builder.bind(trees, self.definition)
+        self.assertEqual(expected, trees)
+
+    def test_rapt_parse_and_bind(self):
+        rapt = Rapt(grammar='Extended Grammar')
+        trees = rapt.parse(self.instring)
+        self.assertEqual(rapt.to_syntax_tree(self.instring, self.definition),
+                         rapt.bind(trees, self.definition))
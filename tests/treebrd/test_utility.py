@@ -0,0 +1,22 @@
+from unittest import TestCase
+
+from rapt.treebrd.utility import flatten
+
+
+class TestFlatten(TestCase):
+    def test_flat_list(self):
+        self.assertEqual(['a', 'b'], flatten(['a', 'b']))
+
+    def test_nested_list(self):
+        self.assertEqual(['a', 'b', 'c', 'd'],
+                         flatten([['a', ['b']], [], 'c', [[['d']]]]))
+
+    def test_long_list(self):
+        nested = [['a', '=', '1', 'and'] for _ in range(50000)]
+        self.assertEqual(200000, len(flatten(nested)))
+
+    def test_deep_list(self):
+        nested = ['a']
+        for _ in range(10000):
+            nested = [nested, 'b']
+        self.assertEqual(['a'] + ['b'] * 10000, flatten(nested))